@@ -1,18 +1,41 @@
 import logging
 
 from celery import shared_task
-from django.core.mail import send_mail
+from celery.signals import worker_process_shutdown, worker_shutdown
+from django.core.mail import get_connection, send_mail
+from django.db import connection as db_connection
 from backend.settings import DEFAULT_FROM_EMAIL
-from core.email_messages import create_confirmation_email
+from core import mail
+from core.email_templates import build_messages
+from core.jobs import update_job
+from users import activity, bloom, bulk, events, resend, stats
+from users.emails import OTP_CODE_TEMPLATE
+from users.models import AuthToken
 
 logger = logging.getLogger(__name__)
 
+OTP_EMAIL_SUBJECT = "InTimeBioTech: OTP ."
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def close_smtp_connections(**kwargs):
+    """
+    Закрывает SMTP-соединения, оставленные открытыми для следующих задач
+    (EMAIL_RELAY_KEEPALIVE), при остановке воркера (пул threads)
+    или дочернего процесса (пул prefork).
+    """
+
+    closed = mail.close_idle_connections()
+    logger.debug(f"Закрыто SMTP-соединений при остановке воркера: {closed}")
+
 
 @shared_task
 def send_email_message(email, email_message):
     """
     Асинхронная задача отправки электронного сообщения.
-    Отправляет электронное сообщение на указанный адрес.
+    Отправляет готовый текст на указанный адрес. Письма по шаблонам
+    отправляет send_template_emails.
     Args:
         email (str): Адрес электронной почты получателя.
         email_message (str): Текст сообщения.
@@ -21,7 +44,7 @@ def send_email_message(email, email_message):
     """
 
     try:
-        subject = "InTimeBioTech: OTP ."
+        subject = OTP_EMAIL_SUBJECT
         send_from = DEFAULT_FROM_EMAIL
         send_to = [email]
 
@@ -30,3 +53,152 @@ def send_email_message(email, email_message):
 
     except Exception as error:
         logger.error(f"Непредвиденная ошибка отправки письма: {error}")
+
+
+@shared_task
+def send_template_emails(template_key, object_ids, language=None, job_id=None):
+    """
+    Асинхронная задача отправки писем по шаблону через одно соединение
+    с почтовым сервером. В задаче передаются только ключ шаблона
+    и идентификаторы объектов: данные писем загружаются и отрисовываются
+    пачкой в воркере (core.email_templates).
+    Args:
+        template_key (str): Ключ шаблона письма (например,
+        users.emails.OTP_CODE_TEMPLATE).
+        object_ids (list): Идентификаторы объектов для писем.
+        language (str): Код языка писем (например, "ru").
+        job_id (str): Идентификатор задачи массовой рассылки, в счетчики
+        которой записываются отправленные и неотправленные письма.
+    """
+
+    # Неотправленные письма учитываются в счетчиках задачи рассылки,
+    # ошибки отправки журналирует почтовый бэкенд.
+    connection = get_connection(fail_silently=True)
+    try:
+        email_messages = build_messages(
+            template_key, object_ids, language, connection=connection
+        )
+        # Данные писем загружены: соединение с БД возвращается в пул
+        # (DB_POOL) на время доставки, а не удерживается потоком воркера.
+        if not db_connection.in_atomic_block:
+            db_connection.close()
+        sent = connection.send_messages(email_messages) or 0
+        logger.debug(f"Отправлено писем: {sent} из {len(object_ids)}")
+    except Exception as error:
+        sent = 0
+        logger.error(f"Непредвиденная ошибка отправки писем: {error}")
+
+    # Окна повторной отправки открываются до доставки (users.resend):
+    # если письма не доставлены, повторный запрос кода отправит их сразу.
+    # Какие письма пачки не доставлены, неизвестно, поэтому закрываются
+    # окна всех кодов пачки.
+    if sent < len(object_ids) and template_key == OTP_CODE_TEMPLATE:
+        resend.release_codes(object_ids)
+
+    if job_id is not None:
+        update_job(job_id, sent=sent, failed=len(object_ids) - sent)
+
+
+@shared_task
+def flush_user_stats():
+    """
+    Периодическая задача: переносит накопленные в Redis изменения
+    статистики пользователей в таблицу UserStatistic.
+    """
+
+    flushed = stats.flush()
+    if flushed is None:
+        logger.info("Сброс или сверка статистики уже выполняются, запуск пропущен")
+        return
+    logger.debug(f"Записано счетчиков статистики пользователей: {flushed}")
+
+
+@shared_task
+def reconcile_user_stats():
+    """
+    Периодическая задача: пересчитывает статистику пользователей
+    по таблице пользователей.
+    """
+
+    reconciled = stats.reconcile()
+    if reconciled is None:
+        logger.info("Сброс или сверка статистики уже выполняются, запуск пропущен")
+        return
+    logger.info(f"Статистика пользователей сверена, счетчиков: {reconciled}")
+
+
+@shared_task
+def flush_auth_events():
+    """
+    Периодическая задача: переносит события аутентификации из потока
+    Redis в журнал пачками bulk_create.
+    """
+
+    flushed = events.flush_events()
+    if flushed is None:
+        logger.info("События аутентификации уже записываются, запуск пропущен")
+        return
+    logger.debug(f"Записано событий аутентификации: {flushed}")
+
+
+@shared_task
+def maintain_auth_event_partitions():
+    """
+    Периодическая задача: создает месячные секции журнала аутентификации
+    наперед и удаляет секции старше AUTH_EVENT_RETENTION_MONTHS.
+    """
+
+    created, dropped = events.maintain_partitions()
+    if created or dropped:
+        logger.info(
+            f"Секции журнала аутентификации: созданы {created}, "
+            f"удалены {dropped}"
+        )
+
+
+@shared_task
+def flush_last_seen():
+    """
+    Периодическая задача: записывает накопленное в Redis время последней
+    активности пользователей в БД пачками UPDATE.
+    """
+
+    updated = activity.flush()
+    logger.debug(f"Обновлена активность пользователей: {updated}")
+
+
+@shared_task
+def check_email_bloom():
+    """
+    Периодическая задача: перестраивает фильтр Блума email, если он
+    не построен, переполнен или разошелся с таблицей пользователей.
+    """
+
+    if bloom.rebuild_if_saturated():
+        logger.info("Фильтр Блума email перестроен")
+
+
+@shared_task
+def run_user_bulk_job(job_id, generation=0):
+    """
+    Выполняет часть массовой операции над пользователями и, если она
+    не завершена, ставит в очередь продолжение. Задачи остаются
+    короткими, а операция переживает перезапуск воркера.
+    Args:
+        job_id (int): Идентификатор операции UserBulkJob.
+        generation (int): Номер запуска операции.
+    """
+
+    if bulk.run_job(job_id, generation):
+        run_user_bulk_job.delay(job_id, generation)
+
+
+@shared_task
+def delete_expired_tokens():
+    """
+    Периодическая задача: удаляет истекшие токены аутентификации
+    пачками по AUTH_TOKEN_CLEANUP_BATCH_SIZE.
+    """
+
+    deleted = AuthToken.objects.delete_expired()
+    logger.debug(f"Удалено истекших токенов: {deleted}")
@@ -1,7 +1,8 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework import routers
 
-from users.views import CustomUserViewSet
+from core.views import MetricsView
+from users.views import CustomUserViewSet, TokenCreateView, TokenDestroyView
 
 app_name = "api.v1"
 
@@ -12,7 +13,13 @@ router.register(r'users', CustomUserViewSet, basename='users')
 urlpatterns = [
     path("v1/", include(router.urls)),
     path("v1/", include("djoser.urls")),
-    path("v1/auth/", include("djoser.urls.authtoken")),
+    re_path(
+        r"^v1/auth/token/login/?$", TokenCreateView.as_view(), name="login"
+    ),
+    re_path(
+        r"^v1/auth/token/logout/?$", TokenDestroyView.as_view(), name="logout"
+    ),
+    path("v1/metrics/", MetricsView.as_view(), name="metrics"),
 
 ]
 
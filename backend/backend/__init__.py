@@ -0,0 +1,5 @@
+# Приложение Celery загружается вместе с Django, чтобы задачи из
+# shared_task отправлялись через брокер, настроенный в settings.
+from .celery import app as celery_app
+
+__all__ = ("celery_app",)
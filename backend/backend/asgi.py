@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
+
+With DJANGO_PRELOAD=True the application is warmed up on import (URLconf,
+serializers, database connection checks) and the garbage collector is
+frozen, so that workers forked by a preloading server share these pages
+copy-on-write. See backend/gunicorn.conf.py.
 """
 
 import os
@@ -14,3 +19,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_asgi_application()
+
+if os.getenv("DJANGO_PRELOAD", "False") == "True":
+    from core.startup import warm_up
+
+    warm_up()
@@ -0,0 +1,31 @@
+"""
+Настройки gunicorn.
+
+При GUNICORN_PRELOAD=True приложение загружается и прогревается в
+мастер-процессе до fork() (см. core.startup.warm_up), а рабочие процессы
+наследуют его память copy-on-write и стартуют без повторных импортов.
+Автоперезагрузка кода с предзагрузкой несовместима и включается только
+без нее.
+"""
+
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 2))
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "False") == "True"
+reload = not preload_app
+
+if preload_app:
+    os.environ.setdefault("DJANGO_PRELOAD", "True")
+
+
+def post_fork(server, worker):
+    """
+    Открывает соединения с БД в рабочем процессе сразу после fork().
+    """
+    if preload_app:
+        from core.startup import connect_worker
+
+        connect_worker()
@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 
@@ -16,12 +17,13 @@ ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "*").split(" ")
 
 
 INSTALLED_APPS = [
-    "django.contrib.admin",
+    "django.contrib.admin.apps.SimpleAdminConfig",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "users.apps.UsersConfig",
     "core.apps.CoreConfig",
     "djoser",
@@ -35,14 +37,54 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "core.middleware.PathScopedMiddleware",
+    "users.middleware.LastSeenMiddleware",
+    "core.middleware.AdmissionControlMiddleware",
+]
+
+# Middleware сессий, CSRF, сообщений и шаблонов. Запросы к путям из
+# LEAN_MIDDLEWARE_PREFIXES (API с TokenAuthentication) их пропускают.
+SCOPED_MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+LEAN_MIDDLEWARE_PREFIXES = ["/api/"]
+# HTML-страницы документации API открываются в браузере: им нужен полный
+# набор middleware, в том числе X-Frame-Options.
+LEAN_MIDDLEWARE_EXCLUDE = ["/api/swagger/", "/api/redoc/"]
+
+# Проверки админки admin.E408-E410 ищут middleware сессий, авторизации
+# и сообщений только в MIDDLEWARE и не видят их в SCOPED_MIDDLEWARE.
+# Отключаются только эти три проверки: вместо них core.checks (core.E001,
+# core.E002) проверяет наличие middleware в SCOPED_MIDDLEWARE и то, что
+# /admin/ не попадает под LEAN_MIDDLEWARE_PREFIXES.
+SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
+
+# Адаптивные лимиты одновременных запросов по действиям ViewSet
+# ("ViewSet.действие") и классам представлений
+# (core.admission.AdaptiveLimiter): начальный, минимальный и максимальный
+# лимит на все воркеры. Маршруты без записи не ограничиваются.
+ADMISSION_LIMITS = {
+    "CustomUserViewSet.verification_code": {"initial_limit": 4, "max_limit": 16},
+    "CustomUserViewSet.auth_otp_code": {"initial_limit": 4, "max_limit": 16},
+    "CustomUserViewSet.bulk_verification_code": {
+        "initial_limit": 1, "max_limit": 2,
+    },
+    "TokenCreateView": {"initial_limit": 2, "max_limit": 8},
+    "CustomUserViewSet.create": {"initial_limit": 2, "max_limit": 8},
+}
+# Предельное ожидание в очереди nginx, время, через которое клиенту
+# предлагается повторить запрос, и время, после которого место
+# незавершенного запроса освобождается, сек.
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+ADMISSION_MAX_REQUEST_TIME = int(os.getenv("ADMISSION_MAX_REQUEST_TIME", "60"))
+
 ROOT_URLCONF = "backend.urls"
 
 TEMPLATES = [
@@ -71,17 +113,58 @@ WSGI_APPLICATION = "backend.wsgi.application"
 #     }
 # }
 
+# Управление соединениями с PostgreSQL:
+# - DB_CONN_MAX_AGE: время жизни постоянного соединения в секундах;
+# - DB_CONN_HEALTH_CHECKS: проверка постоянного соединения перед запросом;
+# - DB_POOL: пул соединений процесса (DB_POOL_MAX_SIZE соединений,
+#   ожидание свободного не дольше DB_POOL_TIMEOUT секунд);
+# - DB_PGBOUNCER: режим работы через PgBouncer (pool_mode = transaction),
+#   без серверных курсоров и состояния сессии.
+DB_POOL = os.getenv("DB_POOL", "False") == "True"
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "False") == "True"
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.db.backends.postgresql",
         "NAME": os.getenv("POSTGRES_DB", default="django"),
         "USER": os.getenv("POSTGRES_USER", default="django_user"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", default="django"),
         "HOST": os.getenv("DB_HOST", default="intime-biotech-backend-db"),
         "PORT": os.getenv("DB_PORT", default="5432"),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", default="60")),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
+        "DISABLE_SERVER_SIDE_CURSORS": DB_PGBOUNCER,
+        "PGBOUNCER": DB_PGBOUNCER,
     }
 }
 
+if DB_POOL:
+    # Соединение возвращается в пул в конце каждого запроса.
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["POOL"] = {
+        "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", default="10")),
+        "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", default="5")),
+        "MAX_LIFETIME": int(os.getenv("DB_POOL_MAX_LIFETIME", default="1800")),
+        "HEALTH_CHECK_INTERVAL": int(
+            os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", default="30")
+        ),
+    }
+
+# Ограничения режима PgBouncer (pool_mode = transaction): транзакции
+# одного соединения Django могут выполняться в разных серверных
+# соединениях, поэтому состояние сессии недопустимо.
+# - Часовой пояс задается на стороне сервера (ALTER DATABASE ... SET
+#   timezone TO 'UTC'): бэкенд core.db не выполняет SET TIME ZONE и
+#   отказывается подключаться, если часовой пояс сервера другой.
+#   OPTIONS["assume_role"] (SET ROLE) в этом режиме запрещен.
+# - Серверные курсоры (QuerySet.iterator) отключены
+#   DISABLE_SERVER_SIDE_CURSORS.
+# - psycopg2 не создает подготовленных запросов на сервере.
+# - Рекомендательные блокировки (pg_advisory_lock), SET, LISTEN
+#   и временные таблицы вне транзакции не используются: код, которому
+#   они нужны, должен брать xact-варианты (pg_advisory_xact_lock,
+#   SET LOCAL) внутри transaction.atomic() или блокировки в Redis.
+
 # PASSWORD_HASHERS to list Argon2PasswordHasher first
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.Argon2PasswordHasher",
@@ -130,7 +213,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.ExpiringTokenAuthentication",
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend"
@@ -147,6 +230,7 @@ DJOSER = {
         "current_user": "users.serializers.CustomUserSerializer",
         "token": "djoser.serializers.TokenSerializer",
     },
+    "TOKEN_MODEL": "users.models.AuthToken",
     "USE_CUSTOM_TOKEN_SERIALIZERS": True,
     "PERMISSIONS": {
         "user": ["rest_framework.permissions.IsAuthenticated"],
@@ -169,8 +253,17 @@ SPECTACULAR_SETTINGS = {
     "SCHEMA_COERCE_PATH_PK_SUFFIX": True,
     "SORT_OPERATIONS": True,
     "SCHEMA_PATH_PREFIX": r"/api/",
+    "PREPROCESSING_HOOKS": ["core.openapi.load_schema_extensions"],
 }
 
+# Модули с описаниями схемы представлений (core.openapi.view_schema),
+# импортируются только при генерации схемы.
+OPENAPI_SCHEMA_MODULES = ["users.schemas"]
+
+# Собранная командой build_schema OpenAPI-схема и время ее кэширования.
+OPENAPI_SCHEMA_DIR = os.getenv("OPENAPI_SCHEMA_DIR", os.path.join(BASE_DIR, "schema"))
+OPENAPI_SCHEMA_MAX_AGE = int(os.getenv("OPENAPI_SCHEMA_MAX_AGE", "86400"))
+
 EMAIL_HOST = os.getenv("EMAIL_HOST")
 EMAIL_PORT = os.getenv("EMAIL_PORT")
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "False") == "True"
@@ -179,7 +272,149 @@ EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
 
+# Отправка через несколько SMTP-серверов с переключением (core.mail).
+# EMAIL_RELAYS - JSON-список серверов с ключами name, host, port,
+# username, password, use_tls, use_ssl, timeout; без него используется
+# один сервер EMAIL_HOST.
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "core.mail.FailoverEmailBackend")
+EMAIL_RELAYS = json.loads(os.getenv("EMAIL_RELAYS", "[]"))
+EMAIL_RELAY_TIMEOUT = float(os.getenv("EMAIL_RELAY_TIMEOUT", "10"))
+EMAIL_RELAY_MAX_ATTEMPTS = int(os.getenv("EMAIL_RELAY_MAX_ATTEMPTS", "3"))
+EMAIL_RELAY_RETRY_BACKOFF = float(os.getenv("EMAIL_RELAY_RETRY_BACKOFF", "0.5"))
+EMAIL_RELAY_FAILURE_THRESHOLD = int(
+    os.getenv("EMAIL_RELAY_FAILURE_THRESHOLD", "3")
+)
+EMAIL_RELAY_OPEN_TIME = float(os.getenv("EMAIL_RELAY_OPEN_TIME", "30"))
+# Сколько секунд соединение с сервером остается открытым в процессе
+# воркера после отправки для следующих задач; 0 - закрывать сразу.
+EMAIL_RELAY_KEEPALIVE = float(os.getenv("EMAIL_RELAY_KEEPALIVE", "30"))
+
 CELERY_BROKER_URL = 'redis://redis:6379/0'
+# Задачи лежат в api.v1.task, а не в tasks.py, поэтому autodiscover_tasks()
+# их не находит: воркер импортирует модуль явно.
+CELERY_IMPORTS = ("api.v1.task",)
+# Отправка писем почти все время ждет SMTP-сервер, поэтому почтовые задачи
+# идут в отдельную очередь, которую обрабатывает воркер с пулом потоков
+# (run_django.sh): сотни одновременных отправок в одном процессе вместо
+# процесса на каждую отправку в пуле prefork.
+CELERY_MAIL_QUEUE = os.getenv("CELERY_MAIL_QUEUE", "mail")
+CELERY_TASK_ROUTES = {
+    "api.v1.task.send_email_message": {"queue": CELERY_MAIL_QUEUE},
+    "api.v1.task.send_template_emails": {"queue": CELERY_MAIL_QUEUE},
+}
+# Периодические задачи (воркер запускается с --beat).
+CELERY_BEAT_SCHEDULE = {
+    "flush-user-stats": {
+        "task": "api.v1.task.flush_user_stats",
+        "schedule": int(os.getenv("USER_STATS_FLUSH_INTERVAL", "60")),
+    },
+    "reconcile-user-stats": {
+        "task": "api.v1.task.reconcile_user_stats",
+        "schedule": int(os.getenv("USER_STATS_RECONCILE_INTERVAL", "86400")),
+    },
+    "flush-auth-events": {
+        "task": "api.v1.task.flush_auth_events",
+        "schedule": int(os.getenv("AUTH_EVENT_FLUSH_INTERVAL", "10")),
+    },
+    "flush-last-seen": {
+        "task": "api.v1.task.flush_last_seen",
+        "schedule": int(os.getenv("LAST_SEEN_INTERVAL", "300")),
+    },
+    "check-email-bloom": {
+        "task": "api.v1.task.check_email_bloom",
+        "schedule": int(os.getenv("EMAIL_BLOOM_CHECK_INTERVAL", "600")),
+    },
+    "delete-expired-tokens": {
+        "task": "api.v1.task.delete_expired_tokens",
+        "schedule": int(os.getenv("AUTH_TOKEN_CLEANUP_INTERVAL", "3600")),
+    },
+    "maintain-auth-event-partitions": {
+        "task": "api.v1.task.maintain_auth_event_partitions",
+        "schedule": 86400,
+    },
+}
+
+# Кэш в Redis. При недоступности Redis кэш пропускается, а не роняет запрос.
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": os.getenv("REDIS_CACHE_URL", "redis://redis:6379/1"),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "IGNORE_EXCEPTIONS": True,
+        },
+    }
+}
+
+# Кэш профиля /users/me: время жизни записи в секундах.
+PROFILE_CACHE_TIMEOUT = int(os.getenv("PROFILE_CACHE_TIMEOUT", "300"))
+
+# Время хранения сведений о фоновых задачах (прогресс по job id), сек.
+JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT", "86400"))
+
+# Массовая выдача OTP-кодов: максимум адресов в запросе, строк в одном
+# INSERT и писем в одной задаче Celery.
+BULK_OTP_MAX_EMAILS = int(os.getenv("BULK_OTP_MAX_EMAILS", "10000"))
+BULK_OTP_BATCH_SIZE = int(os.getenv("BULK_OTP_BATCH_SIZE", "1000"))
+BULK_OTP_EMAIL_CHUNK_SIZE = int(os.getenv("BULK_OTP_EMAIL_CHUNK_SIZE", "100"))
+
+# Журнал аутентификации: предельная длина буфера в Redis, событий в одном
+# INSERT и срок хранения месячных секций.
+AUTH_EVENT_STREAM_MAXLEN = int(os.getenv("AUTH_EVENT_STREAM_MAXLEN", "1000000"))
+AUTH_EVENT_BATCH_SIZE = int(os.getenv("AUTH_EVENT_BATCH_SIZE", "1000"))
+AUTH_EVENT_RETENTION_MONTHS = int(os.getenv("AUTH_EVENT_RETENTION_MONTHS", "12"))
+
+# Последняя активность пользователей: интервал записи в БД (не больше
+# одного UPDATE на пользователя за интервал), сек, и количество
+# пользователей, которых процесс помнит как уже отмеченных.
+LAST_SEEN_INTERVAL = int(os.getenv("LAST_SEEN_INTERVAL", "300"))
+LAST_SEEN_LOCAL_SIZE = int(os.getenv("LAST_SEEN_LOCAL_SIZE", "10000"))
+
+# Фильтр Блума email пользователей: расчетное число адресов, целевая доля
+# ложных срабатываний и доля, при превышении которой фильтр перестраивается.
+EMAIL_BLOOM_CAPACITY = int(os.getenv("EMAIL_BLOOM_CAPACITY", "1000000"))
+EMAIL_BLOOM_ERROR_RATE = float(os.getenv("EMAIL_BLOOM_ERROR_RATE", "0.01"))
+EMAIL_BLOOM_REBUILD_ERROR_RATE = float(
+    os.getenv("EMAIL_BLOOM_REBUILD_ERROR_RATE", "0.02")
+)
+
+# Массовые операции над пользователями: ключей в одной транзакции
+# и время работы одной задачи Celery до постановки продолжения, сек.
+USER_BULK_JOB_BATCH_SIZE = int(os.getenv("USER_BULK_JOB_BATCH_SIZE", "500"))
+USER_BULK_JOB_CHUNK_TIME = int(os.getenv("USER_BULK_JOB_CHUNK_TIME", "30"))
+# Время без обновлений, после которого операцию в очереди или
+# выполняющуюся можно возобновить как зависшую, сек.
+USER_BULK_JOB_STALE_TIME = int(
+    os.getenv("USER_BULK_JOB_STALE_TIME", str(10 * USER_BULK_JOB_CHUNK_TIME))
+)
+USER_BULK_JOB_MAX_IDS = int(os.getenv("USER_BULK_JOB_MAX_IDS", "100000"))
+USER_BULK_JOB_LIST_SIZE = 50
+
+# Номера телефонов без кода страны (core.normalizers.normalize_phone):
+# код страны, национальный префикс и длина национального номера.
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv("PHONE_DEFAULT_COUNTRY_CODE", "7")
+PHONE_NATIONAL_PREFIX = os.getenv("PHONE_NATIONAL_PREFIX", "8")
+PHONE_NATIONAL_LENGTH = int(os.getenv("PHONE_NATIONAL_LENGTH", "10"))
+
+# Токены аутентификации (users.authentication): срок действия,
+# интервал продления при использовании (сек), наибольшее число токенов
+# (устройств) пользователя и токенов в одном DELETE при удалении истекших.
+AUTH_TOKEN_TTL = int(os.getenv("AUTH_TOKEN_TTL", str(30 * 24 * 60 * 60)))
+AUTH_TOKEN_REFRESH_INTERVAL = int(
+    os.getenv("AUTH_TOKEN_REFRESH_INTERVAL", str(24 * 60 * 60))
+)
+AUTH_TOKEN_MAX_PER_USER = int(os.getenv("AUTH_TOKEN_MAX_PER_USER", "10"))
+AUTH_TOKEN_CLEANUP_BATCH_SIZE = int(
+    os.getenv("AUTH_TOKEN_CLEANUP_BATCH_SIZE", "1000")
+)
+
+# Язык писем, если язык запроса не поддерживается шаблоном
+# (core.email_templates).
+EMAIL_DEFAULT_LANGUAGE = os.getenv("EMAIL_DEFAULT_LANGUAGE", "ru")
+
+# Окно, в течение которого повторный запрос того же OTP-кода не отправляет
+# письмо заново (users.resend), сек; 0 - отправлять каждый раз.
+OTP_RESEND_COOLDOWN = int(os.getenv("OTP_RESEND_COOLDOWN", "60"))
 
 # OTP_CODE_EXPIRATION_TIME = os.getenv("OTP_CODE_EXPIRATION_TIME")
 OTP_CODE_EXPIRATION_TIME = 90
\ No newline at end of file
@@ -1,26 +1,31 @@
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-    SpectacularRedocView,
-)
 
 from backend import settings
+from core.views import PrebuiltSchemaView, lazy_view
+
+# Админка подключена через SimpleAdminConfig: модули admin.py загружаются
+# вместе с URL-конфигурацией, а не в каждом процессе при django.setup()
+# (воркеры Celery и команды manage.py их не импортируют).
+admin.autodiscover()
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.v1.urls", namespace="api")),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("api/schema/", PrebuiltSchemaView.as_view(), name="schema"),
     path(
         "api/swagger/",
-        SpectacularSwaggerView.as_view(url_name="schema"),
+        lazy_view(
+            "drf_spectacular.views.SpectacularSwaggerView", url_name="schema"
+        ),
         name="swagger-ui",
     ),
     path(
         "api/redoc/",
-        SpectacularRedocView.as_view(url_name="schema"),
+        lazy_view(
+            "drf_spectacular.views.SpectacularRedocView", url_name="schema"
+        ),
         name="redoc",
     ),
 ]
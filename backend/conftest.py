@@ -0,0 +1,27 @@
+import pytest
+from django_redis import get_redis_connection
+
+from backend.celery import app
+
+
+@pytest.fixture(autouse=True)
+def celery_eager():
+    """
+    Задачи Celery выполняются в процессе теста, без брокера.
+    """
+    app.conf.task_always_eager = True
+    yield
+    app.conf.task_always_eager = False
+
+
+@pytest.fixture
+def redis():
+    """
+    Соединение с Redis кэша. Тесты, которым нужен Redis, используют
+    отдельную базу (REDIS_CACHE_URL в окружении тестов), она очищается
+    до и после теста.
+    """
+    connection = get_redis_connection("default")
+    connection.flushdb()
+    yield connection
+    connection.flushdb()
@@ -0,0 +1,235 @@
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+INFLIGHT_KEY = "admission:{route_class}"
+LIMIT_KEY = "admission:{route_class}:limit"
+LIMIT_TIMEOUT = 24 * 60 * 60
+
+# Занимает место в множестве выполняющихся запросов класса, если их меньше
+# общего лимита. Места запросов, не освободивших их за MAX_REQUEST_TIME
+# (например, из-за убитого воркера), удаляются.
+ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+local limit = math.floor(tonumber(redis.call('GET', KEYS[2]) or ARGV[3]))
+local inflight = redis.call('ZCARD', KEYS[1])
+if inflight >= limit then return -1 end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return inflight + 1
+"""
+
+# Изменяет общий лимит на градиент, рассчитанный процессом по задержке:
+# limit * gradient + sqrt(limit) со сглаживанием и в границах лимита.
+# Лимит возвращается строкой, чтобы Redis не округлил его до целого.
+UPDATE_SCRIPT = """
+local limit = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+local smoothing = tonumber(ARGV[3])
+local new_limit = limit * tonumber(ARGV[2]) + math.sqrt(limit)
+limit = limit * (1 - smoothing) + new_limit * smoothing
+limit = math.max(tonumber(ARGV[4]), math.min(tonumber(ARGV[5]), limit))
+redis.call('SET', KEYS[1], tostring(limit), 'EX', ARGV[6])
+return tostring(limit)
+"""
+
+
+class AdaptiveLimiter:
+    """
+    Адаптивный лимит одновременных запросов одного класса маршрутов.
+    Выполняющиеся запросы и сам лимит хранятся в Redis, поэтому лимит
+    общий для всех воркеров. Величина лимита подбирается по наблюдаемой
+    задержке градиентным методом: каждый процесс сравнивает свои короткую
+    и долгосрочную средние задержки, и пока они близки, лимит растет
+    на sqrt(limit), а когда задержка растет (очередь в БД, CPU), лимит
+    уменьшается пропорционально.
+    Attributes:
+        - route_class: Имя класса маршрутов (действие ViewSet или класс
+        представления).
+        - limit: Последнее известное процессу значение общего лимита.
+        - min_limit, max_limit: Границы лимита.
+        - tolerance: Допустимый рост задержки относительно долгосрочной
+        средней, при котором лимит не уменьшается.
+        - smoothing: Доля нового значения лимита при обновлении.
+    """
+
+    def __init__(
+        self, route_class, initial_limit=10, min_limit=1, max_limit=100,
+        tolerance=1.5, smoothing=0.2, long_window=600, short_window=10,
+    ):
+        self.route_class = route_class
+        self.key = INFLIGHT_KEY.format(route_class=route_class)
+        self.limit_key = LIMIT_KEY.format(route_class=route_class)
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.long_decay = 2 / (long_window + 1)
+        self.short_decay = 2 / (short_window + 1)
+        self.long_rtt = None
+        self.short_rtt = None
+        self.inflight = 0
+        self.admitted = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Пытается занять место для запроса.
+        Returns:
+            str | None: Токен места или None, если лимит исчерпан. Если
+            Redis недоступен, запрос пропускается с пустым токеном.
+        """
+        token = uuid.uuid4().hex
+        now = time.time()
+        try:
+            result = get_redis_connection("default").eval(
+                ACQUIRE_SCRIPT, 2, self.key, self.limit_key,
+                now, now - settings.ADMISSION_MAX_REQUEST_TIME,
+                self.limit, token,
+                settings.ADMISSION_MAX_REQUEST_TIME,
+            )
+        except Exception as error:
+            logger.warning(f"Контроль нагрузки отключен для запроса: {error}")
+            return ""
+        with self._lock:
+            if result < 0:
+                self.shed += 1
+                return None
+            self.admitted += 1
+            self.inflight += 1
+        return token
+
+    def release(self, token, rtt, failed=False):
+        """
+        Освобождает место и обновляет общий лимит по задержке запроса.
+        Args:
+            token (str): Токен места из acquire().
+            rtt (float): Время обработки запроса в секундах.
+            failed (bool): Запрос завершился ошибкой сервера: лимит
+            уменьшается так же, как при росте задержки.
+        """
+        with self._lock:
+            # Пустой токен: место не занималось, запрос не учтен.
+            if token:
+                self.inflight -= 1
+            gradient = self._update(rtt, failed)
+        try:
+            redis = get_redis_connection("default")
+            if token:
+                redis.zrem(self.key, token)
+            if gradient is not None:
+                limit = redis.eval(
+                    UPDATE_SCRIPT, 1, self.limit_key,
+                    self.limit, gradient, self.smoothing,
+                    self.min_limit, self.max_limit, LIMIT_TIMEOUT,
+                )
+                with self._lock:
+                    self.limit = float(limit)
+        except Exception as error:
+            logger.warning(
+                f"Место запроса не освобождено или лимит не обновлен: {error}"
+            )
+
+    def stats(self):
+        """
+        Возвращает показатели лимита текущего процесса.
+        """
+        with self._lock:
+            return {
+                "limit": round(self.limit, 2),
+                "inflight": self.inflight,
+                "admitted": self.admitted,
+                "shed": self.shed,
+                "short_rtt": self.short_rtt and round(self.short_rtt, 6),
+                "long_rtt": self.long_rtt and round(self.long_rtt, 6),
+            }
+
+    def _update(self, rtt, failed):
+        if self.long_rtt is None:
+            self.long_rtt = self.short_rtt = rtt
+            return None
+        self.short_rtt += (rtt - self.short_rtt) * self.short_decay
+        self.long_rtt += (rtt - self.long_rtt) * self.long_decay
+        if failed:
+            gradient = 0.5
+        else:
+            gradient = max(
+                0.5,
+                min(1.0, self.tolerance * self.long_rtt / self.short_rtt),
+            )
+        # После спада нагрузки долгосрочная средняя быстрее опускается
+        # к новой задержке, чтобы лимит не завышался.
+        if self.long_rtt > self.short_rtt * 2:
+            self.long_rtt *= 0.9
+        return gradient
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(route_class):
+    """
+    Возвращает лимитер класса маршрутов или None, если для класса
+    не задан лимит в settings.ADMISSION_LIMITS.
+    Args:
+        route_class (str): Имя класса маршрутов.
+    Returns:
+        AdaptiveLimiter | None: Лимитер.
+    """
+    options = settings.ADMISSION_LIMITS.get(route_class)
+    if options is None:
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get(route_class)
+        if limiter is None:
+            limiter = AdaptiveLimiter(route_class, **options)
+            _limiters[route_class] = limiter
+        return limiter
+
+
+def get_route_class(view_func, method):
+    """
+    Определяет класс маршрута запроса: имя ViewSet с именем действия
+    (например, CustomUserViewSet.verification_code) или имя класса
+    представления.
+    Args:
+        view_func (callable): Представление из URL-конфигурации.
+        method (str): HTTP-метод запроса.
+    Returns:
+        str | None: Имя класса маршрута.
+    """
+    view_class = getattr(view_func, "cls", None) or getattr(
+        view_func, "view_class", None
+    )
+    if view_class is None:
+        return None
+    actions = getattr(view_func, "actions", None)
+    if actions:
+        # Имена действий (create, list) повторяются в разных ViewSet.
+        action = actions.get(method.lower())
+        return f"{view_class.__name__}.{action}" if action else None
+    return view_class.__name__
+
+
+def admission_stats():
+    """
+    Возвращает показатели лимитов текущего процесса по классам маршрутов.
+    Returns:
+        dict: Лимит, выполняющиеся, пропущенные и отклоненные запросы.
+    """
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.route_class: limiter.stats() for limiter in limiters}
+
+
+metrics.register_collector("admission", admission_stats)
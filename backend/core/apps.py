@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        import core.checks  # noqa: F401
+        # Сборщик метрик почтовых серверов регистрируется и в процессах
+        # API, которые сами писем не отправляют.
+        import core.mail  # noqa: F401
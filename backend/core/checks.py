@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Middleware, которые админка ожидает в MIDDLEWARE (admin.E408-E410).
+ADMIN_MIDDLEWARE = (
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+)
+
+
+@register(Tags.admin)
+def check_scoped_middleware(app_configs, **kwargs):
+    """
+    Заменяет отключенные проверки admin.E408-E410: middleware сессий,
+    авторизации и сообщений должны быть подключены через
+    SCOPED_MIDDLEWARE, а /admin/ - обрабатываться с полным набором.
+    """
+    errors = []
+    if "core.middleware.PathScopedMiddleware" not in settings.MIDDLEWARE:
+        return errors
+    for middleware in ADMIN_MIDDLEWARE:
+        if middleware not in settings.SCOPED_MIDDLEWARE:
+            errors.append(
+                Error(
+                    f"'{middleware}' должен быть в SCOPED_MIDDLEWARE "
+                    "для работы админки.",
+                    id="core.E001",
+                )
+            )
+    if "/admin/".startswith(tuple(settings.LEAN_MIDDLEWARE_PREFIXES)):
+        errors.append(
+            Error(
+                "/admin/ не должен попадать под LEAN_MIDDLEWARE_PREFIXES.",
+                id="core.E002",
+            )
+        )
+    return errors
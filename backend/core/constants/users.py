@@ -2,8 +2,10 @@
 #     Users константы
 # -------------------------
 
+DEVICE_LENGTH: int = 128
 EMAIL_LENGTH: int = 254
 NAME_LENGTH: int = 150
-PHONE_NUMBER_LENGTH: int = 15
+# Формат E.164: плюс и до 15 цифр.
+PHONE_NUMBER_LENGTH: int = 16
 ROLE_LENGTH: int = 20
 SEX_LENGTH: int = 6
@@ -0,0 +1,78 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql.base import (
+    DatabaseWrapper as PostgresDatabaseWrapper,
+)
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core.db.pool import get_pool
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    """
+    Бэкенд PostgreSQL с необязательным пулом соединений процесса.
+    Если в настройках базы данных задан ключ POOL, соединения берутся
+    из пула и возвращаются в него при закрытии вместо разрыва.
+    Без ключа POOL бэкенд работает как стандартный бэкенд Django.
+    С ключом PGBOUNCER бэкенд не изменяет состояние сессии (SET TIME
+    ZONE, SET ROLE), а отказывается подключаться, если оно требуется.
+    """
+
+    @property
+    def pool(self):
+        """
+        Возвращает пул соединений базы данных или None, если пул отключен.
+        """
+        options = self.settings_dict.get("POOL")
+        if not options:
+            return None
+        return get_pool(self.alias, options)
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+        # Стандартный бэкенд выставляет уровень изоляции только при создании
+        # соединения, поэтому для соединения из пула задаем его здесь.
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get(
+                "isolation_level", IsolationLevel.READ_COMMITTED
+            )
+        )
+        return connection
+
+    def ensure_timezone(self):
+        if not self.settings_dict.get("PGBOUNCER") or self.connection is None:
+            return super().ensure_timezone()
+        # SET TIME ZONE осталось бы в серверном соединении PgBouncer
+        # и не попало бы в другие.
+        server_timezone = self.connection.info.parameter_status("TimeZone")
+        if self.timezone_name and server_timezone != self.timezone_name:
+            raise ImproperlyConfigured(
+                f"Режим PgBouncer: часовой пояс сервера {server_timezone}, "
+                f"ожидается {self.timezone_name} (ALTER DATABASE ... "
+                f"SET timezone TO '{self.timezone_name}')."
+            )
+        return False
+
+    def ensure_role(self):
+        if self.settings_dict.get("PGBOUNCER") and (
+            self.settings_dict["OPTIONS"].get("assume_role")
+        ):
+            raise ImproperlyConfigured(
+                "Режим PgBouncer: OPTIONS['assume_role'] (SET ROLE) "
+                "не поддерживается."
+            )
+        return super().ensure_role()
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        # Соединение, закрытое внутри atomic-блока или после ошибки,
+        # в пул не возвращается.
+        discard = self.in_atomic_block or self.errors_occurred
+        with self.wrap_database_errors:
+            pool.release(self.connection, discard=discard)
@@ -0,0 +1,248 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeoutError(OperationalError):
+    """
+    Исключение: за отведенное время в пуле не освободилось соединение.
+    Наследуется от OperationalError psycopg2, чтобы Django обернул его
+    в django.db.OperationalError.
+    """
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений PostgreSQL в пределах одного процесса.
+    Ограничивает количество одновременно открытых соединений, ждет
+    освобождения соединения не дольше timeout секунд, проверяет
+    простаивавшие соединения перед выдачей и пересоздает соединения,
+    прожившие дольше max_lifetime.
+    Attributes:
+        - max_size: Максимальное количество соединений.
+        - timeout: Максимальное время ожидания свободного соединения.
+        - max_lifetime: Максимальное время жизни соединения.
+        - health_check_interval: Время простоя, после которого соединение
+        проверяется запросом SELECT 1 перед выдачей.
+    """
+
+    def __init__(
+        self, max_size, timeout, max_lifetime, health_check_interval
+    ):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        # Элементы: (соединение, время создания, время возврата в пул).
+        self._idle = deque()
+        self._created_at = {}
+        self.in_use = 0
+        self.waiting = 0
+        self.timeouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.wait_time_total = 0.0
+
+    def acquire(self, connect):
+        """
+        Выдает соединение из пула или создает новое.
+        Args:
+            connect (callable): Функция создания нового соединения.
+        Returns:
+            connection: Соединение psycopg2.
+        Raises:
+            PoolTimeoutError: Если свободное соединение не появилось за timeout.
+        """
+        started = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        with self._lock:
+            self.waiting -= 1
+            self.wait_time_total += time.monotonic() - started
+            if not acquired:
+                self.timeouts += 1
+        if not acquired:
+            raise PoolTimeoutError(
+                f"Нет свободных соединений в пуле за {self.timeout} с."
+            )
+        try:
+            connection = self._take_idle() or self._create(connect)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+        return connection
+
+    def release(self, connection, discard=False):
+        """
+        Возвращает соединение в пул. Незавершенная транзакция
+        откатывается, сломанное или устаревшее соединение закрывается.
+        Args:
+            connection: Соединение psycopg2.
+            discard (bool): Закрыть соединение вместо возврата в пул.
+        """
+        try:
+            if not discard and not connection.closed:
+                if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+                created_at = self._created_at.get(id(connection), 0)
+                if time.monotonic() - created_at < self.max_lifetime:
+                    with self._lock:
+                        self._idle.append(
+                            (connection, created_at, time.monotonic())
+                        )
+                    return
+            self._discard(connection)
+        except Exception as error:
+            logger.warning(f"Соединение исключено из пула: {error}")
+            self._discard(connection)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        """
+        Возвращает показатели заполненности пула.
+        Returns:
+            dict: Размер пула, занятые, свободные и ожидающие соединения,
+            количество таймаутов ожидания и суммарное время ожидания.
+        """
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "in_use": self.in_use,
+                "idle": len(self._idle),
+                "waiting": self.waiting,
+                "saturation": self.in_use / self.max_size,
+                "timeouts": self.timeouts,
+                "created": self.created,
+                "discarded": self.discarded,
+                "wait_time_total": round(self.wait_time_total, 6),
+            }
+
+    def close_idle(self):
+        """
+        Закрывает все свободные соединения пула.
+        """
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, _, _ in idle:
+            self._discard(connection)
+
+    def _take_idle(self):
+        """
+        Достает из пула рабочее соединение, отбрасывая сломанные
+        и устаревшие.
+        """
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection, created_at, released_at = self._idle.pop()
+            now = time.monotonic()
+            if connection.closed or now - created_at >= self.max_lifetime:
+                self._discard(connection)
+                continue
+            if now - released_at >= self.health_check_interval:
+                if not self._is_usable(connection):
+                    self._discard(connection)
+                    continue
+            return connection
+
+    def _create(self, connect):
+        connection = connect()
+        with self._lock:
+            self.created += 1
+            self._created_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _discard(self, connection):
+        with self._lock:
+            self.discarded += 1
+            self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_usable(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        except Exception:
+            return False
+        return True
+
+
+def get_pool(alias, options):
+    """
+    Возвращает пул соединений процесса для указанной базы данных.
+    После fork() дочерний процесс получает собственный пул. Пулы родителя
+    остаются в памяти нетронутыми: закрытие унаследованного соединения
+    разорвало бы сессию родительского процесса.
+    Args:
+        alias (str): Псевдоним базы данных из settings.DATABASES.
+        options (dict): Параметры пула из ключа POOL настроек базы данных.
+    Returns:
+        ConnectionPool: Пул соединений.
+    """
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                max_size=options.get("MAX_SIZE", 10),
+                timeout=options.get("TIMEOUT", 5),
+                max_lifetime=options.get("MAX_LIFETIME", 1800),
+                health_check_interval=options.get("HEALTH_CHECK_INTERVAL", 30),
+            )
+            _pools[key] = pool
+        return pool
+
+
+def close_pools():
+    """
+    Закрывает свободные соединения всех пулов текущего процесса.
+    Вызывается перед fork(), чтобы рабочие процессы не унаследовали
+    открытые сокеты.
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [pool for (key_pid, _), pool in _pools.items() if key_pid == pid]
+    for pool in pools:
+        pool.close_idle()
+
+
+def pools_stats():
+    """
+    Возвращает показатели всех пулов текущего процесса.
+    Returns:
+        dict: Показатели пулов по псевдонимам баз данных.
+    """
+    pid = os.getpid()
+    with _pools_lock:
+        pools = {alias: pool for (key_pid, alias), pool in _pools.items()
+                 if key_pid == pid}
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+metrics.register_collector("db_pool", pools_stats)
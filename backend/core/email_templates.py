@@ -0,0 +1,169 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import get_template
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Файлы шаблона: emails/<ключ>/<язык>.txt и emails/<ключ>/<язык>.html.
+TEMPLATE_PATH = "emails/{key}/{language}.{extension}"
+
+_templates = {}
+_compiled = {}
+_lock = threading.Lock()
+
+
+class EmailTemplate:
+    """
+    Шаблон письма: тема, обычный текст и HTML на нескольких языках.
+    Тексты компилируются при первом использовании языка и хранятся
+    скомпилированными до конца жизни процесса, поэтому воркер не читает
+    и не разбирает файлы шаблонов для каждого письма.
+    Attributes:
+        - key: Ключ шаблона в реестре, передается в задачах вместо текста.
+        - subjects: Темы писем по языкам, задают набор языков шаблона.
+        - load_contexts: Функция, получающая список идентификаторов
+        объектов и возвращающая словарь {идентификатор: (адрес
+        получателя, контекст шаблона)} для найденных объектов.
+    """
+
+    def __init__(self, key, subjects, load_contexts):
+        self.key = key
+        self.subjects = subjects
+        self.load_contexts = load_contexts
+
+    def get_language(self, language=None):
+        """
+        Выбирает язык шаблона. Языки перебираются в порядке предпочтения
+        (значение в формате заголовка Accept-Language, например
+        "de, ru-RU;q=0.8"): для каждого проверяется точное совпадение,
+        затем основной язык (ru-ru -> ru). Если шаблона нет ни на одном
+        из языков, используется EMAIL_DEFAULT_LANGUAGE.
+        Args:
+            language (str): Желаемый язык или заголовок Accept-Language.
+        Returns:
+            str: Язык, на котором есть шаблон.
+        """
+        for accepted, _ in parse_accept_lang_header(language or ""):
+            for candidate in (accepted, accepted.split("-")[0]):
+                if candidate in self.subjects:
+                    return candidate
+        return settings.EMAIL_DEFAULT_LANGUAGE
+
+    def render_many(self, contexts, language=None):
+        """
+        Отрисовывает пачку писем одними скомпилированными шаблонами.
+        Args:
+            contexts (list): Контексты писем.
+            language (str): Язык писем.
+        Returns:
+            list: Тройки (тема, обычный текст, HTML).
+        """
+        language = self.get_language(language)
+        text, html = self._compile(language)
+        subject = self.subjects[language]
+        rendered = [
+            (subject, text.render(context), html.render(context))
+            for context in contexts
+        ]
+        metrics.incr(f"email_templates.{self.key}.rendered", len(rendered))
+        return rendered
+
+    def render(self, context, language=None):
+        """
+        Отрисовывает одно письмо.
+        Args:
+            context (dict): Контекст письма.
+            language (str): Язык письма.
+        Returns:
+            tuple: Тема, обычный текст и HTML.
+        """
+        return self.render_many([context], language)[0]
+
+    def _compile(self, language):
+        cache_key = (self.key, language)
+        compiled = _compiled.get(cache_key)
+        if compiled is None:
+            compiled = tuple(
+                get_template(
+                    TEMPLATE_PATH.format(
+                        key=self.key, language=language, extension=extension
+                    )
+                )
+                for extension in ("txt", "html")
+            )
+            with _lock:
+                _compiled[cache_key] = compiled
+            metrics.incr("email_templates.compiled")
+        return compiled
+
+
+def register(key, subjects, load_contexts):
+    """
+    Регистрирует шаблон письма.
+    Args:
+        key (str): Ключ шаблона.
+        subjects (dict): Темы писем по языкам.
+        load_contexts (callable): Загрузка контекстов по идентификаторам
+        объектов (см. EmailTemplate).
+    Returns:
+        EmailTemplate: Зарегистрированный шаблон.
+    """
+    template = EmailTemplate(key, subjects, load_contexts)
+    with _lock:
+        _templates[key] = template
+    return template
+
+
+def get_email_template(key):
+    """
+    Возвращает зарегистрированный шаблон письма.
+    Args:
+        key (str): Ключ шаблона.
+    Returns:
+        EmailTemplate: Шаблон.
+    Raises:
+        KeyError: Если шаблон не зарегистрирован.
+    """
+    return _templates[key]
+
+
+def build_messages(key, object_ids, language=None, connection=None):
+    """
+    Загружает данные писем по идентификаторам объектов и отрисовывает
+    их пачкой.
+    Args:
+        key (str): Ключ шаблона.
+        object_ids (list): Идентификаторы объектов (например, кодов
+        верификации).
+        language (str): Язык писем.
+        connection: Соединение с почтовым сервером для писем.
+    Returns:
+        list: Письма EmailMultiAlternatives. Для ненайденных объектов
+        письма не создаются.
+    """
+    template = get_email_template(key)
+    contexts = template.load_contexts(object_ids)
+    recipients = [contexts[pk][0] for pk in object_ids if pk in contexts]
+    rendered = template.render_many(
+        [contexts[pk][1] for pk in object_ids if pk in contexts], language
+    )
+    messages = []
+    for recipient, (subject, text, html) in zip(recipients, rendered):
+        message = EmailMultiAlternatives(
+            subject, text, settings.DEFAULT_FROM_EMAIL, [recipient],
+            connection=connection,
+        )
+        message.attach_alternative(html, "text/html")
+        messages.append(message)
+    if len(messages) < len(object_ids):
+        logger.warning(
+            f"Письма {key}: не найдено объектов "
+            f"{len(object_ids) - len(messages)} из {len(object_ids)}"
+        )
+    return messages
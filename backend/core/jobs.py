@@ -0,0 +1,84 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+JOB_KEY = "jobs:{job_id}"
+JOB_COUNTER_KEY = "jobs:{job_id}:{counter}"
+
+
+def create_job(kind, total, counters=("processed",), **meta):
+    """
+    Регистрирует фоновую задачу и ее счетчики прогресса в кэше.
+    Args:
+        kind (str): Тип задачи.
+        total (int): Общее количество элементов.
+        counters (tuple): Имена счетчиков исходов обработки элементов
+        (например, sent и failed): задача завершена, когда их сумма
+        достигает total.
+        meta: Дополнительные сведения о задаче.
+    Returns:
+        str: Идентификатор задачи.
+    """
+    job_id = uuid.uuid4().hex
+    values = {
+        JOB_KEY.format(job_id=job_id): {
+            "id": job_id,
+            "kind": kind,
+            "total": total,
+            "counters": list(counters),
+            "created_at": time.time(),
+            **meta,
+        },
+    }
+    for counter in counters:
+        values[JOB_COUNTER_KEY.format(job_id=job_id, counter=counter)] = 0
+    cache.set_many(values, settings.JOB_TIMEOUT)
+    return job_id
+
+
+def update_job(job_id, **increments):
+    """
+    Увеличивает счетчики прогресса задачи. Счетчики хранятся отдельными
+    ключами и увеличиваются атомарно, поэтому их можно обновлять
+    из нескольких воркеров одновременно.
+    Args:
+        job_id (str): Идентификатор задачи.
+        increments: Приращения счетчиков.
+    """
+    for counter, amount in increments.items():
+        if not amount:
+            continue
+        try:
+            cache.incr(
+                JOB_COUNTER_KEY.format(job_id=job_id, counter=counter), amount
+            )
+        except ValueError:
+            # Задача истекла или не зарегистрирована.
+            pass
+
+
+def get_job(job_id):
+    """
+    Возвращает сведения о задаче и текущие значения ее счетчиков.
+    Args:
+        job_id (str): Идентификатор задачи.
+    Returns:
+        dict | None: Сведения о задаче или None, если задача не найдена.
+    """
+    job = cache.get(JOB_KEY.format(job_id=job_id))
+    if job is None:
+        return None
+    keys = {
+        counter: JOB_COUNTER_KEY.format(job_id=job_id, counter=counter)
+        for counter in job["counters"]
+    }
+    values = cache.get_many(keys.values())
+    progress = {
+        counter: int(values.get(key, 0)) for counter, key in keys.items()
+    }
+    job = {key: value for key, value in job.items() if key != "counters"}
+    job.update(progress)
+    job["done"] = sum(progress.values()) >= job["total"]
+    return job
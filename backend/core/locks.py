@@ -0,0 +1,36 @@
+import logging
+from contextlib import contextmanager
+
+from redis.exceptions import LockError
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def redis_lock(redis, key, timeout):
+    """
+    Неблокирующая блокировка в Redis для периодических задач. Значение
+    ключа - случайный токен владельца, блокировка снимается сравнением
+    токена (redis-py Lock): запуск, переживший timeout, не снимет
+    блокировку следующего запуска.
+    Args:
+        redis: Соединение с Redis.
+        key (str): Ключ блокировки.
+        timeout (int): Время жизни блокировки, сек.
+    Yields:
+        bool: Получена ли блокировка. Если нет, запуск нужно пропустить.
+    """
+    lock = redis.lock(key, timeout=timeout)
+    if not lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logger.warning(
+                f"Блокировка {key} истекла до завершения запуска "
+                f"(дольше {timeout} с)"
+            )
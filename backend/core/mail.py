@@ -0,0 +1,478 @@
+import logging
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend
+from django_redis import get_redis_connection
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Показатели серверов для эндпоинта метрик: письма отправляют воркеры
+# Celery, а метрики отдают процессы API, поэтому показатели публикуются
+# в Redis (хэш на сервер).
+RELAY_STATS_KEY = "email_relays:{name}"
+RELAY_STATS_TIMEOUT = 24 * 60 * 60
+
+
+class RelayHealth:
+    """
+    Состояние почтового сервера (relay) в текущем процессе: скользящие
+    средние задержки отправки и доли ошибок и автомат размыкания цепи.
+    После EMAIL_RELAY_FAILURE_THRESHOLD ошибок подряд сервер исключается
+    из выбора на EMAIL_RELAY_OPEN_TIME секунд, затем пропускается одна
+    пробная отправка: успех возвращает сервер, ошибка снова исключает его.
+    Attributes:
+        - name: Имя сервера из EMAIL_RELAYS.
+        - latency: Скользящая средняя задержки отправки письма (ошибка
+        учитывается как ожидание таймаута), сек.
+        - error_rate: Скользящая средняя доли ошибок.
+        - failures: Ошибок подряд.
+        - opened_at: Время размыкания цепи или None.
+    """
+
+    def __init__(self, name, smoothing=0.2):
+        self.name = name
+        self.smoothing = smoothing
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.sent = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return CLOSED
+        if time.monotonic() - self.opened_at >= settings.EMAIL_RELAY_OPEN_TIME:
+            return HALF_OPEN
+        return OPEN
+
+    def score(self):
+        """
+        Оценка сервера для выбора: задержка с поправкой на долю ошибок,
+        меньше - лучше. Ошибки учитываются в задержке как ожидание
+        таймаута сервера, поэтому сервер, не отправивший ни одного
+        письма, не получает лучшую оценку. Сервер без истории получает
+        нулевую задержку, чтобы его опробовали.
+        """
+        with self._lock:
+            return (self.latency or 0.0) * (1 + 10 * self.error_rate)
+
+    def acquire(self):
+        """
+        Проверяет, можно ли отправить письмо через сервер. В полуоткрытом
+        состоянии пропускает только одну пробную отправку.
+        Returns:
+            bool: True, если отправка разрешена.
+        """
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self, latency):
+        with self._lock:
+            self._record_latency(latency)
+            self.error_rate -= self.error_rate * self.smoothing
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+            self.sent += 1
+
+    def record_failure(self, penalty):
+        """
+        Учитывает ошибку отправки.
+        Args:
+            penalty (float): Задержка, которой штрафуется сервер
+            (таймаут соединения с ним), сек.
+        """
+        with self._lock:
+            self._record_latency(penalty)
+            self.error_rate += (1 - self.error_rate) * self.smoothing
+            self.failures += 1
+            self.failed += 1
+            if self.probing or (
+                self.failures >= settings.EMAIL_RELAY_FAILURE_THRESHOLD
+            ):
+                if self.opened_at is None or self.probing:
+                    logger.warning(f"Почтовый сервер {self.name} исключен")
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def _record_latency(self, latency):
+        self.latency = (
+            latency if self.latency is None
+            else self.latency + (latency - self.latency) * self.smoothing
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "latency_ms": (
+                    round(self.latency * 1000, 1)
+                    if self.latency is not None else None
+                ),
+                "error_rate": round(self.error_rate, 4),
+                "sent": self.sent,
+                "failed": self.failed,
+            }
+
+
+_health = {}
+_health_lock = threading.Lock()
+
+# Открытые SMTP-соединения между отправками (EMAIL_RELAY_KEEPALIVE) по
+# серверам: списки пар (соединение, время освобождения). Поток воркера
+# (в том числе в пуле threads) забирает соединение из списка на время
+# отправки, поэтому одно соединение не используется двумя потоками сразу.
+# Простаивающие дольше EMAIL_RELAY_KEEPALIVE соединения закрывает фоновый
+# поток процесса, оставшиеся закрываются при остановке воркера.
+_idle = {}
+_idle_lock = threading.Lock()
+_reaper = None
+
+
+def close_idle_connections(max_idle=0.0):
+    """
+    Закрывает соединения, простаивающие не меньше max_idle секунд.
+    Args:
+        max_idle (float): Время простоя, сек; 0 - закрыть все.
+    Returns:
+        int: Количество закрытых соединений.
+    """
+    now = time.monotonic()
+    expired = []
+    with _idle_lock:
+        for entries in _idle.values():
+            expired.extend(
+                connection for connection, idle_since in entries
+                if now - idle_since >= max_idle
+            )
+            entries[:] = [
+                (connection, idle_since) for connection, idle_since in entries
+                if now - idle_since < max_idle
+            ]
+    for connection in expired:
+        _close(connection)
+    return len(expired)
+
+
+def _start_reaper():
+    global _reaper
+    with _idle_lock:
+        # После fork в дочернем процессе поток родителя не выполняется.
+        if _reaper is not None and _reaper.is_alive():
+            return
+        _reaper = threading.Thread(
+            target=_reap, name="smtp-idle-reaper", daemon=True
+        )
+        _reaper.start()
+
+
+def _reap():
+    while True:
+        keepalive = settings.EMAIL_RELAY_KEEPALIVE
+        time.sleep(max(keepalive / 2, 1.0))
+        close_idle_connections(keepalive)
+
+
+def get_health(name):
+    """
+    Возвращает состояние почтового сервера текущего процесса.
+    Args:
+        name (str): Имя сервера.
+    Returns:
+        RelayHealth: Состояние сервера.
+    """
+    with _health_lock:
+        health = _health.get(name)
+        if health is None:
+            health = _health[name] = RelayHealth(name)
+        return health
+
+
+def get_relays():
+    """
+    Возвращает настройки почтовых серверов: EMAIL_RELAYS или, если
+    список не задан, один сервер из EMAIL_HOST и связанных настроек.
+    Returns:
+        list: Словари с ключами name, host, port и необязательными
+        username, password, use_tls, use_ssl, timeout.
+    """
+    if settings.EMAIL_RELAYS:
+        return [
+            {"name": relay.get("name") or f"{relay['host']}:{relay['port']}",
+             **relay}
+            for relay in settings.EMAIL_RELAYS
+        ]
+    return [
+        {
+            "name": "default",
+            "host": settings.EMAIL_HOST,
+            "port": settings.EMAIL_PORT,
+            "username": settings.EMAIL_HOST_USER,
+            "password": settings.EMAIL_HOST_PASSWORD,
+            "use_tls": settings.EMAIL_USE_TLS,
+            "use_ssl": settings.EMAIL_USE_SSL,
+        }
+    ]
+
+
+class FailoverEmailBackend(BaseEmailBackend):
+    """
+    Почтовый бэкенд с несколькими SMTP-серверами (EMAIL_RELAYS).
+    Каждое письмо отправляется через сервер с лучшей оценкой задержки
+    и ошибок среди доступных. При ошибке сервер получает штраф (и может
+    быть исключен автоматом размыкания цепи), а письмо после паузы
+    EMAIL_RELAY_RETRY_BACKOFF * 2 ** попытка отправляется через другой
+    сервер, всего до EMAIL_RELAY_MAX_ATTEMPTS попыток. Соединения
+    с серверами открываются при первом письме и после close() остаются
+    открытыми в процессе EMAIL_RELAY_KEEPALIVE секунд, чтобы следующие
+    задачи не устанавливали соединение заново.
+    """
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.relays = get_relays()
+        self.connections = {}
+        # Серверы, соединения с которыми взяты из соединений потока
+        # и еще не использовались: сервер мог закрыть их по простою.
+        self.reused = set()
+
+    def open(self):
+        # Соединения открываются по мере выбора серверов.
+        return False
+
+    def close(self):
+        if settings.EMAIL_RELAY_KEEPALIVE > 0 and self.connections:
+            now = time.monotonic()
+            with _idle_lock:
+                for name, connection in self.connections.items():
+                    _idle.setdefault(name, []).append((connection, now))
+            _start_reaper()
+        else:
+            for connection in self.connections.values():
+                _close(connection)
+        self.connections = {}
+        self.reused = set()
+
+    def send_messages(self, email_messages):
+        """
+        Отправляет письма с переключением между серверами. Ошибка
+        отправки одного письма не прерывает отправку остальных.
+        Args:
+            email_messages (list): Письма EmailMessage.
+        Returns:
+            int: Количество отправленных писем.
+        Raises:
+            Exception: Последняя ошибка, если часть писем не отправлена
+            и fail_silently не установлен.
+        """
+        sent = 0
+        error = None
+        try:
+            for message in email_messages:
+                try:
+                    self._send(message)
+                    sent += 1
+                except Exception as send_error:
+                    error = send_error
+        finally:
+            self.close()
+        if error is not None and not self.fail_silently:
+            raise error
+        return sent
+
+    def _send(self, message):
+        tried = set()
+        error = None
+        for attempt in range(settings.EMAIL_RELAY_MAX_ATTEMPTS):
+            relay = self._choose(tried)
+            if relay is None:
+                break
+            if attempt:
+                metrics.incr("email_relays.retries")
+                time.sleep(settings.EMAIL_RELAY_RETRY_BACKOFF * 2 ** (attempt - 1))
+            tried.add(relay["name"])
+            health = get_health(relay["name"])
+            started = time.monotonic()
+            try:
+                if self._send_to(relay, message):
+                    health.record_success(time.monotonic() - started)
+                    publish_health(health, sent=1)
+                    return
+                raise RuntimeError("Сервер не принял письмо")
+            except Exception as send_error:
+                error = send_error
+                health.record_failure(
+                    relay.get("timeout", settings.EMAIL_RELAY_TIMEOUT)
+                )
+                publish_health(health, failed=1)
+                self._drop_connection(relay)
+                logger.warning(
+                    f"Письмо не отправлено через {relay['name']}: {send_error}"
+                )
+        metrics.incr("email_relays.undelivered")
+        raise error or RuntimeError("Нет доступных почтовых серверов")
+
+    def _send_to(self, relay, message):
+        try:
+            return self._connection(relay).send_messages([message])
+        except smtplib.SMTPServerDisconnected:
+            if relay["name"] not in self.reused:
+                raise
+            # Сервер закрыл простаивавшее соединение потока: это не ошибка
+            # сервера, письмо отправляется через новое соединение.
+            self._drop_connection(relay)
+            return self._connection(relay).send_messages([message])
+        finally:
+            self.reused.discard(relay["name"])
+
+    def _choose(self, tried):
+        """
+        Выбирает доступный сервер с лучшей оценкой, сначала среди
+        непробованных для этого письма.
+        """
+        for exclude in (tried, set()):
+            candidates = sorted(
+                (
+                    relay for relay in self.relays
+                    if relay["name"] not in exclude
+                ),
+                key=lambda relay: get_health(relay["name"]).score(),
+            )
+            for relay in candidates:
+                if get_health(relay["name"]).acquire():
+                    return relay
+        return None
+
+    def _connection(self, relay):
+        name = relay["name"]
+        connection = self.connections.get(name)
+        if connection is None:
+            connection = self._idle_connection(name)
+        if connection is None:
+            connection = EmailBackend(
+                host=relay["host"],
+                port=relay["port"],
+                username=relay.get("username"),
+                password=relay.get("password"),
+                use_tls=relay.get("use_tls", False),
+                use_ssl=relay.get("use_ssl", False),
+                timeout=relay.get("timeout", settings.EMAIL_RELAY_TIMEOUT),
+                fail_silently=False,
+            )
+            # Открытое заранее соединение не закрывается после каждого
+            # письма.
+            connection.open()
+        self.connections[name] = connection
+        return connection
+
+    def _idle_connection(self, name):
+        with _idle_lock:
+            entries = _idle.get(name)
+            # Последнее освобожденное соединение реже закрыто сервером.
+            entry = entries.pop() if entries else None
+        if entry is None:
+            return None
+        connection, idle_since = entry
+        if time.monotonic() - idle_since > settings.EMAIL_RELAY_KEEPALIVE:
+            _close(connection)
+            return None
+        self.reused.add(name)
+        metrics.incr("email_relays.reused_connections")
+        return connection
+
+    def _drop_connection(self, relay):
+        connection = self.connections.pop(relay["name"], None)
+        if connection is not None:
+            _close(connection)
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except Exception as error:
+        logger.debug(f"Ошибка закрытия SMTP-соединения: {error}")
+
+
+def publish_health(health, sent=0, failed=0):
+    """
+    Публикует состояние сервера в Redis для эндпоинта метрик. Счетчики
+    писем складываются по всем воркерам, состояние цепи, задержка и доля
+    ошибок - последние опубликованные любым воркером.
+    Args:
+        health (RelayHealth): Состояние сервера.
+        sent (int): Отправлено писем.
+        failed (int): Не отправлено писем.
+    """
+    stats = health.stats()
+    key = RELAY_STATS_KEY.format(name=health.name)
+    try:
+        with get_redis_connection("default").pipeline(
+            transaction=False
+        ) as pipeline:
+            pipeline.hincrby(key, "sent", sent)
+            pipeline.hincrby(key, "failed", failed)
+            pipeline.hset(
+                key,
+                mapping={
+                    "state": stats["state"],
+                    "latency_ms": (
+                        "" if stats["latency_ms"] is None
+                        else stats["latency_ms"]
+                    ),
+                    "error_rate": stats["error_rate"],
+                },
+            )
+            pipeline.expire(key, RELAY_STATS_TIMEOUT)
+            pipeline.execute()
+    except Exception as error:
+        logger.debug(f"Состояние почтового сервера не опубликовано: {error}")
+
+
+def relay_stats():
+    """
+    Возвращает состояние почтовых серверов, опубликованное воркерами
+    в Redis (publish_health).
+    Returns:
+        dict: Состояние цепи, средняя задержка, доля ошибок,
+        отправленные и неотправленные письма по серверам.
+    """
+    names = [relay["name"] for relay in get_relays()]
+    with get_redis_connection("default").pipeline(transaction=False) as pipeline:
+        for name in names:
+            pipeline.hgetall(RELAY_STATS_KEY.format(name=name))
+        published = pipeline.execute()
+    stats = {}
+    for name, values in zip(names, published):
+        values = {key.decode(): value.decode() for key, value in values.items()}
+        latency = values.get("latency_ms")
+        stats[name] = {
+            "state": values.get("state", CLOSED),
+            "latency_ms": float(latency) if latency else None,
+            "error_rate": float(values.get("error_rate", 0)),
+            "sent": int(values.get("sent", 0)),
+            "failed": int(values.get("failed", 0)),
+        }
+    return stats
+
+
+metrics.register_collector("email_relays", relay_stats)
@@ -0,0 +1,182 @@
+import socketserver
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import override_settings
+from django.utils import timezone
+
+from api.v1.task import send_template_emails
+from core import mail
+from core.db.pool import pools_stats
+from users.emails import OTP_CODE_TEMPLATE
+from users.models import VerificationCode
+
+# Адреса писем бенчмарка: коды с такими адресами удаляются после замера.
+BENCH_EMAIL = "bench-{number}@example.invalid"
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """
+    Минимальный SMTP-сервер: принимает любые команды и письма,
+    отвечая на каждое письмо через delay секунд.
+    """
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.wfile.write(b"220 bench\r\n")
+        data = False
+        for line in self.rfile:
+            if data:
+                if line == b".\r\n":
+                    data = False
+                    time.sleep(server.delay)
+                    with server.lock:
+                        server.received += 1
+                    self.wfile.write(b"250 ok\r\n")
+                continue
+            command = line[:4].upper()
+            if command == b"DATA":
+                data = True
+                self.wfile.write(b"354 go\r\n")
+            elif command == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, delay):
+        super().__init__(("127.0.0.1", 0), SinkHandler)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.received = 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет отправку писем с OTP-кодами задачей send_template_emails "
+        "так, как ее выполняет почтовый воркер с пулом потоков: задачи "
+        "выполняются в --threads потоках, письма принимает локальный "
+        "SMTP-сервер с задержкой --smtp-delay. Выводит пропускную "
+        "способность, время задачи, ожидание соединения с БД (при DB_POOL) "
+        "и число SMTP-соединений."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads", type=int, default=100,
+            help="Потоков воркера (CELERY_MAIL_CONCURRENCY).",
+        )
+        parser.add_argument(
+            "--messages", type=int, default=2000,
+            help="Количество писем.",
+        )
+        parser.add_argument(
+            "--chunk", type=int, default=1,
+            help="Писем в одной задаче.",
+        )
+        parser.add_argument(
+            "--smtp-delay", type=float, default=0.05,
+            help="Время ответа SMTP-сервера на письмо, сек.",
+        )
+        parser.add_argument(
+            "--keepalive", type=float, default=30,
+            help="EMAIL_RELAY_KEEPALIVE, сек (0 - без повторного "
+            "использования соединений).",
+        )
+
+    def handle(self, *args, **options):
+        count = options["messages"]
+        chunk = options["chunk"]
+        expiration = timezone.now() + timedelta(hours=1)
+        codes = VerificationCode.objects.bulk_create(
+            VerificationCode(
+                email=BENCH_EMAIL.format(number=number),
+                otp_code=100000 + number,
+                expiration=expiration,
+            )
+            for number in range(count)
+        )
+        ids = [code.pk for code in codes]
+        chunks = [ids[start:start + chunk] for start in range(0, count, chunk)]
+
+        sink = SinkServer(options["smtp_delay"])
+        threading.Thread(target=sink.serve_forever, daemon=True).start()
+        relays = [{
+            "name": "bench",
+            "host": "127.0.0.1",
+            "port": sink.server_address[1],
+        }]
+        try:
+            with override_settings(
+                EMAIL_BACKEND="core.mail.FailoverEmailBackend",
+                EMAIL_RELAYS=relays,
+                EMAIL_RELAY_KEEPALIVE=options["keepalive"],
+            ):
+                # Прогрев: шаблоны компилируются при первом письме.
+                send_template_emails(OTP_CODE_TEMPLATE, ids[:1])
+                sink.received = sink.connections = 0
+                elapsed, durations = self.measure(chunks, options["threads"])
+                mail.close_idle_connections()
+        finally:
+            sink.shutdown()
+            sink.server_close()
+            VerificationCode.objects.filter(pk__in=ids).delete()
+
+        durations.sort()
+        self.stdout.write(
+            f"Писем: {count}, задач: {len(chunks)}, "
+            f"потоков: {options['threads']}"
+        )
+        self.stdout.write(
+            f"Доставлено: {sink.received} за {elapsed:.1f} с "
+            f"({sink.received / elapsed:.0f} писем/с)"
+        )
+        self.stdout.write(
+            f"Время задачи: медиана {statistics.median(durations) * 1000:.0f} мс, "
+            f"95% {durations[int(len(durations) * 0.95)] * 1000:.0f} мс"
+        )
+        self.stdout.write(f"SMTP-соединений: {sink.connections}")
+        pools = pools_stats()
+        if not pools:
+            self.stdout.write("Пул соединений с БД выключен (DB_POOL).")
+        for alias, stats in pools.items():
+            self.stdout.write(
+                f"Пул БД {alias}: {stats['max_size']} соединений, "
+                f"ожидание {stats['wait_time_total']:.2f} с, "
+                f"таймаутов {stats['timeouts']}"
+            )
+
+    @staticmethod
+    def measure(chunks, threads):
+        """
+        Выполняет задачи в пуле потоков. Как и воркер Celery, после
+        каждой задачи возвращает соединение с БД.
+        Returns:
+            tuple: Общее время и время каждой задачи, сек.
+        """
+
+        def run(object_ids):
+            started = time.perf_counter()
+            try:
+                send_template_emails(OTP_CODE_TEMPLATE, object_ids)
+            finally:
+                close_old_connections()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            durations = list(executor.map(run, chunks))
+        return time.perf_counter() - started, durations
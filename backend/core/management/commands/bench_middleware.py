@@ -0,0 +1,80 @@
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import path
+
+
+def ping(request):
+    return HttpResponse("ok")
+
+
+# URL-конфигурация бенчмарка: пустые представления, чтобы в замер
+# попадала только стоимость middleware.
+urlpatterns = [
+    path("api/ping/", ping),
+    path("admin/ping/", ping),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает накладные расходы middleware на запрос к API: полный "
+        "набор (SCOPED_MIDDLEWARE подключены напрямую) и текущий набор, "
+        "в котором /api/ их пропускает."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-n", "--requests", type=int, default=20000,
+            help="Количество запросов на замер.",
+        )
+
+    def handle(self, *args, **options):
+        full = [
+            *settings.MIDDLEWARE[:2],
+            *settings.SCOPED_MIDDLEWARE,
+            *[
+                middleware
+                for middleware in settings.MIDDLEWARE[2:]
+                if middleware != "core.middleware.PathScopedMiddleware"
+            ],
+        ]
+        number = options["requests"]
+        results = {}
+        for name, middleware in (("full", full), ("lean", settings.MIDDLEWARE)):
+            with override_settings(
+                MIDDLEWARE=middleware, ROOT_URLCONF=__name__, DEBUG=False
+            ):
+                results[name] = self.measure(number)
+        saved = results["full"] - results["lean"]
+        self.stdout.write(f"Запросов на замер: {number}")
+        self.stdout.write(
+            f"Полный набор middleware: {results['full']:.1f} мкс/запрос"
+        )
+        self.stdout.write(
+            f"Набор для /api/:         {results['lean']:.1f} мкс/запрос"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Экономия: {saved:.1f} мкс/запрос "
+                f"({saved / results['full']:.0%})"
+            )
+        )
+
+    @staticmethod
+    def measure(number):
+        """
+        Возвращает среднее время обработки запроса в микросекундах.
+        """
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        for _ in range(min(number, 1000)):
+            handler.get_response(factory.get("/api/ping/"))
+        started = time.perf_counter()
+        for _ in range(number):
+            handler.get_response(factory.get("/api/ping/"))
+        return (time.perf_counter() - started) / number * 1e6
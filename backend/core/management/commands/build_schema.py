@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.schema import build_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Собирает OpenAPI-схему в JSON и YAML с предсжатыми вариантами "
+        "gzip и brotli. Запускается при сборке образа."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir",
+            dest="schema_dir",
+            help="Каталог для файлов схемы (по умолчанию OPENAPI_SCHEMA_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        written = build_schema(options["schema_dir"])
+        for path in written:
+            self.stdout.write(f"{path} ({path.stat().st_size} байт)")
+        self.stdout.write(self.style.SUCCESS("OpenAPI-схема собрана."))
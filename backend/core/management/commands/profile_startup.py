@@ -0,0 +1,85 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет холодный запуск в отдельном процессе: время импорта "
+        "по пакетам (python -X importtime), время импорта и ready() "
+        "по приложениям Django, загрузку URL и первый запрос."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=20,
+            help="Количество самых дорогих пакетов в отчете.",
+        )
+
+    def handle(self, *args, **options):
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ["DJANGO_SETTINGS_MODULE"],
+        }
+        result = subprocess.run(
+            [
+                sys.executable, "-X", "importtime", "-c",
+                "from core.startup import print_profile; print_profile()",
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(result.stderr[-2000:])
+        profile = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Импорт по пакетам, мс:"))
+        packages = self.package_import_times(result.stderr)
+        for package, value in packages[: options["limit"]]:
+            self.stdout.write(f"  {package:<40} {value:8.1f}")
+
+        self.stdout.write(
+            self.style.MIGRATE_HEADING("Приложения Django (импорт / ready), мс:")
+        )
+        for label, stages in sorted(
+            profile["apps"].items(),
+            key=lambda item: -(item[1]["import"] + item[1]["ready"]),
+        ):
+            self.stdout.write(
+                f"  {label:<40} {stages['import']:8.1f} {stages['ready']:8.1f}"
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Этапы запуска, мс:"))
+        for stage, title in (
+            ("setup", "django.setup()"),
+            ("urls", "загрузка URL-конфигурации"),
+            ("first_request", "первый запрос"),
+            ("total", "от старта до первого ответа"),
+        ):
+            self.stdout.write(f"  {title:<40} {profile[stage]:8.1f}")
+
+    @staticmethod
+    def package_import_times(importtime_output):
+        """
+        Суммирует собственное время импорта модулей по пакетам
+        верхнего уровня.
+        Returns:
+            list: Пары (пакет, мс), отсортированные по убыванию.
+        """
+        packages = defaultdict(float)
+        for line in importtime_output.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            if match:
+                package = match.group(3).split(".")[0]
+                packages[package] += int(match.group(1)) / 1000
+        return sorted(packages.items(), key=lambda item: -item[1])
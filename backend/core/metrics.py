@@ -0,0 +1,66 @@
+import logging
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_collectors = {}
+
+
+def incr(name, amount=1):
+    """
+    Увеличивает счетчик метрики текущего процесса.
+    Args:
+        name (str): Имя метрики.
+        amount (int): Величина приращения.
+    """
+    with _lock:
+        _counters[name] += amount
+
+
+def snapshot_counters(prefix=""):
+    """
+    Возвращает счетчики процесса, имена которых начинаются с prefix.
+    Args:
+        prefix (str): Префикс имени метрики.
+    Returns:
+        dict: Значения счетчиков.
+    """
+    with _lock:
+        return {
+            name: value
+            for name, value in _counters.items()
+            if name.startswith(prefix)
+        }
+
+
+def register_collector(name, collector):
+    """
+    Регистрирует функцию, возвращающую словарь значений метрик
+    на момент снятия снимка (например, состояние пула соединений).
+    Args:
+        name (str): Имя группы метрик.
+        collector (callable): Функция без аргументов, возвращающая dict.
+    """
+    with _lock:
+        _collectors[name] = collector
+
+
+def snapshot():
+    """
+    Возвращает снимок всех метрик процесса.
+    Returns:
+        dict: Счетчики и значения зарегистрированных сборщиков.
+    """
+    with _lock:
+        data = {"counters": dict(_counters)}
+        collectors = dict(_collectors)
+    for name, collector in collectors.items():
+        try:
+            data[name] = collector()
+        except Exception as error:
+            logger.error(f"Ошибка сбора метрик {name}: {error}")
+            data[name] = None
+    return data
@@ -0,0 +1,148 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+from core import metrics
+from core.admission import get_limiter, get_route_class
+
+
+class PathScopedMiddleware:
+    """
+    Запускает цепочку middleware из settings.SCOPED_MIDDLEWARE только для
+    путей вне settings.LEAN_MIDDLEWARE_PREFIXES.
+    API с TokenAuthentication не использует сессии, CSRF, сообщения и
+    X-Frame-Options, поэтому запросы к /api/ обходят эти middleware,
+    а /admin/ и HTML-страницы из settings.LEAN_MIDDLEWARE_EXCLUDE
+    работают с полным набором.
+    Хуки process_view, process_template_response и process_exception
+    вложенных middleware вызываются в том же порядке, что и при их
+    подключении напрямую в MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.lean_prefixes = tuple(settings.LEAN_MIDDLEWARE_PREFIXES)
+        self.full_prefixes = tuple(settings.LEAN_MIDDLEWARE_EXCLUDE)
+        self.view_hooks = []
+        self.template_response_hooks = []
+        self.exception_hooks = []
+
+        handler = get_response
+        for middleware_path in reversed(settings.SCOPED_MIDDLEWARE):
+            middleware = import_string(middleware_path)
+            try:
+                instance = middleware(handler)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(instance, "process_view"):
+                self.view_hooks.insert(0, instance.process_view)
+            if hasattr(instance, "process_template_response"):
+                self.template_response_hooks.append(
+                    instance.process_template_response
+                )
+            if hasattr(instance, "process_exception"):
+                self.exception_hooks.append(instance.process_exception)
+            handler = convert_exception_to_response(instance)
+        self.full_handler = handler
+
+    def is_lean(self, request):
+        """
+        Проверяет, обрабатывается ли запрос без вложенных middleware.
+        """
+        path = request.path_info
+        return path.startswith(self.lean_prefixes) and not path.startswith(
+            self.full_prefixes
+        )
+
+    def __call__(self, request):
+        if self.is_lean(request):
+            return self.get_response(request)
+        return self.full_handler(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_lean(request):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_template_response(self, request, response):
+        if self.is_lean(request):
+            return response
+        for hook in self.template_response_hooks:
+            response = hook(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        if self.is_lean(request):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+class AdmissionControlMiddleware:
+    """
+    Ограничивает число одновременных запросов по классам маршрутов
+    (действиям CustomUserViewSet и классам представлений) из
+    settings.ADMISSION_LIMITS с адаптивным лимитом (core.admission).
+    Запрос сверх лимита, а также запрос, прождавший в очереди nginx
+    дольше ADMISSION_QUEUE_TIMEOUT (заголовок X-Request-Start), сразу
+    получает 503 с Retry-After вместо ожидания свободного воркера.
+    Классы маршрутов без лимита не ограничиваются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        admission = getattr(request, "_admission", None)
+        if admission is not None:
+            limiter, token, started = admission
+            limiter.release(
+                token,
+                time.monotonic() - started,
+                failed=response.status_code >= 500,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route_class = get_route_class(view_func, request.method)
+        limiter = get_limiter(route_class) if route_class else None
+        if limiter is None:
+            return None
+        if self.queue_time(request) > settings.ADMISSION_QUEUE_TIMEOUT:
+            metrics.incr(f"admission.expired.{route_class}")
+            return self.reject("Запрос слишком долго ждал в очереди")
+        token = limiter.acquire()
+        if token is None:
+            return self.reject("Сервер перегружен, повторите запрос позже")
+        request._admission = (limiter, token, time.monotonic())
+        return None
+
+    @staticmethod
+    def queue_time(request):
+        """
+        Возвращает время ожидания запроса в очереди по заголовку
+        X-Request-Start (t=<unix-время в секундах>), который добавляет nginx.
+        """
+        header = request.META.get("HTTP_X_REQUEST_START", "")
+        try:
+            return time.time() - float(header.removeprefix("t="))
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def reject(detail):
+        response = JsonResponse({"detail": detail}, status=503)
+        response["Retry-After"] = str(settings.ADMISSION_RETRY_AFTER)
+        return response
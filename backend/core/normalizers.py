@@ -0,0 +1,67 @@
+import re
+
+from django.conf import settings
+
+# Символы, допустимые в записи номера телефона помимо цифр.
+PHONE_SEPARATORS = re.compile(r"[\s().\-]")
+
+
+def normalize_email(email):
+    """
+    Приводит адрес электронной почты к канонической форме.
+    Адрес хранится и ищется в нижнем регистре без пробелов по краям,
+    поэтому адреса, отличающиеся только регистром, считаются одинаковыми.
+    Args:
+        email (str): Адрес электронной почты.
+    Returns:
+        str: Канонический адрес электронной почты.
+    """
+    if not email:
+        return email
+    return email.strip().lower()
+
+
+def normalize_phone(phone):
+    """
+    Приводит номер телефона к формату E.164 (+<код страны><номер>).
+    Пробелы, скобки, точки и дефисы удаляются, международный префикс 00
+    заменяется на +. Номер без кода страны дополняется кодом
+    PHONE_DEFAULT_COUNTRY_CODE, в том числе после отбрасывания
+    национального префикса PHONE_NATIONAL_PREFIX (8 999 ... -> +7 999 ...).
+    Args:
+        phone (str): Номер телефона в произвольной записи.
+    Returns:
+        str | None: Номер в формате E.164, None для пустого значения.
+        Строка с недопустимыми символами возвращается без изменений
+        и отклоняется validate_phone_number.
+    """
+    if phone is None:
+        return None
+    phone = str(phone).strip()
+    if not phone:
+        return None
+    digits = PHONE_SEPARATORS.sub("", phone)
+    if digits.startswith("+"):
+        digits = digits[1:]
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    else:
+        digits = _add_country_code(digits)
+    if not digits.isdigit():
+        return phone
+    return f"+{digits}"
+
+
+def _add_country_code(digits):
+    country_code = settings.PHONE_DEFAULT_COUNTRY_CODE
+    national_prefix = settings.PHONE_NATIONAL_PREFIX
+    national_length = settings.PHONE_NATIONAL_LENGTH
+    if len(digits) == national_length:
+        return country_code + digits
+    if (
+        national_prefix
+        and len(digits) == len(national_prefix) + national_length
+        and digits.startswith(national_prefix)
+    ):
+        return country_code + digits[len(national_prefix):]
+    return digits
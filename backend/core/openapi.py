@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.utils.module_loading import import_module
+from drf_spectacular.extensions import OpenApiViewExtension
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, extend_schema_view
+
+# Описания схемы представлений импортируются только при генерации
+# OpenAPI-схемы (хук load_schema_extensions), поэтому процессы API
+# не загружают drf_spectacular.
+
+
+def load_schema_extensions(endpoints, **kwargs):
+    """
+    Хук предобработки drf-spectacular (PREPROCESSING_HOOKS): импортирует
+    модули с описаниями схемы из OPENAPI_SCHEMA_MODULES до того, как
+    генератор создает представления.
+    Args:
+        endpoints (list): Эндпоинты API.
+    Returns:
+        list: Те же эндпоинты.
+    """
+    for module in settings.OPENAPI_SCHEMA_MODULES:
+        import_module(module)
+    return endpoints
+
+
+def view_schema(target_class, **schemas):
+    """
+    Регистрирует описание схемы методов представления. При генерации
+    схемы вместо представления используется его подкласс с примененным
+    extend_schema_view, само представление не изменяется.
+    Args:
+        target_class (str): Путь импорта класса представления.
+        schemas: Имена методов и действий и декораторы extend_schema.
+    Returns:
+        type: Класс расширения OpenApiViewExtension.
+    """
+
+    def view_replacement(self):
+        view = type(self.target_class.__name__, (self.target_class,), {})
+        return extend_schema_view(**schemas)(view)
+
+    return type(
+        f"{target_class.rsplit('.', 1)[-1]}Schema",
+        (OpenApiViewExtension,),
+        {"target_class": target_class, "view_replacement": view_replacement},
+    )
+
+
+view_schema(
+    "core.views.MetricsView",
+    get=extend_schema(responses=OpenApiTypes.OBJECT),
+)
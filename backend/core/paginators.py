@@ -0,0 +1,52 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Ниже этого порога оценка планировщика заменяется точным COUNT(*).
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(model, using="default"):
+    """
+    Возвращает оценку количества строк таблицы по статистике PostgreSQL.
+    Для секционированной таблицы оценки суммируются по секциям.
+    Args:
+        model (Model): Модель, для таблицы которой нужна оценка.
+        using (str): Псевдоним базы данных.
+    Returns:
+        int | None: Оценка числа строк или None, если таблица
+        еще не анализировалась.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE WHEN relkind = 'p' THEN ("
+            "SELECT SUM(GREATEST(child.reltuples, 0))::bigint "
+            "FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = pg_class.oid"
+            ") ELSE reltuples::bigint END "
+            "FROM pg_class WHERE oid = %s::regclass",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, который для запроса без фильтров берет количество строк
+    из статистики планировщика вместо последовательного COUNT(*).
+    Для небольших таблиц и отфильтрованных запросов считает точно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, "query", None)
+        if query is not None and not query.where:
+            estimate = estimate_count(queryset.model, using=queryset.db)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
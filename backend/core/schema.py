@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import logging
+from pathlib import Path
+
+import brotli
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FORMATS = {
+    "json": ("schema.json", "application/vnd.oai.openapi+json"),
+    "yaml": ("schema.yaml", "application/vnd.oai.openapi"),
+}
+# Предсжатые варианты в порядке предпочтения: (Content-Encoding, суффикс).
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_artifacts = {}
+
+
+def build_schema(schema_dir=None):
+    """
+    Генерирует OpenAPI-схему и записывает ее в JSON и YAML вместе
+    с предсжатыми вариантами gzip и brotli.
+    Args:
+        schema_dir (str | Path): Каталог для файлов схемы.
+    Returns:
+        list: Пути записанных файлов.
+    """
+    # Генератор схемы импортируется только при сборке: процессам API
+    # он не нужен.
+    from drf_spectacular.renderers import (
+        OpenApiJsonRenderer,
+        OpenApiYamlRenderer,
+    )
+    from drf_spectacular.settings import spectacular_settings
+
+    schema_dir = Path(schema_dir or settings.OPENAPI_SCHEMA_DIR)
+    schema_dir.mkdir(parents=True, exist_ok=True)
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    rendered = {
+        "json": OpenApiJsonRenderer().render(schema, renderer_context={}),
+        "yaml": OpenApiYamlRenderer().render(schema, renderer_context={}),
+    }
+    written = []
+    for schema_format, content in rendered.items():
+        path = schema_dir / SCHEMA_FORMATS[schema_format][0]
+        variants = {
+            path: content,
+            Path(f"{path}.gz"): gzip.compress(content, 9, mtime=0),
+            Path(f"{path}.br"): brotli.compress(content),
+        }
+        for variant_path, variant in variants.items():
+            variant_path.write_bytes(variant)
+            written.append(variant_path)
+    return written
+
+
+def get_artifact(schema_format, accept_encoding=""):
+    """
+    Возвращает собранную схему в нужном формате, по возможности
+    в предсжатом варианте, поддерживаемом клиентом. Файлы читаются
+    с диска один раз за время жизни процесса.
+    Args:
+        schema_format (str): Формат схемы: json или yaml.
+        accept_encoding (str): Заголовок Accept-Encoding запроса.
+    Returns:
+        tuple | None: (содержимое, Content-Type, Content-Encoding, ETag)
+        или None, если схема не собрана.
+    """
+    filename, content_type = SCHEMA_FORMATS[schema_format]
+    accepted = {
+        item.split(";")[0].strip() for item in accept_encoding.split(",")
+    }
+    for encoding, suffix in ENCODINGS + ((None, ""),):
+        if encoding is not None and encoding not in accepted:
+            continue
+        artifact = _load(filename, suffix)
+        if artifact is not None:
+            content, digest = artifact
+            # Сжатые варианты - разные представления, у каждого свой ETag.
+            etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+            return content, content_type, encoding, etag
+    return None
+
+
+def _load(filename, suffix):
+    key = (filename, suffix)
+    if key not in _artifacts:
+        path = Path(settings.OPENAPI_SCHEMA_DIR) / f"{filename}{suffix}"
+        source = Path(settings.OPENAPI_SCHEMA_DIR) / filename
+        if not path.exists() or not source.exists():
+            _artifacts[key] = None
+        else:
+            digest = hashlib.md5(
+                source.read_bytes(), usedforsecurity=False
+            ).hexdigest()
+            _artifacts[key] = (path.read_bytes(), digest)
+    return _artifacts[key]
@@ -0,0 +1,143 @@
+import gc
+import json
+import logging
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Запрос, по которому замеряется время до первого ответа: корень API
+# не обращается к базе данных.
+FIRST_REQUEST_PATH = "/api/v1/"
+
+
+def profile_setup():
+    """
+    Выполняет django.setup() с замером времени импорта и ready() каждого
+    приложения, затем загружает URL-конфигурацию и обрабатывает первый
+    запрос. Вызывается в отдельном процессе командой profile_startup.
+    Returns:
+        dict: Время по приложениям и этапам запуска в миллисекундах.
+    """
+    started = time.perf_counter()
+    import django
+    from django.apps import AppConfig
+
+    apps = defaultdict(lambda: {"import": 0.0, "ready": 0.0})
+    original_create = AppConfig.create.__func__
+    original_import_models = AppConfig.import_models
+
+    def timed_create(cls, entry):
+        create_started = time.perf_counter()
+        app_config = original_create(cls, entry)
+        label = app_config.label
+        apps[label]["import"] += time.perf_counter() - create_started
+        original_ready = app_config.ready
+
+        def timed_ready():
+            ready_started = time.perf_counter()
+            original_ready()
+            apps[label]["ready"] += time.perf_counter() - ready_started
+
+        app_config.ready = timed_ready
+        return app_config
+
+    def timed_import_models(self):
+        import_started = time.perf_counter()
+        original_import_models(self)
+        apps[self.label]["import"] += time.perf_counter() - import_started
+
+    AppConfig.create = classmethod(timed_create)
+    AppConfig.import_models = timed_import_models
+    try:
+        setup_started = time.perf_counter()
+        django.setup()
+        setup_time = time.perf_counter() - setup_started
+    finally:
+        AppConfig.create = classmethod(original_create)
+        AppConfig.import_models = original_import_models
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test import RequestFactory
+    from django.urls import get_resolver
+
+    urls_started = time.perf_counter()
+    get_resolver().url_patterns
+    urls_time = time.perf_counter() - urls_started
+
+    request_started = time.perf_counter()
+    WSGIHandler().get_response(RequestFactory().get(FIRST_REQUEST_PATH))
+    request_time = time.perf_counter() - request_started
+
+    return {
+        "apps": {
+            label: {stage: value * 1000 for stage, value in stages.items()}
+            for label, stages in apps.items()
+        },
+        "setup": setup_time * 1000,
+        "urls": urls_time * 1000,
+        "first_request": request_time * 1000,
+        "total": (time.perf_counter() - started) * 1000,
+    }
+
+
+def print_profile():
+    """
+    Печатает результат profile_setup() в формате JSON.
+    """
+    print(json.dumps(profile_setup()))
+
+
+def warm_up():
+    """
+    Подготавливает процесс к fork(): загружает URL-конфигурацию (а с ней
+    представления, сериализаторы и админку), строит поля сериализаторов,
+    проверяет соединения с БД и заполняет их кэши, после чего закрывает
+    соединения, чтобы дочерние процессы не унаследовали сокеты.
+    В конце замораживает сборщик мусора: объекты, созданные до fork(),
+    не переписываются им и остаются общими страницами copy-on-write.
+    """
+    from django.db import DatabaseError, connections
+    from django.urls import get_resolver
+
+    from core.db.pool import close_pools
+    from users.serializers import (
+        AuthOTPCodeSerializer,
+        CustomUserReadSerializer,
+        CustomUserSerializer,
+        VerificationCodeSerializer,
+    )
+
+    get_resolver().url_patterns
+    for serializer_class in (
+        CustomUserSerializer,
+        CustomUserReadSerializer,
+        VerificationCodeSerializer,
+        AuthOTPCodeSerializer,
+    ):
+        serializer_class().fields
+
+    for connection in connections.all():
+        try:
+            connection.ensure_connection()
+            connection.pg_version
+        except DatabaseError as error:
+            logger.warning(f"БД недоступна при прогреве: {error}")
+        finally:
+            connection.close()
+    close_pools()
+    gc.freeze()
+
+
+def connect_worker():
+    """
+    Открывает соединения с БД в рабочем процессе сразу после fork(),
+    чтобы первый запрос не ждал установки соединения.
+    """
+    from django.db import DatabaseError, connections
+
+    for connection in connections.all():
+        try:
+            connection.ensure_connection()
+        except DatabaseError as error:
+            logger.warning(f"БД недоступна при запуске воркера: {error}")
@@ -0,0 +1,77 @@
+from unittest import mock
+
+import pytest
+from django.urls import resolve
+
+from core import admission
+from core.admission import AdaptiveLimiter
+
+
+@pytest.fixture
+def limiter(redis):
+    return AdaptiveLimiter("test", initial_limit=2, min_limit=1, max_limit=10)
+
+
+def test_admit_and_shed(limiter):
+    first, second = limiter.acquire(), limiter.acquire()
+    assert first and second
+    assert limiter.acquire() is None
+
+    limiter.release(first, 0.01)
+    assert limiter.acquire()
+    assert limiter.stats()["admitted"] == 3
+    assert limiter.stats()["shed"] == 1
+
+
+def test_limit_shared_between_processes(limiter):
+    # Второй экземпляр лимитера того же класса — другой воркер gunicorn.
+    other = AdaptiveLimiter("test", initial_limit=2, min_limit=1, max_limit=10)
+    assert limiter.acquire()
+    assert other.acquire()
+    assert limiter.acquire() is None
+    assert other.acquire() is None
+
+
+def test_limit_adapts_to_latency(limiter, redis):
+    for _ in range(20):
+        limiter.release(limiter.acquire(), 0.01)
+    grown = float(redis.get(limiter.limit_key))
+    assert grown > 3
+    assert limiter.stats()["limit"] == round(grown, 2)
+
+    # Другой воркер занимает места по общему лимиту, а не по начальному.
+    other = AdaptiveLimiter("test", initial_limit=2, min_limit=1, max_limit=10)
+    tokens = [other.acquire() for _ in range(int(grown))]
+    assert all(tokens)
+    assert other.acquire() is None
+
+    other.release(tokens.pop(), 0.01)
+    limiter.release(limiter.acquire(), 0.01, failed=True)
+    assert float(redis.get(limiter.limit_key)) < grown
+
+
+def test_redis_outage_admits_without_counting(limiter):
+    with mock.patch.object(
+        admission, "get_redis_connection", side_effect=ConnectionError
+    ):
+        token = limiter.acquire()
+        assert token == ""
+        limiter.release(token, 0.01)
+        limiter.release(token, 0.01)
+    assert limiter.stats()["inflight"] == 0
+    assert limiter.acquire()
+
+
+@pytest.mark.parametrize(
+    "path, method, route_class",
+    [
+        ("/api/v1/users/verification_code/", "POST",
+         "CustomUserViewSet.verification_code"),
+        ("/api/v1/users/", "POST", "CustomUserViewSet.create"),
+        ("/api/v1/users/", "GET", "CustomUserViewSet.list"),
+        ("/api/v1/auth/token/login/", "POST", "TokenCreateView"),
+    ],
+)
+def test_route_class_is_namespaced_by_view(path, method, route_class):
+    view_func = resolve(path).func
+    assert admission.get_route_class(view_func, method) == route_class
@@ -0,0 +1,155 @@
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from core.db.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self, usable=True):
+        self.closed = 0
+        self.usable = usable
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+    def cursor(self):
+        if not self.usable:
+            raise RuntimeError("server closed the connection")
+        return mock.MagicMock()
+
+
+def make_pool(**kwargs):
+    options = {
+        "max_size": 2, "timeout": 0.05, "max_lifetime": 60,
+        "health_check_interval": 30,
+    }
+    options.update(kwargs)
+    return ConnectionPool(**options)
+
+
+def test_reuses_released_connection():
+    pool = make_pool()
+    first = pool.acquire(FakeConnection)
+    pool.release(first)
+    assert pool.acquire(FakeConnection) is first
+    assert pool.stats()["created"] == 1
+
+
+def test_timeout_when_exhausted():
+    pool = make_pool(max_size=1)
+    pool.acquire(FakeConnection)
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire(FakeConnection)
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_release_frees_slot():
+    pool = make_pool(max_size=1)
+    first = pool.acquire(FakeConnection)
+    pool.release(first)
+    pool.acquire(FakeConnection)
+    stats = pool.stats()
+    assert stats["in_use"] == 1
+    assert stats["timeouts"] == 0
+
+
+def test_release_rolls_back_open_transaction():
+    pool = make_pool()
+    first = pool.acquire(FakeConnection)
+    first.status = TRANSACTION_STATUS_INTRANS
+    pool.release(first)
+    assert first.rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_discarded_connection_is_closed():
+    pool = make_pool()
+    first = pool.acquire(FakeConnection)
+    pool.release(first, discard=True)
+    assert first.closed
+    assert pool.acquire(FakeConnection) is not first
+
+
+def test_expired_connection_is_replaced():
+    pool = make_pool(max_lifetime=0)
+    first = pool.acquire(FakeConnection)
+    pool.release(first)
+    assert first.closed
+    assert pool.acquire(FakeConnection) is not first
+
+
+def test_broken_idle_connection_is_replaced():
+    pool = make_pool(health_check_interval=0)
+    first = pool.acquire(FakeConnection)
+    pool.release(first)
+    first.usable = False
+    second = pool.acquire(FakeConnection)
+    assert second is not first
+    assert first.closed
+
+
+def test_failed_connect_frees_slot():
+    pool = make_pool(max_size=1)
+
+    def connect():
+        raise RuntimeError("connection refused")
+
+    with pytest.raises(RuntimeError):
+        pool.acquire(connect)
+    pool.acquire(FakeConnection)
+
+
+def test_close_idle():
+    pool = make_pool()
+    first = pool.acquire(FakeConnection)
+    pool.release(first)
+    pool.close_idle()
+    assert first.closed
+    assert pool.stats()["idle"] == 0
+
+
+@pytest.mark.django_db
+def test_pgbouncer_rejects_session_timezone():
+    connection = connections["default"]
+    settings_dict = dict(connection.settings_dict, PGBOUNCER=True)
+    with mock.patch.object(connection, "settings_dict", settings_dict):
+        connection.ensure_connection()
+        # Часовой пояс сервера - UTC, Django ожидает другой.
+        with mock.patch.dict(
+            connection.__dict__, {"timezone_name": "Europe/Moscow"}
+        ), pytest.raises(ImproperlyConfigured):
+            connection.ensure_timezone()
+
+
+@pytest.mark.django_db
+def test_pgbouncer_accepts_server_timezone():
+    connection = connections["default"]
+    settings_dict = dict(connection.settings_dict, PGBOUNCER=True)
+    with mock.patch.object(connection, "settings_dict", settings_dict):
+        connection.ensure_connection()
+        assert connection.ensure_timezone() is False
+
+
+@pytest.mark.django_db
+def test_pgbouncer_rejects_assume_role():
+    connection = connections["default"]
+    settings_dict = dict(
+        connection.settings_dict, PGBOUNCER=True,
+        OPTIONS={"assume_role": "reporting"},
+    )
+    with mock.patch.object(connection, "settings_dict", settings_dict):
+        with pytest.raises(ImproperlyConfigured):
+            connection.ensure_role()
@@ -0,0 +1,22 @@
+import pytest
+
+from core import email_templates
+from users.emails import OTP_CODE_TEMPLATE
+
+
+@pytest.mark.parametrize(
+    "language, expected",
+    [
+        ("en", "en"),
+        ("en-US", "en"),
+        ("de", "ru"),
+        ("de, en-GB;q=0.8, ru;q=0.5", "en"),
+        ("*", "ru"),
+        ("", "ru"),
+        (None, "ru"),
+    ],
+)
+def test_get_language(settings, language, expected):
+    settings.EMAIL_DEFAULT_LANGUAGE = "ru"
+    template = email_templates.get_email_template(OTP_CODE_TEMPLATE)
+    assert template.get_language(language) == expected
@@ -0,0 +1,17 @@
+from core.locks import redis_lock
+
+
+def test_lock_is_exclusive_and_released(redis):
+    with redis_lock(redis, "test:lock", 60) as acquired:
+        assert acquired
+        with redis_lock(redis, "test:lock", 60) as other:
+            assert not other
+        assert redis.exists("test:lock")
+    assert not redis.exists("test:lock")
+
+
+def test_lock_of_another_holder_is_kept(redis):
+    with redis_lock(redis, "test:lock", 60) as acquired:
+        assert acquired
+        redis.set("test:lock", b"other")
+    assert redis.get("test:lock") == b"other"
@@ -0,0 +1,195 @@
+import smtplib
+
+import pytest
+from django.core.mail import EmailMessage
+
+from core import mail
+
+
+class FakeRelay:
+    """
+    Заглушка SMTP-соединения: сервер выбирается по host, сервер
+    из down отклоняет письма.
+    """
+
+    down = set()
+    delivered = []
+    opened = 0
+
+    def __init__(self, host, port, **kwargs):
+        self.host = host
+        self.closed = False
+        # Сервер закрыл соединение по простою.
+        self.stale = False
+
+    def open(self):
+        FakeRelay.opened += 1
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def send_messages(self, messages):
+        if self.host in self.down or self.stale:
+            raise smtplib.SMTPServerDisconnected("down")
+        self.delivered.extend(self.host for _ in messages)
+        return len(messages)
+
+
+@pytest.fixture(autouse=True)
+def relays(settings, monkeypatch, redis):
+    settings.EMAIL_RELAYS = [
+        {"name": "a", "host": "a", "port": 25},
+        {"name": "b", "host": "b", "port": 25},
+    ]
+    settings.EMAIL_RELAY_RETRY_BACKOFF = 0
+    settings.EMAIL_RELAY_FAILURE_THRESHOLD = 2
+    settings.EMAIL_RELAY_OPEN_TIME = 60
+    settings.EMAIL_RELAY_KEEPALIVE = 0
+    monkeypatch.setattr(mail, "EmailBackend", FakeRelay)
+    monkeypatch.setattr(mail, "_health", {})
+    monkeypatch.setattr(mail, "_idle", {})
+    FakeRelay.down = set()
+    FakeRelay.delivered = []
+    FakeRelay.opened = 0
+
+
+def send(count=1, fail_silently=False):
+    backend = mail.FailoverEmailBackend(fail_silently=fail_silently)
+    return backend.send_messages(
+        [EmailMessage("s", "b", to=["user@example.com"]) for _ in range(count)]
+    )
+
+
+def test_fastest_relay_chosen():
+    mail.get_health("a").record_success(0.5)
+    mail.get_health("b").record_success(0.01)
+    assert send() == 1
+    assert FakeRelay.delivered == ["b"]
+
+
+def test_failure_penalised_without_latency():
+    mail.get_health("a").record_failure(10)
+    mail.get_health("b").record_success(0.5)
+    assert mail.get_health("a").score() > mail.get_health("b").score()
+
+
+def test_retry_on_another_relay():
+    mail.get_health("a").record_success(0.01)
+    mail.get_health("b").record_success(0.5)
+    FakeRelay.down = {"a"}
+    assert send(2) == 2
+    assert FakeRelay.delivered == ["b", "b"]
+    # После ошибки сервер a хуже b, второе письмо сразу идет через b.
+    assert mail.get_health("a").failed == 1
+
+
+def test_breaker_opens_and_skips_relay(settings):
+    settings.EMAIL_RELAY_FAILURE_THRESHOLD = 1
+    FakeRelay.down = {"a"}
+    mail.get_health("a").record_success(0.01)
+    mail.get_health("b").record_success(0.5)
+    send()
+    assert mail.get_health("a").state == mail.OPEN
+    assert mail.get_health("a").acquire() is False
+
+    # Исключенный сервер не выбирается, даже если у другого хуже оценка.
+    FakeRelay.down = set()
+    mail.get_health("b").record_success(100)
+    send()
+    assert FakeRelay.delivered == ["b", "b"]
+
+
+def test_half_open_probe(settings):
+    health = mail.get_health("a")
+    for _ in range(settings.EMAIL_RELAY_FAILURE_THRESHOLD):
+        health.record_failure(10)
+    health.opened_at -= settings.EMAIL_RELAY_OPEN_TIME
+    assert health.state == mail.HALF_OPEN
+    # Пропускается одна пробная отправка.
+    assert health.acquire() is True
+    assert health.acquire() is False
+
+    health.record_failure(10)
+    assert health.state == mail.OPEN
+
+    health.opened_at -= settings.EMAIL_RELAY_OPEN_TIME
+    assert health.acquire() is True
+    health.record_success(0.01)
+    assert health.state == mail.CLOSED
+
+
+def test_all_relays_down():
+    FakeRelay.down = {"a", "b"}
+    assert send(fail_silently=True) == 0
+    with pytest.raises(smtplib.SMTPServerDisconnected):
+        send()
+
+
+def test_stats_published_to_redis(settings):
+    settings.EMAIL_RELAY_FAILURE_THRESHOLD = 1
+    FakeRelay.down = {"a"}
+    mail.get_health("a").record_success(0.01)
+    mail.get_health("b").record_success(0.5)
+    send(2)
+    # Другой процесс (API) читает показатели, опубликованные воркером.
+    mail._health.clear()
+    stats = mail.relay_stats()
+    assert stats["a"]["failed"] == 1
+    assert stats["a"]["state"] == mail.OPEN
+    assert stats["b"]["sent"] == 2
+    assert stats["b"]["latency_ms"] is not None
+
+
+def test_keepalive_reuses_connection(settings):
+    settings.EMAIL_RELAYS = settings.EMAIL_RELAYS[:1]
+    settings.EMAIL_RELAY_KEEPALIVE = 30
+    send()
+    send()
+    assert FakeRelay.opened == 1
+    assert len(mail._idle["a"]) == 1
+
+
+def test_reconnect_after_idle_disconnect(settings):
+    settings.EMAIL_RELAYS = settings.EMAIL_RELAYS[:1]
+    settings.EMAIL_RELAY_KEEPALIVE = 30
+    send()
+    connection, _ = mail._idle["a"][0]
+    connection.stale = True
+
+    assert send() == 1
+    assert connection.closed
+    assert FakeRelay.opened == 2
+    # Разрыв простаивавшего соединения не считается ошибкой сервера.
+    assert mail.get_health("a").failed == 0
+
+
+def test_idle_connections_closed(settings):
+    settings.EMAIL_RELAY_KEEPALIVE = 30
+    send()
+    connection, _ = mail._idle["a"][0]
+    assert mail.close_idle_connections(30) == 0
+    assert mail.close_idle_connections() == 1
+    assert connection.closed
+    assert mail._idle["a"] == []
+
+
+def test_expired_connection_not_reused(settings):
+    settings.EMAIL_RELAYS = settings.EMAIL_RELAYS[:1]
+    settings.EMAIL_RELAY_KEEPALIVE = 30
+    send()
+    connection, idle_since = mail._idle["a"][0]
+    mail._idle["a"][0] = (connection, idle_since - 31)
+    send()
+    assert connection.closed
+    assert FakeRelay.opened == 2
+
+
+def test_connections_closed_on_worker_shutdown(settings):
+    from api.v1.task import close_smtp_connections
+
+    settings.EMAIL_RELAY_KEEPALIVE = 30
+    send()
+    connection, _ = mail._idle["a"][0]
+    close_smtp_connections()
+    assert connection.closed
@@ -0,0 +1,32 @@
+import pytest
+
+from core.checks import check_scoped_middleware
+
+
+@pytest.mark.parametrize("path", ["/api/swagger/", "/api/redoc/"])
+def test_docs_pages_keep_frame_options(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response["X-Frame-Options"] == "DENY"
+
+
+def test_api_skips_scoped_middleware(client):
+    response = client.get("/api/schema/")
+    assert "X-Frame-Options" not in response
+
+
+def test_admin_keeps_scoped_middleware(client):
+    response = client.get("/admin/login/")
+    assert response.status_code == 200
+    assert response["X-Frame-Options"] == "DENY"
+    assert "csrftoken" in response.cookies
+
+
+def test_scoped_middleware_check(settings):
+    assert check_scoped_middleware(None) == []
+    settings.SCOPED_MIDDLEWARE = [
+        "django.middleware.csrf.CsrfViewMiddleware",
+    ]
+    settings.LEAN_MIDDLEWARE_PREFIXES = ["/"]
+    ids = {error.id for error in check_scoped_middleware(None)}
+    assert ids == {"core.E001", "core.E002"}
@@ -0,0 +1,46 @@
+import pytest
+from django.core.exceptions import ValidationError
+
+from core.normalizers import normalize_email, normalize_phone
+from core.validators import validate_phone_number
+
+
+@pytest.mark.parametrize(
+    "phone, expected",
+    [
+        ("+7 (999) 123-45-67", "+79991234567"),
+        ("8 999 123 45 67", "+79991234567"),
+        ("9991234567", "+79991234567"),
+        ("0044 20 7946 0958", "+442079460958"),
+        ("+44.20.7946.0958", "+442079460958"),
+        ("", None),
+        (None, None),
+        ("+12abc345", "+12abc345"),
+    ],
+)
+def test_normalize_phone(phone, expected):
+    assert normalize_phone(phone) == expected
+
+
+def test_normalize_phone_uses_country_settings(settings):
+    settings.PHONE_DEFAULT_COUNTRY_CODE = "375"
+    settings.PHONE_NATIONAL_PREFIX = "80"
+    settings.PHONE_NATIONAL_LENGTH = 9
+    assert normalize_phone("80 29 123 45 67") == "+375291234567"
+
+
+@pytest.mark.parametrize("phone", ["8 (999) 123-45-67", "+44 20 7946 0958"])
+def test_valid_phone(phone):
+    validate_phone_number(phone)
+
+
+@pytest.mark.parametrize(
+    "phone", ["+12abc345", "+123", "+12345678901234567890", "+0123456789"]
+)
+def test_invalid_phone(phone):
+    with pytest.raises(ValidationError):
+        validate_phone_number(phone)
+
+
+def test_normalize_email():
+    assert normalize_email(" User@Example.COM ") == "user@example.com"
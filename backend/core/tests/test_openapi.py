@@ -0,0 +1,21 @@
+from drf_spectacular.generators import SchemaGenerator
+
+from core.views import MetricsView
+from users.views import CustomUserViewSet
+
+
+def test_views_are_not_annotated_at_runtime():
+    # Описания схемы применяются к подклассам при генерации схемы.
+    assert not hasattr(MetricsView.get, "kwargs")
+    assert "schema" not in getattr(CustomUserViewSet.verification_code, "kwargs", {})
+
+
+def test_schema_uses_registered_descriptions():
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    metrics = schema["paths"]["/api/v1/metrics/"]["get"]
+    assert metrics["responses"]["200"]["content"]["application/json"]["schema"] == {
+        "type": "object", "additionalProperties": {},
+    }
+    verification = schema["paths"]["/api/v1/users/verification_code/"]["post"]
+    assert "Создает и сохраняет новый объект" in verification["description"]
+    assert not hasattr(MetricsView.get, "kwargs")
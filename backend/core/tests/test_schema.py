@@ -0,0 +1,54 @@
+import gzip
+
+import brotli
+import pytest
+
+from core import schema
+
+
+@pytest.fixture
+def schema_dir(tmp_path, settings):
+    settings.OPENAPI_SCHEMA_DIR = str(tmp_path)
+    schema._artifacts.clear()
+    schema.build_schema(tmp_path)
+    yield tmp_path
+    schema._artifacts.clear()
+
+
+def test_build_writes_compressed_variants(schema_dir):
+    content = (schema_dir / "schema.json").read_bytes()
+    assert brotli.decompress((schema_dir / "schema.json.br").read_bytes()) == content
+    assert gzip.decompress((schema_dir / "schema.json.gz").read_bytes()) == content
+    assert (schema_dir / "schema.yaml.br").exists()
+
+
+def test_artifact_prefers_brotli(schema_dir):
+    _, _, encoding, etag = schema.get_artifact("json", "gzip, deflate, br")
+    assert encoding == "br"
+    assert etag.endswith('-br"')
+    _, _, encoding, _ = schema.get_artifact("json", "gzip")
+    assert encoding == "gzip"
+    _, _, encoding, _ = schema.get_artifact("json", "")
+    assert encoding is None
+
+
+def test_view_serves_prebuilt_schema(client, schema_dir):
+    response = client.get(
+        "/api/schema/?format=json", HTTP_ACCEPT_ENCODING="br"
+    )
+    assert response.status_code == 200
+    assert response["Content-Encoding"] == "br"
+    assert "Accept-Encoding" in response["Vary"]
+
+    response = client.get(
+        "/api/schema/?format=json", HTTP_ACCEPT_ENCODING="br",
+        HTTP_IF_NONE_MATCH=response["ETag"],
+    )
+    assert response.status_code == 304
+
+
+def test_view_without_schema(client, tmp_path, settings):
+    settings.OPENAPI_SCHEMA_DIR = str(tmp_path)
+    schema._artifacts.clear()
+    assert client.get("/api/schema/").status_code == 503
+    schema._artifacts.clear()
@@ -2,14 +2,16 @@ from re import match
 
 from django.core.exceptions import ValidationError
 
+from core.normalizers import normalize_phone
+
 
 def validate_phone_number(value):
     """
     Валидирует номер телефона.
 
-    Проверяет, соответствует ли указанное значение формату номера телефона,
-    который должен начинаться с плюса, за которым следует от одной до трех
-    цифр, а затем от четырех до пятнадцати дополнительных цифр.
+    Проверяет, что номер после приведения к канонической форме
+    (core.normalizers.normalize_phone) соответствует формату E.164:
+    плюс, код страны с ненулевой первой цифрой и всего от 8 до 15 цифр.
 
     Параметры:
     value (str): Строка, представляющая номер телефона.
@@ -19,9 +21,10 @@ def validate_phone_number(value):
     формату номера телефона.
 
     Примеры:
-    - Правильные номера телефонов: +1234567890, +44, 799999999999999
-    - Неправильные номера телефонов: 1234567890, +12abc345,
-    +123, +12345678901234567890
+    - Правильные номера телефонов: +79991234567, 8 (999) 123-45-67,
+    +44 20 7946 0958, 0044 20 7946 0958
+    - Неправильные номера телефонов: +12abc345, +123,
+    +12345678901234567890
     """
-    if not match(r"^\+?\d{1,3}\d{4,15}$", value):
-        raise ValidationError("Введите корректный номер телефона!")
\ No newline at end of file
+    if not match(r"^\+[1-9]\d{7,14}$", normalize_phone(value) or ""):
+        raise ValidationError("Введите корректный номер телефона!")
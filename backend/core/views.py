@@ -0,0 +1,103 @@
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.module_loading import import_string
+from django.views import View
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import metrics
+from core.schema import SCHEMA_FORMATS, get_artifact
+
+logger = logging.getLogger(__name__)
+
+
+def lazy_view(view_path, **initkwargs):
+    """
+    Откладывает импорт класса представления до первого запроса к нему.
+    Используется для документации API, которая не нужна процессам,
+    обслуживающим запросы к API.
+    Args:
+        view_path (str): Путь импорта класса представления.
+        initkwargs: Аргументы для as_view().
+    Returns:
+        callable: Представление.
+    """
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(view_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+class MetricsView(APIView):
+    """
+    Эндпоинт метрик процесса: счетчики и состояние пула соединений.
+    Доступен только администраторам. Описание схемы - в core.openapi.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request) -> Response:
+        """
+        Возвращает снимок метрик текущего процесса.
+        """
+        return Response(metrics.snapshot())
+
+
+class PrebuiltSchemaView(View):
+    """
+    Отдает OpenAPI-схему, собранную командой build_schema, с ETag,
+    долгоживущими заголовками кэширования и предсжатыми вариантами.
+    В режиме DEBUG схема генерируется на каждый запрос.
+    """
+
+    live_view = staticmethod(
+        lazy_view("drf_spectacular.views.SpectacularAPIView")
+    )
+
+    def get(self, request, *args, **kwargs):
+        """
+        Возвращает схему в формате JSON (?format=json или Accept с json)
+        или YAML.
+        """
+        if settings.DEBUG:
+            return self.live_view(request, *args, **kwargs)
+
+        schema_format = request.GET.get("format")
+        if schema_format not in SCHEMA_FORMATS:
+            accept = request.META.get("HTTP_ACCEPT", "")
+            schema_format = "json" if "json" in accept else "yaml"
+        artifact = get_artifact(
+            schema_format, request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if artifact is None:
+            logger.error("OpenAPI-схема не собрана: выполните build_schema.")
+            return HttpResponse(
+                "OpenAPI-схема не собрана.", status=503, content_type="text/plain"
+            )
+
+        content, content_type, encoding, etag = artifact
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE
+        )
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
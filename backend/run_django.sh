@@ -8,6 +8,7 @@ echo @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 
 poetry run python manage.py makemigrations
 poetry run python manage.py migrate
+poetry run python manage.py reconcile_user_stats
 
 echo @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 echo @@@@@@@@@@@@@@@@@@@ collecting backend static @@@@@@@@@@@@@@@@@@@@@@@
@@ -15,11 +16,26 @@ echo @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 
 poetry run python manage.py collectstatic --noinput
 
+echo @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+echo @@@@@@@@@@@@@@@@@@@@@@@@ building schema @@@@@@@@@@@@@@@@@@@@@@@@@@@@
+echo @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+poetry run python manage.py build_schema
+
 echo @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 echo @@@@@@@@@@@@@@@@@@@@@@@ run celery core @@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 echo @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 
-poetry run celery --app=backend worker -l INFO &
+poetry run celery --app=backend worker --beat -Q celery -n core@%h -l INFO &
+
+# Почтовые задачи ждут SMTP-сервер, а не процессор: один процесс
+# с пулом потоков ведет CELERY_MAIL_CONCURRENCY отправок одновременно.
+# Потоки берут соединения с БД из общего пула процесса (DB_POOL)
+# и возвращают их после каждой задачи.
+DB_POOL=True DB_POOL_MAX_SIZE=${CELERY_MAIL_DB_POOL_MAX_SIZE:-20} \
+    poetry run celery --app=backend worker -Q ${CELERY_MAIL_QUEUE:-mail} \
+    --pool=threads --concurrency=${CELERY_MAIL_CONCURRENCY:-100} \
+    -n mail@%h -l INFO &
 
 sleep 3
 
@@ -27,4 +43,4 @@ echo @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 echo @@@@@@@@@@@@@@@@@@@@@@@@@ run gunicorn @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 echo @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 
-poetry run gunicorn --bind 0.0.0.0:8000 --reload backend.wsgi:application
+poetry run gunicorn --config backend/gunicorn.conf.py backend.wsgi:application
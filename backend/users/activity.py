@@ -0,0 +1,139 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+from core import metrics
+from users.models import MyUser
+
+logger = logging.getLogger(__name__)
+
+# Последняя активность пользователей, еще не записанная в БД:
+# сортированное множество id пользователя -> время (unix).
+PENDING_KEY = "users:last_seen:pending"
+FLUSHING_KEY = "users:last_seen:flushing"
+# Битовые карты активных пользователей (бит с номером id пользователя).
+DAILY_KEY = "users:active:{day:%Y-%m-%d}"
+MONTHLY_KEY = "users:active:{day:%Y-%m}"
+DAILY_KEY_TIMEOUT = 3 * 24 * 60 * 60
+MONTHLY_KEY_TIMEOUT = 62 * 24 * 60 * 60
+
+# Окно, в котором пользователь уже отмечен этим процессом: повторные
+# запросы в пределах окна не обращаются к Redis.
+_touched = {}
+_touched_lock = threading.Lock()
+
+
+def touch(user_id):
+    """
+    Отмечает активность пользователя. В Redis запись выполняется не чаще
+    одного раза за LAST_SEEN_INTERVAL на пользователя в каждом процессе,
+    в БД время переносится задачей flush_last_seen.
+    Args:
+        user_id (int): Идентификатор пользователя.
+    """
+    now = time.time()
+    window = int(now // settings.LAST_SEEN_INTERVAL)
+    with _touched_lock:
+        if _touched.get(user_id) == window:
+            return
+        if len(_touched) >= settings.LAST_SEEN_LOCAL_SIZE:
+            _touched.clear()
+        _touched[user_id] = window
+
+    today = timezone.now()
+    daily_key = DAILY_KEY.format(day=today)
+    monthly_key = MONTHLY_KEY.format(day=today)
+    try:
+        redis = get_redis_connection("default")
+        with redis.pipeline(transaction=False) as pipeline:
+            pipeline.zadd(PENDING_KEY, {user_id: now}, gt=True)
+            pipeline.setbit(daily_key, user_id, 1)
+            pipeline.expire(daily_key, DAILY_KEY_TIMEOUT)
+            pipeline.setbit(monthly_key, user_id, 1)
+            pipeline.expire(monthly_key, MONTHLY_KEY_TIMEOUT)
+            pipeline.execute()
+        metrics.incr("last_seen.touches")
+    except Exception as error:
+        metrics.incr("last_seen.errors")
+        logger.warning(f"Активность пользователя не записана: {error}")
+
+
+def flush(batch_size=1000):
+    """
+    Записывает накопленное время последней активности в MyUser.last_seen
+    пачками UPDATE ... FROM (VALUES ...). Каждый пользователь обновляется
+    не чаще одного раза за сброс.
+    Args:
+        batch_size (int): Количество пользователей в одном UPDATE.
+    Returns:
+        int: Количество обновленных пользователей.
+    """
+    redis = get_redis_connection("default")
+    # Данные, оставшиеся от прерванного сброса, записываются первыми.
+    if not redis.exists(FLUSHING_KEY):
+        try:
+            redis.rename(PENDING_KEY, FLUSHING_KEY)
+        except ResponseError:
+            # Накопленной активности нет.
+            return 0
+    seen = redis.zrange(FLUSHING_KEY, 0, -1, withscores=True)
+    updated = 0
+    for start in range(0, len(seen), batch_size):
+        batch = seen[start:start + batch_size]
+        updated += _update(
+            [
+                (
+                    int(user_id),
+                    datetime.fromtimestamp(timestamp, tz=dt_timezone.utc),
+                )
+                for user_id, timestamp in batch
+            ]
+        )
+    redis.delete(FLUSHING_KEY)
+    metrics.incr("last_seen.flushed", updated)
+    return updated
+
+
+def active_users(day=None):
+    """
+    Возвращает количество активных пользователей за день и за месяц
+    подсчетом битов (BITCOUNT) без запросов к БД.
+    Args:
+        day (datetime): День, по умолчанию текущий.
+    Returns:
+        dict: Активные пользователи за день (dau) и за месяц (mau).
+    """
+    day = day or timezone.now()
+    try:
+        redis = get_redis_connection("default")
+        with redis.pipeline(transaction=False) as pipeline:
+            pipeline.bitcount(DAILY_KEY.format(day=day))
+            pipeline.bitcount(MONTHLY_KEY.format(day=day))
+            dau, mau = pipeline.execute()
+    except Exception as error:
+        logger.warning(f"Не удалось получить активных пользователей: {error}")
+        return {"dau": None, "mau": None}
+    return {"dau": dau, "mau": mau}
+
+
+def _update(rows):
+    table = MyUser._meta.db_table
+    placeholders = ", ".join(["(%s, %s::timestamptz)"] * len(rows))
+    params = [param for row in rows for param in row]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {table} AS u SET last_seen = v.seen "
+                f"FROM (VALUES {placeholders}) AS v (id, seen) "
+                f"WHERE u.id = v.id "
+                f"AND (u.last_seen IS NULL OR u.last_seen < v.seen)",
+                params,
+            )
+            return cursor.rowcount
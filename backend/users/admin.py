@@ -1,6 +1,25 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-from .models import MyUser, VerificationCode
+from core.paginators import EstimatedCountPaginator
+from users import bulk
+from users.filters import search_users
+from .models import AuthEvent, AuthToken, MyUser, UserBulkJob, VerificationCode
+
+
+def _start_bulk_job(modeladmin, request, queryset, operation, role=""):
+    """
+    Ставит массовую операцию над выбранными пользователями в очередь
+    вместо выполнения в запросе администратора.
+    """
+    job = bulk.create_job(
+        operation, queryset, created_by=request.user, role=role
+    )
+    modeladmin.message_user(
+        request,
+        f"Операция \"{job}\" над {job.total} пользователями поставлена "
+        f"в очередь. Прогресс - в разделе \"Массовые операции\".",
+        messages.SUCCESS,
+    )
 
 
 @admin.register(MyUser)
@@ -11,12 +30,79 @@ class MyUserAdmin(admin.ModelAdmin):
         - list_display: Поля, которые будут отображаться в
         списке пользователей.
         - search_fields: Поля, по которым можно выполнять поиск пользователей.
+        Поиск выполняет search_users по триграммным индексам, номер
+        телефона ищется точным совпадением в формате E.164.
+        - paginator: Оценка количества строк без фильтров вместо COUNT(*).
+        - show_full_result_count: Отключает второй COUNT(*) при поиске.
     Модель:
         - MyUser.
     """
 
-    list_display = ("id", "email", "last_name", "first_name", "role")
-    search_fields = ("email", "last_name", "first_name", "role")
+    list_display = (
+        "id", "email", "phone_number", "last_name", "first_name", "role",
+        "last_seen",
+    )
+    search_fields = ("email", "phone_number", "last_name", "first_name", "role")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = (
+        "deactivate_users", "activate_users", "set_admin_role",
+        "set_user_role", "delete_users",
+    )
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Ищет пользователей через search_users вместо ILIKE по всем полям.
+        """
+        return search_users(queryset, search_term), False
+
+    def get_actions(self, request):
+        """
+        Заменяет стандартное удаление выбранных пользователей фоновой
+        операцией delete_users.
+        """
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    @admin.action(
+        description="Деактивировать выбранных (в фоне)",
+        permissions=("change",),
+    )
+    def deactivate_users(self, request, queryset):
+        _start_bulk_job(self, request, queryset, UserBulkJob.DEACTIVATE)
+
+    @admin.action(
+        description="Активировать выбранных (в фоне)",
+        permissions=("change",),
+    )
+    def activate_users(self, request, queryset):
+        _start_bulk_job(self, request, queryset, UserBulkJob.ACTIVATE)
+
+    @admin.action(
+        description="Назначить роль администратора (в фоне)",
+        permissions=("change",),
+    )
+    def set_admin_role(self, request, queryset):
+        _start_bulk_job(
+            self, request, queryset, UserBulkJob.SET_ROLE, MyUser.ADMIN
+        )
+
+    @admin.action(
+        description="Назначить роль пользователя (в фоне)",
+        permissions=("change",),
+    )
+    def set_user_role(self, request, queryset):
+        _start_bulk_job(
+            self, request, queryset, UserBulkJob.SET_ROLE, MyUser.USER
+        )
+
+    @admin.action(
+        description="Удалить выбранных (в фоне)",
+        permissions=("delete",),
+    )
+    def delete_users(self, request, queryset):
+        _start_bulk_job(self, request, queryset, UserBulkJob.DELETE)
 
 
 @admin.register(VerificationCode)
@@ -32,4 +118,110 @@ class VerificationCode(admin.ModelAdmin):
     """
 
     list_display = ("id", "email", "otp_code", "expiration", "used")
-    search_fields = ("email", "otp_code", "expiration", "used")
\ No newline at end of file
+    search_fields = ("email", "otp_code", "expiration", "used")
+
+
+@admin.register(AuthEvent)
+class AuthEventAdmin(admin.ModelAdmin):
+    """
+    Класс администратора для журнала аутентификации (только просмотр).
+    Параметры:
+        - list_display: Поля, которые будут отображаться в списке событий.
+        - list_filter: Фильтры по типу и времени события. Фильтр по времени
+        ограничивает запрос нужными месячными секциями таблицы.
+        - search_fields: Точный поиск по email (индекс email, created_at).
+        - paginator: Оценка количества строк без фильтров вместо COUNT(*).
+    Модель:
+        - AuthEvent.
+    """
+
+    list_display = (
+        "created_at", "event_type", "email", "user_id", "ip_address"
+    )
+    list_filter = ("event_type", "created_at")
+    search_fields = ("=email",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(UserBulkJob)
+class UserBulkJobAdmin(admin.ModelAdmin):
+    """
+    Класс администратора для массовых операций над пользователями:
+    страница состояния с прогрессом, отмена и возобновление.
+    Операции создаются действиями в списке пользователей.
+    Параметры:
+        - list_display: Операция, состояние и прогресс.
+        - list_filter: Фильтры по операции и состоянию.
+        - actions: Отмена и возобновление выбранных операций.
+    Модель:
+        - UserBulkJob.
+    """
+
+    list_display = (
+        "id", "operation", "role", "status", "processed", "total",
+        "progress_display", "created_by", "created_at", "updated_at",
+    )
+    list_filter = ("operation", "status")
+    list_select_related = ("created_by",)
+    readonly_fields = (
+        "operation", "role", "status", "total", "processed",
+        "progress_display", "cursor", "error", "generation", "created_by",
+        "created_at", "updated_at",
+    )
+    exclude = ("ranges",)
+    actions = ("cancel_jobs", "resume_jobs")
+
+    @admin.display(description="Прогресс")
+    def progress_display(self, obj):
+        return f"{obj.progress}%"
+
+    @admin.action(description="Отменить выбранные операции")
+    def cancel_jobs(self, request, queryset):
+        cancelled = sum(bulk.cancel_job(job) for job in queryset)
+        self.message_user(request, f"Отменено операций: {cancelled}")
+
+    @admin.action(description="Возобновить выбранные операции")
+    def resume_jobs(self, request, queryset):
+        resumed = sum(bulk.resume_job(job) for job in queryset)
+        self.message_user(request, f"Возобновлено операций: {resumed}")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    """
+    Класс администратора для токенов аутентификации. Удаление токена
+    завершает сеанс пользователя на устройстве.
+    Параметры:
+        - list_display: Пользователь, устройство и срок действия.
+        - search_fields: Точный поиск по email пользователя.
+        - raw_id_fields: Выбор пользователя без загрузки всего списка.
+    Модель:
+        - AuthToken.
+    """
+
+    list_display = ("user", "device", "created_at", "expires_at")
+    list_select_related = ("user",)
+    search_fields = ("=user__email",)
+    raw_id_fields = ("user",)
+    readonly_fields = ("key", "created_at")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
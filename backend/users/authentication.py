@@ -0,0 +1,71 @@
+import re
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from users.models import AuthToken
+
+# Идентификатор устройства выдается сервером (uuid4 в шестнадцатеричной
+# записи).
+DEVICE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену AuthToken с ограниченным сроком действия.
+    Токен ищется одним запросом по уникальному индексу key вместе
+    с пользователем. Срок действия скользящий: если с последнего
+    продления прошло больше AUTH_TOKEN_REFRESH_INTERVAL, токен
+    продлевается на AUTH_TOKEN_TTL, поэтому запись в БД выполняется
+    не на каждый запрос.
+    """
+
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        try:
+            token = AuthToken.objects.select_related("user").get(key=key)
+        except AuthToken.DoesNotExist:
+            raise exceptions.AuthenticationFailed("Недействительный токен.")
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                "Пользователь неактивен или удален."
+            )
+
+        now = timezone.now()
+        if token.expires_at <= now:
+            raise exceptions.AuthenticationFailed("Срок действия токена истек.")
+
+        ttl = timedelta(seconds=settings.AUTH_TOKEN_TTL)
+        refresh_interval = timedelta(seconds=settings.AUTH_TOKEN_REFRESH_INTERVAL)
+        if token.expires_at - now < ttl - refresh_interval:
+            token.expires_at = now + ttl
+            AuthToken.objects.filter(pk=token.pk).update(
+                expires_at=token.expires_at
+            )
+
+        return token.user, token
+
+
+def get_device(request):
+    """
+    Определяет устройство, для которого выдается токен. Идентификатор
+    устройства выдается сервером при первом входе и возвращается
+    в ответе (поле device); клиент передает его при следующих входах,
+    чтобы заменить токен устройства, а не получить еще один. Значение
+    не в формате идентификатора сервера заменяется новым
+    идентификатором.
+    Args:
+        request (Request): Запрос входа.
+    Returns:
+        str: Идентификатор устройства.
+    """
+    device = request.data.get("device") if hasattr(request, "data") else None
+    if isinstance(device, str) and DEVICE_ID.match(device):
+        return device
+    return uuid.uuid4().hex
@@ -0,0 +1,295 @@
+import hashlib
+import logging
+import math
+
+from django.conf import settings
+from django.db.models import Max
+from django_redis import get_redis_connection
+
+from core import metrics
+from core.locks import redis_lock
+from users.models import MyUser
+
+logger = logging.getLogger(__name__)
+
+# Фильтр Блума зарегистрированных email: битовая карта и ее параметры
+# (размер m, число хэш-функций k, добавленные и удаленные адреса,
+# наибольший идентификатор учтенного пользователя max_id).
+# Пока параметров нет, фильтр не построен и не используется.
+BITMAP_KEY = "users:emails:bloom"
+PARAMS_KEY = "users:emails:bloom:params"
+REBUILD_KEY = "users:emails:bloom:rebuild"
+REBUILD_TIMEOUT = 3600
+# Адреса, добавленные во время перестройки ("идентификатор:email"): они
+# могли не попасть в новую карту и добавляются в нее после подмены. Пока
+# перестройки нет, ключа нет. Срок жизни продлевается по ходу построения.
+ADDED_KEY = "users:emails:bloom:added"
+ADDED_TIMEOUT = 3600
+
+# Позиции битов вычисляются в Redis двойным хэшированием
+# (h1 + i * h2) mod m, чтобы проверка занимала один запрос.
+CHECK_SCRIPT = """
+local m = tonumber(redis.call('HGET', KEYS[2], 'm'))
+if not m then return -1 end
+local k = tonumber(redis.call('HGET', KEYS[2], 'k'))
+for i = 0, k - 1 do
+    local bit = (tonumber(ARGV[1]) + i * tonumber(ARGV[2])) % m
+    if redis.call('GETBIT', KEYS[1], bit) == 0 then return 0 end
+end
+return 1
+"""
+ADD_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('SADD', KEYS[3], ARGV[4] .. ':' .. ARGV[3])
+end
+local m = tonumber(redis.call('HGET', KEYS[2], 'm'))
+if not m then return -1 end
+local k = tonumber(redis.call('HGET', KEYS[2], 'k'))
+for i = 0, k - 1 do
+    local bit = (tonumber(ARGV[1]) + i * tonumber(ARGV[2])) % m
+    redis.call('SETBIT', KEYS[1], bit, 1)
+end
+redis.call('HINCRBY', KEYS[2], 'count', 1)
+local max_id = tonumber(redis.call('HGET', KEYS[2], 'max_id')) or 0
+if tonumber(ARGV[4]) > max_id then
+    redis.call('HSET', KEYS[2], 'max_id', ARGV[4])
+end
+return 1
+"""
+
+
+def might_contain(email):
+    """
+    Проверяет, может ли email принадлежать зарегистрированному
+    пользователю. False означает, что пользователя точно нет и запрос
+    к БД не нужен. Если фильтр не построен или Redis недоступен,
+    возвращает True.
+    Args:
+        email (str): Email в канонической форме.
+    Returns:
+        bool: False, если пользователя с таким email точно нет.
+    """
+    metrics.incr("email_bloom.checks")
+    try:
+        redis = get_redis_connection("default")
+        found = redis.eval(
+            CHECK_SCRIPT, 2, BITMAP_KEY, PARAMS_KEY, *_hashes(email)
+        )
+    except Exception as error:
+        logger.warning(f"Фильтр Блума email недоступен: {error}")
+        return True
+    if found == 0:
+        metrics.incr("email_bloom.rejected")
+        return False
+    return True
+
+
+def record_false_positive():
+    """
+    Учитывает ложное срабатывание: фильтр пропустил email,
+    которого нет в БД.
+    """
+    metrics.incr("email_bloom.false_positives")
+
+
+def add(email, user_id):
+    """
+    Добавляет email в фильтр (при создании пользователя или смене email).
+    Если добавить адрес не удалось, фильтр отключается до перестройки.
+    Args:
+        email (str): Email в канонической форме.
+        user_id (int): Идентификатор пользователя.
+    """
+    try:
+        redis = get_redis_connection("default")
+        redis.eval(
+            ADD_SCRIPT, 3, BITMAP_KEY, PARAMS_KEY, ADDED_KEY,
+            *_hashes(email), email, user_id,
+        )
+    except Exception as error:
+        metrics.incr("email_bloom.add_errors")
+        logger.error(f"Email не добавлен в фильтр Блума: {error}")
+        # Фильтр без этого адреса отклонял бы запросы OTP-кода
+        # зарегистрированного пользователя: он отключается до перестройки
+        # задачей rebuild_email_bloom. Если Redis недоступен и для этого,
+        # перестройку вызовет идентификатор пользователя больше max_id.
+        try:
+            get_redis_connection("default").delete(PARAMS_KEY)
+        except Exception:
+            pass
+
+
+def remove(email):
+    """
+    Учитывает удаленный email. Биты из фильтра Блума удалить нельзя,
+    поэтому удаленные адреса увеличивают долю ложных срабатываний
+    до следующей перестройки.
+    Args:
+        email (str): Email в канонической форме.
+    """
+    try:
+        get_redis_connection("default").hincrby(PARAMS_KEY, "removed", 1)
+    except Exception as error:
+        logger.warning(f"Удаление email не учтено в фильтре Блума: {error}")
+
+
+def rebuild(capacity=None, error_rate=None):
+    """
+    Строит фильтр заново по всем email пользователей во временном ключе
+    и атомарно подменяет им текущий. Размер фильтра рассчитывается
+    на EMAIL_BLOOM_CAPACITY адресов, но не меньше удвоенного числа
+    пользователей.
+    Args:
+        capacity (int): Ожидаемое число адресов.
+        error_rate (float): Целевая доля ложных срабатываний.
+    Returns:
+        dict: Параметры построенного фильтра.
+    """
+    error_rate = error_rate or settings.EMAIL_BLOOM_ERROR_RATE
+    users = MyUser.objects.order_by()
+    capacity = max(
+        capacity or settings.EMAIL_BLOOM_CAPACITY, 2 * users.count(), 1
+    )
+    size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    hashes = max(1, round(size / capacity * math.log(2)))
+
+    redis = get_redis_connection("default")
+    temporary_key = f"{BITMAP_KEY}:building"
+    redis.delete(temporary_key)
+    # Пустой элемент создает множество: с этого момента add() запоминает
+    # адреса, которые могут не попасть во временную карту.
+    with redis.pipeline() as pipeline:
+        pipeline.sadd(ADDED_KEY, "")
+        pipeline.expire(ADDED_KEY, ADDED_TIMEOUT)
+        pipeline.execute()
+    # Пользователи с большими идентификаторами создаются после начала
+    # построения и учитываются через add().
+    max_id = _max_user_id()
+    count = 0
+    # Последний бит задает размер карты сразу, без повторных выделений.
+    redis.setbit(temporary_key, size - 1, 0)
+    emails = users.values_list("email", flat=True).iterator(chunk_size=10000)
+    with redis.pipeline(transaction=False) as pipeline:
+        for email in emails:
+            h1, h2 = _hashes(email)
+            for i in range(hashes):
+                pipeline.setbit(temporary_key, (h1 + i * h2) % size, 1)
+            count += 1
+            if count % 1000 == 0:
+                # Множество не должно истечь, пока идет построение.
+                pipeline.expire(ADDED_KEY, ADDED_TIMEOUT)
+                pipeline.execute()
+        pipeline.execute()
+
+    params = {
+        "m": size, "k": hashes, "capacity": capacity,
+        "count": count, "removed": 0, "max_id": max_id,
+    }
+    with redis.pipeline() as pipeline:
+        pipeline.rename(temporary_key, BITMAP_KEY)
+        pipeline.delete(PARAMS_KEY)
+        pipeline.hset(PARAMS_KEY, mapping=params)
+        pipeline.smembers(ADDED_KEY)
+        pipeline.delete(ADDED_KEY)
+        added = pipeline.execute()[3]
+    # Пользователи, созданные или сменившие email во время построения,
+    # могли не попасть во временную карту. После подмены add() пишет
+    # сразу в новую карту.
+    for member in added:
+        if member:
+            user_id, email = member.decode().split(":", 1)
+            add(email, int(user_id))
+    metrics.incr("email_bloom.rebuilds")
+    logger.info(f"Фильтр Блума email перестроен: {params}")
+    return params
+
+
+def estimated_error_rate():
+    """
+    Оценивает текущую долю ложных срабатываний по заполненности карты:
+    (доля установленных битов) ** k.
+    Returns:
+        float | None: Оценка или None, если фильтр не построен.
+    """
+    redis = get_redis_connection("default")
+    params = _params(redis)
+    if params is None:
+        return None
+    fill = redis.bitcount(BITMAP_KEY) / params["m"]
+    return fill ** params["k"]
+
+
+def rebuild_if_saturated():
+    """
+    Перестраивает фильтр, если он не построен, число адресов превысило
+    расчетное, оценка ложных срабатываний (с учетом удаленных адресов)
+    выше EMAIL_BLOOM_REBUILD_ERROR_RATE или в БД есть пользователи
+    с идентификатором больше учтенного фильтром max_id (созданные
+    bulk_create и SQL-запросами минуя сигналы). Наибольший идентификатор
+    берется по первичному ключу, без подсчета строк таблицы.
+    Одновременно перестройку выполняет только один процесс.
+    Returns:
+        bool: True, если фильтр перестроен.
+    """
+    redis = get_redis_connection("default")
+    params = _params(redis)
+    if params is not None:
+        error_rate = estimated_error_rate()
+        # Удаленные адреса остаются в фильтре и проходят проверку.
+        stale = params["removed"] / max(params["count"], 1)
+        if (
+            params["count"] <= params["capacity"]
+            and error_rate + stale <= settings.EMAIL_BLOOM_REBUILD_ERROR_RATE
+            and "max_id" in params
+            and _max_user_id() <= params["max_id"]
+        ):
+            return False
+    with redis_lock(redis, REBUILD_KEY, REBUILD_TIMEOUT) as acquired:
+        if not acquired:
+            return False
+        rebuild()
+    return True
+
+
+def email_bloom_stats():
+    """
+    Возвращает показатели фильтра Блума для текущего процесса.
+    Returns:
+        dict: Проверки, отклоненные без запроса к БД адреса, ложные
+        срабатывания и их доля среди отсутствующих адресов.
+    """
+    counters = metrics.snapshot_counters("email_bloom.")
+    rejected = counters.get("email_bloom.rejected", 0)
+    false_positives = counters.get("email_bloom.false_positives", 0)
+    misses = rejected + false_positives
+    return {
+        "checks": counters.get("email_bloom.checks", 0),
+        "rejected": rejected,
+        "false_positives": false_positives,
+        "false_positive_rate": (
+            round(false_positives / misses, 4) if misses else None
+        ),
+    }
+
+
+def _hashes(email):
+    digest = hashlib.blake2b(email.encode(), digest_size=8).digest()
+    # Второй хэш нечетный, чтобы последовательность позиций не вырождалась.
+    return (
+        int.from_bytes(digest[:4], "big"),
+        int.from_bytes(digest[4:], "big") | 1,
+    )
+
+
+def _max_user_id():
+    return MyUser.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+
+
+def _params(redis):
+    params = redis.hgetall(PARAMS_KEY)
+    if not params:
+        return None
+    return {key.decode(): int(value) for key, value in params.items()}
+
+
+metrics.register_collector("email_bloom", email_bloom_stats)
@@ -0,0 +1,226 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core import metrics
+from users import stats
+from users.cache import invalidate_profiles
+from users.models import MyUser, UserBulkJob
+
+logger = logging.getLogger(__name__)
+
+# Поля пользователя, которые меняют операции обновления.
+UPDATE_FIELDS = {
+    UserBulkJob.DEACTIVATE: ("is_active",),
+    UserBulkJob.ACTIVATE: ("is_active",),
+    UserBulkJob.SET_ROLE: ("role",),
+}
+
+
+def to_ranges(pks):
+    """
+    Сворачивает первичные ключи в диапазоны подряд идущих значений.
+    Выбор "все пользователи" без фильтров занимает несколько диапазонов
+    вместо списка всех ключей.
+    Args:
+        pks (iterable): Первичные ключи.
+    Returns:
+        list: Диапазоны [начало, конец] по возрастанию.
+    """
+    ranges = []
+    for pk in sorted(set(pks)):
+        if ranges and pk == ranges[-1][1] + 1:
+            ranges[-1][1] = pk
+        else:
+            ranges.append([pk, pk])
+    return ranges
+
+
+def create_job(operation, queryset, created_by=None, role=""):
+    """
+    Создает массовую операцию над пользователями из queryset и ставит
+    ее выполнение в очередь Celery.
+    Args:
+        operation (str): Операция (UserBulkJob.OPERATIONS).
+        queryset (QuerySet): Выбранные пользователи.
+        created_by (MyUser): Администратор, запустивший операцию.
+        role (str): Новая роль для операции set_role.
+    Returns:
+        UserBulkJob: Созданная операция.
+    """
+    from api.v1.task import run_user_bulk_job
+
+    pks = queryset.order_by().values_list("pk", flat=True)
+    ranges = to_ranges(pks)
+    job = UserBulkJob.objects.create(
+        operation=operation,
+        role=role,
+        ranges=ranges,
+        total=sum(end - start + 1 for start, end in ranges),
+        created_by=created_by,
+    )
+    transaction.on_commit(
+        lambda: run_user_bulk_job.delay(job.pk, job.generation)
+    )
+    return job
+
+
+def cancel_job(job):
+    """
+    Отменяет операцию. Выполняющаяся операция останавливается после
+    текущей пачки.
+    Args:
+        job (UserBulkJob): Операция.
+    Returns:
+        bool: True, если операция отменена.
+    """
+    return bool(
+        UserBulkJob.objects.filter(
+            pk=job.pk, status__in=(UserBulkJob.PENDING, UserBulkJob.RUNNING)
+        ).update(status=UserBulkJob.CANCELLED, updated_at=timezone.now())
+    )
+
+
+def resume_job(job):
+    """
+    Возобновляет отмененную, прерванную ошибкой или зависшую операцию
+    с последнего сохраненного ключа. Операция считается зависшей, если
+    она в очереди или выполняется, но не обновлялась дольше
+    USER_BULK_JOB_STALE_TIME секунд (например, задача потеряна при
+    перезапуске брокера). Номер запуска увеличивается, поэтому задачи
+    прежнего запуска, если они еще выполняются, останавливаются.
+    Args:
+        job (UserBulkJob): Операция.
+    Returns:
+        bool: True, если операция поставлена в очередь.
+    """
+    from api.v1.task import run_user_bulk_job
+
+    stale = timezone.now() - timedelta(seconds=settings.USER_BULK_JOB_STALE_TIME)
+    with transaction.atomic():
+        resumed = UserBulkJob.objects.filter(
+            Q(status__in=(UserBulkJob.CANCELLED, UserBulkJob.FAILED))
+            | Q(
+                status__in=(UserBulkJob.PENDING, UserBulkJob.RUNNING),
+                updated_at__lt=stale,
+            ),
+            pk=job.pk,
+        ).update(
+            status=UserBulkJob.PENDING,
+            error="",
+            generation=F("generation") + 1,
+            updated_at=timezone.now(),
+        )
+        if not resumed:
+            return False
+        generation = UserBulkJob.objects.values_list(
+            "generation", flat=True
+        ).get(pk=job.pk)
+        transaction.on_commit(
+            lambda: run_user_bulk_job.delay(job.pk, generation)
+        )
+    return True
+
+
+def run_job(job_id, generation=0):
+    """
+    Выполняет часть операции: обрабатывает пачки по USER_BULK_JOB_BATCH_SIZE
+    ключей, пока не истечет USER_BULK_JOB_CHUNK_TIME секунд. Каждая пачка
+    обрабатывается в отдельной транзакции вместе с сохранением
+    последнего обработанного ключа. Задача прежнего запуска операции
+    (номер запуска не совпадает) ничего не делает.
+    Args:
+        job_id (int): Идентификатор операции.
+        generation (int): Номер запуска операции.
+    Returns:
+        bool: True, если операция не завершена и нужно продолжить ее
+        следующей задачей.
+    """
+    started = UserBulkJob.objects.filter(
+        pk=job_id,
+        generation=generation,
+        status__in=(UserBulkJob.PENDING, UserBulkJob.RUNNING),
+    ).update(status=UserBulkJob.RUNNING, updated_at=timezone.now())
+    if not started:
+        return False
+    job = UserBulkJob.objects.get(pk=job_id)
+    deadline = time.monotonic() + settings.USER_BULK_JOB_CHUNK_TIME
+    try:
+        for index, (start, end) in enumerate(_pending_batches(job)):
+            # Первая пачка обрабатывается всегда, чтобы операция
+            # продвигалась при любом USER_BULK_JOB_CHUNK_TIME.
+            if index and time.monotonic() >= deadline:
+                return True
+            with transaction.atomic():
+                locked = UserBulkJob.objects.select_for_update().get(pk=job_id)
+                if (
+                    locked.status != UserBulkJob.RUNNING
+                    or locked.generation != generation
+                ):
+                    logger.info(f"Массовая операция {job_id} остановлена")
+                    return False
+                processed = _process(job, start, end)
+                UserBulkJob.objects.filter(pk=job_id).update(
+                    cursor=end,
+                    processed=locked.processed + processed,
+                    updated_at=timezone.now(),
+                )
+            metrics.incr(f"user_bulk_job.{job.operation}", processed)
+    except Exception as error:
+        logger.exception(f"Массовая операция {job_id} прервана")
+        UserBulkJob.objects.filter(pk=job_id, generation=generation).update(
+            status=UserBulkJob.FAILED,
+            error=str(error),
+            updated_at=timezone.now(),
+        )
+        return False
+    UserBulkJob.objects.filter(
+        pk=job_id, generation=generation, status=UserBulkJob.RUNNING
+    ).update(status=UserBulkJob.DONE, updated_at=timezone.now())
+    return False
+
+
+def _pending_batches(job):
+    """
+    Делит необработанную часть диапазонов на пачки ключей
+    [начало, конец] размером не больше USER_BULK_JOB_BATCH_SIZE.
+    """
+    batch_size = settings.USER_BULK_JOB_BATCH_SIZE
+    for start, end in job.ranges:
+        start = max(start, job.cursor + 1)
+        while start <= end:
+            batch_end = min(end, start + batch_size - 1)
+            yield start, batch_end
+            start = batch_end + 1
+
+
+def _process(job, start, end):
+    users = MyUser.objects.filter(pk__gte=start, pk__lte=end)
+    if job.operation == UserBulkJob.DELETE:
+        # Удаление пачкой: токены и другие связанные строки удаляются
+        # одним запросом на таблицу, сигналы обновляют статистику и кэш.
+        users.delete()
+        return end - start + 1
+
+    fields = UPDATE_FIELDS[job.operation]
+    changed = []
+    for user in users.only(*stats.DIMENSION_FIELDS, "email"):
+        old = stats.get_dimensions(user)
+        if job.operation == UserBulkJob.SET_ROLE:
+            user.role = job.role
+        else:
+            user.is_active = job.operation == UserBulkJob.ACTIVATE
+        new = stats.get_dimensions(user)
+        if old != new:
+            user.updated_at = timezone.now()
+            changed.append(user)
+            stats.record_change(old, new)
+    MyUser.objects.bulk_update(changed, (*fields, "updated_at"))
+    changed_ids = [user.pk for user in changed]
+    transaction.on_commit(lambda: invalidate_profiles(changed_ids))
+    return end - start + 1
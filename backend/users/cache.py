@@ -0,0 +1,143 @@
+import logging
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_KEY = "users:profile:{user_id}"
+PROFILE_LOCK_KEY = "users:profile:{user_id}:lock"
+# Время, на которое один процесс захватывает пересборку профиля.
+PROFILE_LOCK_TIMEOUT = 10
+# Коэффициент раннего обновления: чем больше, тем раньше до истечения
+# срока записи профиль пересобирается одним из запросов.
+EARLY_RECOMPUTE_BETA = 1.0
+
+
+def get_profile(user_id, build):
+    """
+    Возвращает сериализованный профиль пользователя из кэша.
+    При промахе профиль собирает только один запрос (остальные ждут его
+    результат или отдают устаревшую запись), а незадолго до истечения
+    срока запись вероятностно пересобирается заранее, чтобы одновременное
+    истечение не приводило к лавине запросов в БД.
+    Args:
+        user_id (int): Идентификатор пользователя.
+        build (callable): Функция сборки сериализованного профиля.
+    Returns:
+        dict: Сериализованный профиль.
+    """
+    key = PROFILE_KEY.format(user_id=user_id)
+    entry = cache.get(key)
+    if entry is not None and not _should_recompute(entry):
+        metrics.incr("profile_cache.hits")
+        return entry["data"]
+
+    lock_key = PROFILE_LOCK_KEY.format(user_id=user_id)
+    locked = cache.add(lock_key, 1, PROFILE_LOCK_TIMEOUT)
+    if not locked:
+        if entry is not None:
+            # Профиль уже пересобирает другой запрос: отдаем текущую запись.
+            metrics.incr("profile_cache.hits")
+            return entry["data"]
+        metrics.incr("profile_cache.lock_waits")
+        entry = _wait_for_entry(key)
+        if entry is not None:
+            metrics.incr("profile_cache.hits")
+            return entry["data"]
+
+    metrics.incr("profile_cache.misses")
+    try:
+        started = time.monotonic()
+        data = dict(build())
+        set_profile(user_id, data, compute_time=time.monotonic() - started)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return data
+
+
+def set_profile(user_id, data, compute_time=0.0):
+    """
+    Сохраняет сериализованный профиль в кэш (запись при изменении).
+    Args:
+        user_id (int): Идентификатор пользователя.
+        data (dict): Сериализованный профиль.
+        compute_time (float): Время сборки профиля в секундах.
+    """
+    timeout = settings.PROFILE_CACHE_TIMEOUT
+    entry = {
+        "data": dict(data),
+        "delta": compute_time,
+        "expires_at": time.time() + timeout,
+    }
+    cache.set(PROFILE_KEY.format(user_id=user_id), entry, timeout)
+
+
+def invalidate_profile(user_id):
+    """
+    Удаляет профиль пользователя из кэша.
+    Args:
+        user_id (int): Идентификатор пользователя.
+    """
+    cache.delete(PROFILE_KEY.format(user_id=user_id))
+    metrics.incr("profile_cache.invalidations")
+
+
+def invalidate_profiles(user_ids):
+    """
+    Удаляет профили нескольких пользователей из кэша одним запросом.
+    Args:
+        user_ids (list): Идентификаторы пользователей.
+    """
+    if not user_ids:
+        return
+    cache.delete_many(
+        [PROFILE_KEY.format(user_id=user_id) for user_id in user_ids]
+    )
+    metrics.incr("profile_cache.invalidations", len(user_ids))
+
+
+def profile_cache_stats():
+    """
+    Возвращает долю попаданий в кэш профиля для текущего процесса.
+    Returns:
+        dict: Попадания, промахи и доля попаданий.
+    """
+    counters = metrics.snapshot_counters("profile_cache.")
+    hits = counters.get("profile_cache.hits", 0)
+    misses = counters.get("profile_cache.misses", 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+def _should_recompute(entry):
+    """
+    Вероятностное раннее обновление (XFetch): чем ближе истечение срока
+    и чем дольше сборка профиля, тем выше вероятность пересборки.
+    """
+    gap = entry["delta"] * EARLY_RECOMPUTE_BETA * -math.log(
+        random.random() or 1e-12
+    )
+    return time.time() + gap >= entry["expires_at"]
+
+
+def _wait_for_entry(key, attempts=10, interval=0.05):
+    for _ in range(attempts):
+        time.sleep(interval)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+metrics.register_collector("profile_cache", profile_cache_stats)
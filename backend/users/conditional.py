@@ -0,0 +1,62 @@
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def get_validators(user):
+    """
+    Возвращает валидаторы представления пользователя: строгий ETag и
+    время последнего изменения. Оба вычисляются по updated_at без
+    сериализации.
+    Args:
+        user (MyUser): Пользователь.
+    Returns:
+        tuple: (ETag, время изменения в секундах) или (None, None), если
+        у объекта нет updated_at (например, анонимный пользователь).
+    """
+    updated_at = getattr(user, "updated_at", None)
+    if updated_at is None:
+        return None, None
+    digest = md5(
+        f"{user.pk}:{updated_at.isoformat()}".encode(), usedforsecurity=False
+    ).hexdigest()
+    return quote_etag(digest), int(updated_at.timestamp())
+
+
+def check_preconditions(request, user):
+    """
+    Проверяет условные заголовки запроса (If-None-Match, If-Modified-Since,
+    If-Match, If-Unmodified-Since) для пользователя.
+    Args:
+        request (Request): Запрос.
+        user (MyUser): Пользователь, к которому относится запрос.
+    Returns:
+        HttpResponse | None: Ответ 304 или 412, если условие сработало,
+        иначе None.
+    """
+    etag, last_modified = get_validators(user)
+    if etag is None:
+        return None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        set_validators(response, user)
+    return response
+
+
+def set_validators(response, user):
+    """
+    Добавляет в ответ заголовки ETag и Last-Modified пользователя.
+    Args:
+        response (HttpResponse): Ответ.
+        user (MyUser): Пользователь.
+    Returns:
+        HttpResponse: Тот же ответ.
+    """
+    etag, last_modified = get_validators(user)
+    if etag is not None:
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+    return response
@@ -0,0 +1,51 @@
+from django.conf import settings
+
+from core import email_templates
+from users.models import MyUser, VerificationCode
+
+OTP_CODE_TEMPLATE = "otp_code"
+
+
+def load_otp_contexts(code_ids):
+    """
+    Загружает данные писем с OTP-кодами: коды и имена пользователей
+    двумя запросами на всю пачку.
+    Args:
+        code_ids (list): Идентификаторы кодов верификации.
+    Returns:
+        dict: {идентификатор кода: (адрес, контекст шаблона)}.
+    """
+    codes = list(
+        VerificationCode.objects.filter(pk__in=code_ids).values_list(
+            "pk", "email", "otp_code"
+        )
+    )
+    names = {
+        email: (first_name, last_name)
+        for email, first_name, last_name in MyUser.objects.filter(
+            email__in=[email for _, email, _ in codes]
+        ).values_list("email", "first_name", "last_name")
+    }
+    contexts = {}
+    for pk, email, otp_code in codes:
+        first_name, last_name = names.get(email, ("", ""))
+        contexts[pk] = (
+            email,
+            {
+                "first_name": first_name,
+                "last_name": last_name,
+                "otp_code": otp_code,
+                "expiration_minutes": settings.OTP_CODE_EXPIRATION_TIME,
+            },
+        )
+    return contexts
+
+
+email_templates.register(
+    OTP_CODE_TEMPLATE,
+    subjects={
+        "ru": "InTimeBioTech: OTP-код",
+        "en": "InTimeBioTech: OTP code",
+    },
+    load_contexts=load_otp_contexts,
+)
@@ -0,0 +1,223 @@
+import ipaddress
+import logging
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import DataError, DatabaseError, IntegrityError, connections, transaction
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from core import metrics
+from core.constants.users import EMAIL_LENGTH
+from core.locks import redis_lock
+from users.models import AuthEvent
+
+logger = logging.getLogger(__name__)
+
+# Поток Redis, в который записываются события до сброса в БД.
+STREAM_KEY = "users:auth_events"
+# Блокировка сброса: параллельные запуски прочитали бы одни и те же
+# события и записали их в журнал дважды.
+FLUSH_LOCK_KEY = "users:auth_events:flush_lock"
+FLUSH_LOCK_TIMEOUT = 600
+PARTITION_PREFIX = f"{AuthEvent._meta.db_table}_p"
+
+
+def record_event(event_type, request=None, email="", user=None):
+    """
+    Записывает событие аутентификации в поток Redis. В таблицу журнала
+    события попадают пачками задачей flush_auth_events, поэтому запросы
+    аутентификации не выполняют дополнительных INSERT. Если Redis
+    недоступен, событие записывается в БД сразу.
+    Args:
+        event_type (str): Тип события (AuthEvent.EVENT_TYPES).
+        request (HttpRequest): Запрос, из которого берутся IP и User-Agent.
+        email (str): Адрес электронной почты из запроса.
+        user (MyUser): Пользователь, если он известен.
+    """
+    # Email и User-Agent приходят из запроса и обрезаются по длине полей
+    # журнала, иначе одно событие не запишется и заблокирует сброс пачки.
+    email = email or (user.email if user is not None else "")
+    fields = {
+        "event_type": event_type,
+        "email": email[:EMAIL_LENGTH],
+        "user_id": "" if user is None else str(user.pk),
+        "ip_address": _client_ip(request) or "",
+        "user_agent": (
+            request.META.get("HTTP_USER_AGENT", "")[:256] if request else ""
+        ),
+        "created_at": timezone.now().isoformat(),
+    }
+    try:
+        get_redis_connection("default").xadd(
+            STREAM_KEY,
+            fields,
+            maxlen=settings.AUTH_EVENT_STREAM_MAXLEN,
+            approximate=True,
+        )
+        metrics.incr("auth_events.buffered")
+    except Exception as error:
+        logger.warning(f"Событие аутентификации записано напрямую: {error}")
+        AuthEvent.objects.bulk_create([_to_event(fields)])
+        metrics.incr("auth_events.direct_writes")
+
+
+def flush_events(batch_size=None):
+    """
+    Переносит события из потока Redis в таблицу журнала пачками
+    bulk_create. Записанные события удаляются из потока только после
+    успешной вставки. Если пачка не записывается из-за данных, события
+    пачки записываются по одному, а некорректные журналируются
+    и удаляются из потока, чтобы не блокировать следующие. Если сброс уже
+    выполняется, запуск пропускается.
+    Args:
+        batch_size (int): Количество событий в одном INSERT.
+    Returns:
+        int | None: Количество записанных событий или None, если запуск
+        пропущен.
+    """
+    batch_size = batch_size or settings.AUTH_EVENT_BATCH_SIZE
+    redis = get_redis_connection("default")
+    with redis_lock(redis, FLUSH_LOCK_KEY, FLUSH_LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            return None
+        return _flush_events(redis, batch_size)
+
+
+def _flush_events(redis, batch_size):
+    flushed = 0
+    while True:
+        entries = redis.xrange(STREAM_KEY, count=batch_size)
+        if not entries:
+            break
+        batch = [
+            (
+                entry_id,
+                {key.decode(): value.decode() for key, value in fields.items()},
+            )
+            for entry_id, fields in entries
+        ]
+        try:
+            with transaction.atomic():
+                AuthEvent.objects.bulk_create(
+                    [_to_event(fields) for _, fields in batch]
+                )
+            flushed += len(batch)
+        except (DataError, IntegrityError, ValueError) as error:
+            logger.warning(f"Пачка событий аутентификации не записана: {error}")
+            flushed += _flush_one_by_one(batch)
+        redis.xdel(STREAM_KEY, *[entry_id for entry_id, _ in entries])
+        if len(entries) < batch_size:
+            break
+    metrics.incr("auth_events.flushed", flushed)
+    return flushed
+
+
+def _flush_one_by_one(batch):
+    """
+    Записывает события пачки по одному. Ошибки соединения с БД
+    не перехватываются: события останутся в потоке до следующего сброса.
+    Returns:
+        int: Количество записанных событий.
+    """
+    flushed = 0
+    for entry_id, fields in batch:
+        try:
+            with transaction.atomic():
+                _to_event(fields).save()
+        except (DataError, IntegrityError, ValueError) as error:
+            logger.error(
+                f"Событие аутентификации {entry_id.decode()} отброшено: "
+                f"{error}; {fields}"
+            )
+            metrics.incr("auth_events.dropped")
+            continue
+        flushed += 1
+    return flushed
+
+
+def maintain_partitions(months_ahead=2, retention_months=None, using="default"):
+    """
+    Создает месячные секции журнала на months_ahead месяцев вперед
+    и удаляет секции старше retention_months месяцев. Удаление секции
+    освобождает место сразу, без DELETE и последующего VACUUM.
+    Args:
+        months_ahead (int): На сколько месяцев вперед создавать секции.
+        retention_months (int): Срок хранения событий в месяцах.
+        using (str): Псевдоним базы данных.
+    Returns:
+        tuple: Списки созданных и удаленных секций.
+    """
+    if retention_months is None:
+        retention_months = settings.AUTH_EVENT_RETENTION_MONTHS
+    table = AuthEvent._meta.db_table
+    today = timezone.now().date()
+    existing = set(_partitions(using))
+    created, dropped = [], []
+    with connections[using].cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            start = _add_months(today, offset)
+            name = f"{PARTITION_PREFIX}{start:%Y%m}"
+            if name in existing:
+                continue
+            try:
+                cursor.execute(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [start, _add_months(start, 1)],
+                )
+                created.append(name)
+            except DatabaseError as error:
+                # Например, в секции по умолчанию уже есть строки за этот
+                # месяц: их нужно перенести вручную.
+                logger.error(f"Не удалось создать секцию {name}: {error}")
+
+        oldest = f"{PARTITION_PREFIX}{_add_months(today, -retention_months):%Y%m}"
+        for name in sorted(existing):
+            if name < oldest:
+                cursor.execute(f"DROP TABLE {name}")
+                dropped.append(name)
+    return created, dropped
+
+
+def _partitions(using):
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = %s",
+            [AuthEvent._meta.db_table],
+        )
+        return [
+            name for (name,) in cursor.fetchall()
+            if name.startswith(PARTITION_PREFIX)
+        ]
+
+
+def _to_event(fields):
+    return AuthEvent(
+        event_type=fields["event_type"],
+        email=fields["email"],
+        user_id=int(fields["user_id"]) if fields["user_id"] else None,
+        ip_address=fields["ip_address"] or None,
+        user_agent=fields["user_agent"],
+        created_at=datetime.fromisoformat(fields["created_at"]),
+    )
+
+
+def _client_ip(request):
+    if request is None:
+        return None
+    # За nginx (docker/nginx/nginx.conf) адрес клиента передается
+    # в заголовке X-Real-IP.
+    address = request.META.get("HTTP_X_REAL_IP") or request.META.get("REMOTE_ADDR")
+    try:
+        return str(ipaddress.ip_address(address))
+    except ValueError:
+        return None
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
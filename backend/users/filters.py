@@ -0,0 +1,85 @@
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django_filters import rest_framework as filters
+
+from core.normalizers import normalize_phone
+from core.validators import validate_phone_number
+from users.models import MyUser
+
+# Поля с триграммными индексами по UPPER(поле), см. MyUser.Meta.indexes.
+SEARCH_FIELDS = ("email", "first_name", "last_name")
+
+
+def search_users(queryset, search_term):
+    """
+    Ищет пользователей по подстроке в email, имени и фамилии и по роли.
+    Каждое слово запроса должно совпасть хотя бы с одним полем.
+    Подстроки ищутся через icontains, который обслуживают триграммные
+    GIN-индексы, роль сравнивается точно. Запрос, являющийся номером
+    телефона в любой записи, ищется точным совпадением по уникальному
+    индексу phone_number.
+    Args:
+        queryset (QuerySet): Исходный запрос пользователей.
+        search_term (str): Строка поиска.
+    Returns:
+        QuerySet: Отфильтрованный запрос.
+    """
+    phone = _as_phone(search_term)
+    if phone is not None:
+        return queryset.filter(phone_number=phone)
+    roles = {role for role, _ in MyUser.ROLES}
+    conditions = []
+    for word in search_term.split():
+        condition = reduce(
+            or_, (Q(**{f"{field}__icontains": word}) for field in SEARCH_FIELDS)
+        )
+        if word.lower() in roles:
+            condition |= Q(role=word.lower())
+        conditions.append(condition)
+    if not conditions:
+        return queryset
+    return queryset.filter(reduce(and_, conditions))
+
+
+def _as_phone(search_term):
+    # Номер должен начинаться с цифры или "+" и быть допустимым номером
+    # E.164, чтобы не перехватывать поиск по части email.
+    search_term = search_term.strip()
+    if not search_term or search_term[0] not in "+0123456789":
+        return None
+    try:
+        validate_phone_number(search_term)
+    except ValidationError:
+        return None
+    return normalize_phone(search_term)
+
+
+class UserFilter(filters.FilterSet):
+    """
+    Фильтры списка пользователей для администраторов.
+    Attributes:
+        - search: Поиск по email, имени, фамилии и роли.
+        - role: Точное совпадение роли.
+        - is_active: Активность пользователя.
+    """
+
+    search = filters.CharFilter(method="filter_search")
+
+    class Meta:
+        model = MyUser
+        fields = ("search", "role", "is_active")
+
+    def filter_queryset(self, queryset):
+        """
+        Применяет фильтры только для администраторов.
+        """
+        user = getattr(self.request, "user", None)
+        if user is None or not user.is_staff:
+            return queryset
+        return super().filter_queryset(queryset)
+
+    def filter_search(self, queryset, name, value):
+        return search_users(queryset, value)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from users.bloom import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Перестраивает фильтр Блума email пользователей, по которому "
+        "запрос OTP-кода отсекает незарегистрированные адреса."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--capacity",
+            type=int,
+            help="Расчетное число адресов (по умолчанию EMAIL_BLOOM_CAPACITY).",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            help="Доля ложных срабатываний (по умолчанию EMAIL_BLOOM_ERROR_RATE).",
+        )
+
+    def handle(self, *args, **options):
+        params = rebuild(options["capacity"], options["error_rate"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Фильтр Блума перестроен: {params['count']} адресов, "
+                f"{params['m']} бит, {params['k']} хэш-функций."
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает статистику пользователей по таблице пользователей. "
+        "Запускается после миграции и при расхождении счетчиков."
+    )
+
+    def handle(self, *args, **options):
+        reconciled = reconcile()
+        if reconciled is None:
+            raise CommandError(
+                "Сброс или сверка статистики уже выполняются, повторите позже."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Статистика сверена, счетчиков: {reconciled}.")
+        )
@@ -0,0 +1,20 @@
+from users.activity import touch
+
+
+class LastSeenMiddleware:
+    """
+    Отмечает активность аутентифицированного пользователя после обработки
+    запроса. Пользователь берется из request.user, который заполняют
+    AuthenticationMiddleware (админка) и аутентификация DRF (API).
+    Запись в БД выполняется пачками задачей flush_last_seen.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            touch(user.pk)
+        return response
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.14 on 2026-10-19 15:21
+
+import core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="myuser",
+            name="phone_number",
+            field=models.CharField(
+                blank=True,
+                help_text="Введите номер телефона",
+                max_length=15,
+                null=True,
+                unique=True,
+                validators=[core.validators.validate_phone_number],
+                verbose_name="Номер телефона",
+            ),
+        ),
+        migrations.CreateModel(
+            name="VerificationCode",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "email",
+                    models.EmailField(
+                        help_text="Введите адрес электронной почты",
+                        max_length=254,
+                        unique=True,
+                        verbose_name="Электронная почта",
+                    ),
+                ),
+                ("otp_code", models.IntegerField()),
+                ("expiration", models.DateTimeField()),
+                ("used", models.BooleanField(default=False)),
+            ],
+            options={
+                "verbose_name": "Код верификации",
+                "verbose_name_plural": "Коды верификации",
+                "unique_together": {("email", "otp_code")},
+            },
+        ),
+    ]
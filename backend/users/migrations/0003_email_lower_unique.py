@@ -0,0 +1,109 @@
+import django.db.models.functions.text
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 5000
+
+MYUSER_INDEX = "users_myuser_email_lower_uniq"
+VERIFICATIONCODE_INDEX = "users_verificationcode_email_lower_uniq"
+
+
+def lowercase_emails(apps, schema_editor):
+    """
+    Приводит сохраненные email к нижнему регистру пачками по диапазонам
+    первичного ключа, каждая пачка - в отдельной короткой транзакции.
+    Дубликаты кодов верификации удаляются (остается последний код),
+    дубликаты пользователей требуют ручного разбора.
+    """
+    connection = schema_editor.connection
+    user_table = apps.get_model("users", "MyUser")._meta.db_table
+    code_table = apps.get_model("users", "VerificationCode")._meta.db_table
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT LOWER(TRIM(email)) FROM {user_table} "
+            f"GROUP BY LOWER(TRIM(email)) HAVING COUNT(*) > 1 LIMIT 10"
+        )
+        duplicates = [row[0] for row in cursor.fetchall()]
+    if duplicates:
+        raise ValueError(
+            "Пользователи с email, отличающимися только регистром: "
+            f"{', '.join(duplicates)}. Объедините их перед миграцией."
+        )
+
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {code_table} AS old USING {code_table} AS new "
+                f"WHERE LOWER(TRIM(old.email)) = LOWER(TRIM(new.email)) "
+                f"AND old.id < new.id"
+            )
+
+    for table in (user_table, code_table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table}")
+            low, high = cursor.fetchone()
+        if low is None:
+            continue
+        for start in range(low, high + 1, BATCH_SIZE):
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"UPDATE {table} SET email = LOWER(TRIM(email)) "
+                        f"WHERE id >= %s AND id < %s "
+                        f"AND email <> LOWER(TRIM(email))",
+                        [start, start + BATCH_SIZE],
+                    )
+
+
+def create_index_concurrently(table, name):
+    """
+    Создает уникальный индекс по LOWER(email) без блокировки записи.
+    Недостроенный (INVALID) индекс от прерванного запуска удаляется.
+    """
+    return [
+        f"DROP INDEX CONCURRENTLY IF EXISTS {name}",
+        f'CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} (LOWER("email"))',
+    ]
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции.
+    atomic = False
+
+    dependencies = [
+        ("users", "0002_alter_myuser_phone_number_verificationcode"),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.RunSQL(
+            sql=create_index_concurrently("users_myuser", MYUSER_INDEX),
+            reverse_sql=f"DROP INDEX CONCURRENTLY IF EXISTS {MYUSER_INDEX}",
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="myuser",
+                    constraint=models.UniqueConstraint(
+                        django.db.models.functions.text.Lower("email"),
+                        name=MYUSER_INDEX,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunSQL(
+            sql=create_index_concurrently(
+                "users_verificationcode", VERIFICATIONCODE_INDEX
+            ),
+            reverse_sql=(
+                f"DROP INDEX CONCURRENTLY IF EXISTS {VERIFICATIONCODE_INDEX}"
+            ),
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="verificationcode",
+                    constraint=models.UniqueConstraint(
+                        django.db.models.functions.text.Lower("email"),
+                        name=VERIFICATIONCODE_INDEX,
+                    ),
+                ),
+            ],
+        ),
+    ]
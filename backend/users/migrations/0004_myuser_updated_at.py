@@ -0,0 +1,22 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_email_lower_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="myuser",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                help_text="Обновляется при каждом сохранении пользователя",
+                verbose_name="Дата изменения",
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,36 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    TrigramExtension,
+)
+from django.db import migrations
+
+
+def trigram_index(field):
+    return django.contrib.postgres.indexes.GinIndex(
+        django.contrib.postgres.indexes.OpClass(
+            django.db.models.functions.text.Upper(field), name="gin_trgm_ops"
+        ),
+        name=f"users_myuser_{field}_trgm",
+    )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции.
+    atomic = False
+
+    dependencies = [
+        ("users", "0004_myuser_updated_at"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(model_name="myuser", index=trigram_index("email")),
+        AddIndexConcurrently(
+            model_name="myuser", index=trigram_index("first_name")
+        ),
+        AddIndexConcurrently(
+            model_name="myuser", index=trigram_index("last_name")
+        ),
+    ]
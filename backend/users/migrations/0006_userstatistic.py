@@ -0,0 +1,43 @@
+# Generated by Django 5.0.14 on 2026-10-19 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0005_myuser_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserStatistic",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "dimension",
+                    models.CharField(max_length=20, verbose_name="Измерение"),
+                ),
+                ("value", models.CharField(max_length=20, verbose_name="Значение")),
+                ("count", models.BigIntegerField(default=0, verbose_name="Количество")),
+            ],
+            options={
+                "verbose_name": "Статистика пользователей",
+                "verbose_name_plural": "Статистика пользователей",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="userstatistic",
+            constraint=models.UniqueConstraint(
+                fields=("dimension", "value"),
+                name="users_userstatistic_dimension_value_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,130 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+EVENT_TYPES = [
+    ("otp_requested", "Запрос OTP-кода"),
+    ("otp_verified", "Вход по OTP-коду"),
+    ("otp_failed", "Неверный OTP-код"),
+    ("login", "Вход по паролю"),
+    ("login_failed", "Неудачный вход по паролю"),
+]
+
+# Таблица секционирована по месяцам created_at. Первичный ключ
+# секционированной таблицы должен включать ключ секционирования, поэтому
+# она создается SQL-запросом; для Django первичным ключом остается id.
+CREATE_TABLE = """
+CREATE TABLE users_authevent (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    event_type varchar(20) NOT NULL,
+    email varchar(254) NOT NULL,
+    user_id bigint NULL,
+    ip_address inet NULL,
+    user_agent varchar(256) NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE INDEX users_authevent_created_idx ON users_authevent (created_at);
+CREATE INDEX users_authevent_email_idx ON users_authevent (email, created_at);
+CREATE TABLE users_authevent_default PARTITION OF users_authevent DEFAULT;
+"""
+
+
+def create_partitions(apps, schema_editor):
+    """
+    Создает секции на текущий и следующие два месяца. Дальше секции
+    создает периодическая задача maintain_auth_event_partitions.
+    """
+    today = timezone.now().date()
+    year, month = today.year, today.month
+    for _ in range(3):
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS users_authevent_p{year}{month:02d} "
+            f"PARTITION OF users_authevent FOR VALUES "
+            f"FROM ('{year}-{month:02d}-01') "
+            f"TO ('{next_year}-{next_month:02d}-01')"
+        )
+        year, month = next_year, next_month
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0006_userstatistic"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=CREATE_TABLE,
+            reverse_sql="DROP TABLE users_authevent CASCADE",
+            state_operations=[
+                migrations.CreateModel(
+                    name="AuthEvent",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "event_type",
+                            models.CharField(
+                                choices=EVENT_TYPES,
+                                max_length=20,
+                                verbose_name="Тип события",
+                            ),
+                        ),
+                        (
+                            "email",
+                            models.CharField(
+                                blank=True,
+                                max_length=254,
+                                verbose_name="Электронная почта",
+                            ),
+                        ),
+                        (
+                            "user_id",
+                            models.BigIntegerField(
+                                blank=True, null=True, verbose_name="Пользователь"
+                            ),
+                        ),
+                        (
+                            "ip_address",
+                            models.GenericIPAddressField(
+                                blank=True, null=True, verbose_name="IP-адрес"
+                            ),
+                        ),
+                        (
+                            "user_agent",
+                            models.CharField(
+                                blank=True, max_length=256, verbose_name="User-Agent"
+                            ),
+                        ),
+                        (
+                            "created_at",
+                            models.DateTimeField(verbose_name="Время события"),
+                        ),
+                    ],
+                    options={
+                        "verbose_name": "Событие аутентификации",
+                        "verbose_name_plural": "Журнал аутентификации",
+                        "ordering": ("-created_at",),
+                        "indexes": [
+                            models.Index(
+                                fields=["created_at"],
+                                name="users_authevent_created_idx",
+                            ),
+                            models.Index(
+                                fields=["email", "created_at"],
+                                name="users_authevent_email_idx",
+                            ),
+                        ],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_partitions, migrations.RunPython.noop),
+    ]
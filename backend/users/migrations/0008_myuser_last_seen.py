@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-19 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0007_authevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="myuser",
+            name="last_seen",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Записывается пачками с интервалом LAST_SEEN_INTERVAL",
+                null=True,
+                verbose_name="Последняя активность",
+            ),
+        ),
+    ]
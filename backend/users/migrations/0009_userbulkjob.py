@@ -0,0 +1,112 @@
+# Generated by Django 5.0.14 on 2026-10-19 15:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0008_myuser_last_seen"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserBulkJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "operation",
+                    models.CharField(
+                        choices=[
+                            ("deactivate", "Деактивация"),
+                            ("activate", "Активация"),
+                            ("set_role", "Смена роли"),
+                            ("delete", "Удаление"),
+                        ],
+                        max_length=20,
+                        verbose_name="Операция",
+                    ),
+                ),
+                (
+                    "role",
+                    models.CharField(
+                        blank=True,
+                        choices=[("user", "user"), ("admin", "admin")],
+                        max_length=20,
+                        verbose_name="Роль",
+                    ),
+                ),
+                (
+                    "ranges",
+                    models.JSONField(
+                        default=list, verbose_name="Диапазоны первичных ключей"
+                    ),
+                ),
+                (
+                    "cursor",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Последний обработанный ключ"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Завершена"),
+                            ("cancelled", "Отменена"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Состояние",
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Выбрано пользователей"
+                    ),
+                ),
+                (
+                    "processed",
+                    models.PositiveIntegerField(default=0, verbose_name="Обработано"),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Создана"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Обновлена"),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Запустил",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Массовая операция",
+                "verbose_name_plural": "Массовые операции",
+                "ordering": ("-created_at",),
+            },
+        ),
+    ]
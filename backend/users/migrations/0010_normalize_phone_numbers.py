@@ -0,0 +1,87 @@
+import core.validators
+from django.db import migrations, models, transaction
+
+from core.normalizers import normalize_phone
+
+BATCH_SIZE = 5000
+
+
+def normalize_phone_numbers(apps, schema_editor):
+    """
+    Приводит сохраненные номера телефонов к формату E.164 пачками
+    по диапазонам первичного ключа, каждая пачка - в отдельной короткой
+    транзакции. Номера, совпадающие после приведения, требуют ручного
+    разбора.
+    """
+    connection = schema_editor.connection
+    MyUser = apps.get_model("users", "MyUser")
+    table = MyUser._meta.db_table
+    phones = MyUser.objects.exclude(phone_number=None).order_by()
+
+    owners = {}
+    duplicates = set()
+    for pk, phone in phones.values_list("pk", "phone_number").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        phone = normalize_phone(phone)
+        if phone in owners:
+            duplicates.add(phone)
+        owners[phone] = pk
+    if duplicates:
+        raise ValueError(
+            "Пользователи с совпадающими номерами телефонов: "
+            f"{', '.join(sorted(duplicates)[:10])}. "
+            "Объедините их перед миграцией."
+        )
+    del owners
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table}")
+        low, high = cursor.fetchone()
+    if low is None:
+        return
+    for start in range(low, high + 1, BATCH_SIZE):
+        rows = [
+            (pk, normalize_phone(phone))
+            for pk, phone in phones.filter(
+                pk__gte=start, pk__lt=start + BATCH_SIZE
+            ).values_list("pk", "phone_number")
+            if normalize_phone(phone) != phone
+        ]
+        if not rows:
+            continue
+        placeholders = ", ".join(["(%s, %s)"] * len(rows))
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {table} AS u SET phone_number = v.phone "
+                    f"FROM (VALUES {placeholders}) AS v (id, phone) "
+                    f"WHERE u.id = v.id",
+                    [param for row in rows for param in row],
+                )
+
+
+class Migration(migrations.Migration):
+    # Пачки записываются в отдельных транзакциях.
+    atomic = False
+
+    dependencies = [
+        ("users", "0009_userbulkjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="myuser",
+            name="phone_number",
+            field=models.CharField(
+                blank=True,
+                help_text="Введите номер телефона, хранится в формате E.164",
+                max_length=16,
+                null=True,
+                unique=True,
+                validators=[core.validators.validate_phone_number],
+                verbose_name="Номер телефона",
+            ),
+        ),
+        migrations.RunPython(normalize_phone_numbers, migrations.RunPython.noop),
+    ]
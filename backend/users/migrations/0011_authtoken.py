@@ -0,0 +1,98 @@
+# Generated by Django 5.0.14 on 2026-10-19 15:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 5000
+
+
+def copy_tokens(apps, schema_editor):
+    """
+    Переносит бессрочные токены rest_framework.authtoken в AuthToken
+    со сроком действия AUTH_TOKEN_TTL, чтобы пользователи не выходили
+    из системы. Токены копируются пачками по ключу, каждая пачка -
+    в отдельной короткой транзакции.
+    """
+    connection = schema_editor.connection
+    table = apps.get_model("users", "AuthToken")._meta.db_table
+    last_key = ""
+    while True:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} "
+                    f"(key, user_id, device, created_at, expires_at) "
+                    f"SELECT key, user_id, '', created, "
+                    f"NOW() + make_interval(secs => %s) "
+                    f"FROM authtoken_token WHERE key > %s "
+                    f"ORDER BY key LIMIT %s "
+                    f"ON CONFLICT DO NOTHING RETURNING key",
+                    [settings.AUTH_TOKEN_TTL, last_key, BATCH_SIZE],
+                )
+                keys = [key for (key,) in cursor.fetchall()]
+        if len(keys) < BATCH_SIZE:
+            break
+        last_key = max(keys)
+
+
+class Migration(migrations.Migration):
+    # Пачки токенов копируются в отдельных транзакциях.
+    atomic = False
+
+    dependencies = [
+        ("users", "0010_normalize_phone_numbers"),
+        ("authtoken", "0003_tokenproxy"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuthToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(max_length=40, unique=True, verbose_name="Ключ"),
+                ),
+                (
+                    "device",
+                    models.CharField(
+                        blank=True, max_length=128, verbose_name="Устройство"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="Выдан")),
+                (
+                    "expires_at",
+                    models.DateTimeField(db_index=True, verbose_name="Истекает"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="auth_tokens",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Токен аутентификации",
+                "verbose_name_plural": "Токены аутентификации",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="authtoken",
+            constraint=models.UniqueConstraint(
+                fields=("user", "device"), name="users_authtoken_user_device_uniq"
+            ),
+        ),
+        migrations.RunPython(copy_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 16:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_authtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userbulkjob',
+            name='generation',
+            field=models.PositiveIntegerField(default=0, verbose_name='Номер запуска'),
+        ),
+    ]
@@ -1,13 +1,18 @@
+import binascii
+import os
 from random import randint
 from datetime import timedelta
 
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Lower, Upper
 from django.utils import timezone
 
 from backend import settings
 from core.constants.users import (
+    DEVICE_LENGTH,
     EMAIL_LENGTH,
     NAME_LENGTH,
     PHONE_NUMBER_LENGTH,
@@ -15,8 +20,12 @@ from core.constants.users import (
     SEX_LENGTH
 )
 
+from core.normalizers import normalize_email, normalize_phone
 from core.validators import validate_phone_number
 
+# Поиск по email__lower использует функциональные индексы по LOWER(email).
+models.EmailField.register_lookup(Lower)
+
 
 class UserManager(BaseUserManager):
     """
@@ -29,6 +38,11 @@ class UserManager(BaseUserManager):
         сохраняет обычного пользователя.
         - create_superuser(email, password, **extra_fields): Создает и
         сохраняет суперпользователя.
+        - normalize_email(email): Приводит email к канонической форме.
+        - get_by_natural_key(username): Ищет пользователя по email
+        без учета регистра.
+        - get_by_phone(phone): Ищет пользователя по номеру телефона
+        в любой записи.
     Attributes:
         - use_in_migrations: Флаг, указывающий, что этот менеджер
         используется в миграциях.
@@ -36,6 +50,38 @@ class UserManager(BaseUserManager):
 
     use_in_migrations = True
 
+    @classmethod
+    def normalize_email(cls, email):
+        """
+        Приводит email к канонической форме (нижний регистр целиком,
+        а не только домен, как в BaseUserManager).
+        :param email: Email пользователя.
+        :return: Канонический email.
+        """
+        return normalize_email(email or "")
+
+    def get_by_natural_key(self, username):
+        """
+        Возвращает пользователя по email без учета регистра.
+        Используется при входе по паролю (ModelBackend, Djoser).
+        :param username: Email пользователя.
+        :return: Найденный пользователь.
+        """
+        return self.get(email__lower=normalize_email(username))
+
+    def get_by_phone(self, phone):
+        """
+        Возвращает пользователя по номеру телефона. Номера хранятся
+        в формате E.164, поэтому поиск - одно обращение к уникальному
+        индексу phone_number.
+        :param phone: Номер телефона в произвольной записи.
+        :return: Найденный пользователь.
+        """
+        phone = normalize_phone(phone)
+        if phone is None:
+            raise self.model.DoesNotExist
+        return self.get(phone_number=phone)
+
     def _create_user(self, email, password, **extra_fields):
         """
         Создает и сохраняет пользователя с заданным email и паролем.
@@ -101,7 +147,7 @@ class VerificationOtpCodeManager(models.Manager):
 
         otp_code = self.filter(
             otp_code=otp_code,
-            email=email,
+            email__lower=normalize_email(email),
             used=False,
             expiration__gt=timezone.now() - timedelta(
                 minutes=settings.OTP_CODE_EXPIRATION_TIME))
@@ -120,12 +166,13 @@ class VerificationOtpCodeManager(models.Manager):
             VerificationCode: Созданный объект кода верификации OTP.
         """
 
-        self.filter(email=email, used=True).delete()
-        self.filter(email=email,
+        email = normalize_email(email)
+        self.filter(email__lower=email, used=True).delete()
+        self.filter(email__lower=email,
                     expiration__lt=timezone.now() - timedelta(minutes=settings.OTP_CODE_EXPIRATION_TIME)).delete()
         # 90 минут
         valid_codes = self.filter(
-            email=email, used=False,
+            email__lower=email, used=False,
             expiration__gt=timezone.now() - timedelta(minutes=settings.OTP_CODE_EXPIRATION_TIME))
         if valid_codes:
             # Если есть неиспользованный код, обновляем его срок действия
@@ -140,6 +187,54 @@ class VerificationOtpCodeManager(models.Manager):
                 expiration=timezone.now() + timedelta(minutes=settings.OTP_CODE_EXPIRATION_TIME))
             return verification_code
 
+    def bulk_create_otp_codes(self, emails, batch_size=1000):
+        """
+        Выдает OTP-коды списку адресов пачками запросов INSERT ... ON
+        CONFLICT вместо отдельных запросов create_otp_code на каждый адрес.
+        Как и create_otp_code, действующий неиспользованный код сохраняется
+        с продленным сроком, остальным адресам выдается новый код.
+        Args:
+            emails (list): Адреса электронной почты в канонической форме.
+            batch_size (int): Количество строк в одном запросе.
+        Returns:
+            dict: Коды верификации (с первичными ключами) по адресам
+            электронной почты.
+        """
+        now = timezone.now()
+        expiration = now + timedelta(minutes=settings.OTP_CODE_EXPIRATION_TIME)
+        codes = {}
+        for start in range(0, len(emails), batch_size):
+            batch = emails[start:start + batch_size]
+            codes.update(
+                self.filter(
+                    email__in=batch, used=False,
+                    expiration__gt=now - timedelta(
+                        minutes=settings.OTP_CODE_EXPIRATION_TIME)
+                ).values_list("email", "otp_code")
+            )
+        codes.update(
+            (email, self.create_new_otp_code())
+            for email in emails if email not in codes
+        )
+        # Адреса хранятся в канонической форме, поэтому конфликт по email
+        # совпадает с конфликтом по индексу LOWER(email).
+        # Первичные ключи обновленных и созданных строк возвращаются
+        # через RETURNING.
+        verification_codes = self.bulk_create(
+            [
+                self.model(
+                    email=email, otp_code=otp_code,
+                    expiration=expiration, used=False
+                )
+                for email, otp_code in codes.items()
+            ],
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["email"],
+            update_fields=["otp_code", "expiration", "used"],
+        )
+        return {code.email: code for code in verification_codes}
+
 
 class MyUser(AbstractUser):
     """
@@ -154,6 +249,9 @@ class MyUser(AbstractUser):
         пользователя при аутентификации.
         - REQUIRED_FIELDS: Обязательные поля при создании пользователя.
         - objects: Менеджер для работы с пользователями.
+        - updated_at: Время последнего изменения, основа для ETag
+        и Last-Modified.
+        - last_seen: Время последней активности (см. users.activity).
     """
 
     USER = "user"
@@ -208,7 +306,7 @@ class MyUser(AbstractUser):
         unique=True,
         null=True,
         validators=[validate_phone_number],
-        help_text="Введите номер телефона",
+        help_text="Введите номер телефона, хранится в формате E.164",
     )
     role = models.CharField(
         "Роль",
@@ -218,6 +316,17 @@ class MyUser(AbstractUser):
         blank=True,
         help_text="Роль пользователя"
     )
+    updated_at = models.DateTimeField(
+        "Дата изменения",
+        auto_now=True,
+        help_text="Обновляется при каждом сохранении пользователя",
+    )
+    last_seen = models.DateTimeField(
+        "Последняя активность",
+        null=True,
+        blank=True,
+        help_text="Записывается пачками с интервалом LAST_SEEN_INTERVAL",
+    )
 
     username: None = None
 
@@ -233,6 +342,44 @@ class MyUser(AbstractUser):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
+        constraints = [
+            models.UniqueConstraint(
+                Lower("email"), name="users_myuser_email_lower_uniq"
+            ),
+        ]
+        # Триграммные индексы по UPPER(поле) обслуживают icontains
+        # (UPPER(поле) LIKE UPPER('%...%')) в поиске админки и API.
+        indexes = [
+            GinIndex(
+                OpClass(Upper(field), name="gin_trgm_ops"),
+                name=f"users_myuser_{field}_trgm",
+            )
+            for field in ("email", "first_name", "last_name")
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет пользователя, приводя email и номер телефона
+        к канонической форме. Полное сохранение существующего пользователя
+        не записывает last_seen: поле обновляется задачей flush_last_seen,
+        и устаревший экземпляр перезаписал бы более позднее время.
+        """
+        self.email = normalize_email(self.email)
+        self.phone_number = normalize_phone(self.phone_number)
+        if (
+            kwargs.get("update_fields") is None
+            and not self._state.adding
+            and not kwargs.get("force_insert")
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name != "last_seen"
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """
@@ -270,10 +417,321 @@ class VerificationCode(models.Model):
         verbose_name = "Код верификации"
         verbose_name_plural = "Коды верификации"
         unique_together = ['email', 'otp_code']
+        constraints = [
+            models.UniqueConstraint(
+                Lower("email"), name="users_verificationcode_email_lower_uniq"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет код верификации, приводя email к канонической форме.
+        """
+        self.email = normalize_email(self.email)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """
         Возвращает строковое представление пользователя.
         :return: Строковое представление в формате "email" и "otp_code".
         """
-        return f"{self.otp_code}"
\ No newline at end of file
+        return f"{self.otp_code}"
+
+
+class UserStatistic(models.Model):
+    """
+    Счетчик пользователей по значению одного из измерений (роль, пол,
+    активность, день регистрации). Поддерживается инкрементально
+    (см. users.stats) и сверяется с таблицей пользователей
+    задачей reconcile_user_stats.
+    Attributes:
+        dimension (str): Измерение.
+        value (str): Значение измерения.
+        count (int): Количество пользователей.
+    """
+
+    dimension = models.CharField("Измерение", max_length=20)
+    value = models.CharField("Значение", max_length=20)
+    count = models.BigIntegerField("Количество", default=0)
+
+    class Meta:
+        verbose_name = "Статистика пользователей"
+        verbose_name_plural = "Статистика пользователей"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dimension", "value"],
+                name="users_userstatistic_dimension_value_uniq",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.value}: {self.count}"
+
+
+class AuthEvent(models.Model):
+    """
+    Событие аутентификации в журнале аудита. Таблица секционирована
+    по месяцам created_at (см. users.events), записи только добавляются
+    пачками из буфера в Redis.
+    Attributes:
+        event_type (str): Тип события.
+        email (str): Адрес электронной почты из запроса.
+        user_id (int): Идентификатор пользователя, если он известен.
+        Хранится без внешнего ключа, чтобы журнал переживал удаление
+        пользователя.
+        ip_address (str): IP-адрес клиента.
+        user_agent (str): User-Agent клиента.
+        created_at (datetime): Время события.
+    """
+
+    OTP_REQUESTED = "otp_requested"
+    OTP_VERIFIED = "otp_verified"
+    OTP_FAILED = "otp_failed"
+    LOGIN = "login"
+    LOGIN_FAILED = "login_failed"
+
+    EVENT_TYPES = (
+        (OTP_REQUESTED, "Запрос OTP-кода"),
+        (OTP_VERIFIED, "Вход по OTP-коду"),
+        (OTP_FAILED, "Неверный OTP-код"),
+        (LOGIN, "Вход по паролю"),
+        (LOGIN_FAILED, "Неудачный вход по паролю"),
+    )
+
+    event_type = models.CharField(
+        "Тип события", max_length=20, choices=EVENT_TYPES
+    )
+    email = models.CharField(
+        "Электронная почта", max_length=EMAIL_LENGTH, blank=True
+    )
+    user_id = models.BigIntegerField("Пользователь", null=True, blank=True)
+    ip_address = models.GenericIPAddressField("IP-адрес", null=True, blank=True)
+    user_agent = models.CharField("User-Agent", max_length=256, blank=True)
+    created_at = models.DateTimeField("Время события")
+
+    class Meta:
+        verbose_name = "Событие аутентификации"
+        verbose_name_plural = "Журнал аутентификации"
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["created_at"], name="users_authevent_created_idx"
+            ),
+            models.Index(
+                fields=["email", "created_at"],
+                name="users_authevent_email_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.created_at:%Y-%m-%d %H:%M} {self.event_type} {self.email}"
+
+
+class UserBulkJob(models.Model):
+    """
+    Фоновая массовая операция над пользователями (см. users.bulk).
+    Выбранные пользователи хранятся диапазонами первичных ключей и
+    обрабатываются пачками в коротких транзакциях; после каждой пачки
+    сохраняется последний обработанный ключ, поэтому прерванную операцию
+    можно возобновить, а выполняющуюся - отменить.
+    Attributes:
+        operation (str): Операция.
+        role (str): Новая роль для операции set_role.
+        ranges (list): Диапазоны первичных ключей [начало, конец].
+        cursor (int): Последний обработанный первичный ключ.
+        status (str): Состояние операции.
+        total (int): Количество выбранных пользователей.
+        processed (int): Количество обработанных пользователей.
+        error (str): Текст ошибки, прервавшей операцию.
+        generation (int): Номер запуска операции. Увеличивается при
+        возобновлении, задачи прежнего запуска останавливаются.
+        created_by (MyUser): Администратор, запустивший операцию.
+    """
+
+    DEACTIVATE = "deactivate"
+    ACTIVATE = "activate"
+    SET_ROLE = "set_role"
+    DELETE = "delete"
+
+    OPERATIONS = (
+        (DEACTIVATE, "Деактивация"),
+        (ACTIVATE, "Активация"),
+        (SET_ROLE, "Смена роли"),
+        (DELETE, "Удаление"),
+    )
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+    STATUSES = (
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Завершена"),
+        (CANCELLED, "Отменена"),
+        (FAILED, "Ошибка"),
+    )
+
+    operation = models.CharField("Операция", max_length=20, choices=OPERATIONS)
+    role = models.CharField(
+        "Роль", max_length=ROLE_LENGTH, choices=MyUser.ROLES, blank=True
+    )
+    ranges = models.JSONField("Диапазоны первичных ключей", default=list)
+    cursor = models.BigIntegerField("Последний обработанный ключ", default=0)
+    status = models.CharField(
+        "Состояние", max_length=20, choices=STATUSES, default=PENDING
+    )
+    total = models.PositiveIntegerField("Выбрано пользователей", default=0)
+    processed = models.PositiveIntegerField("Обработано", default=0)
+    error = models.TextField("Ошибка", blank=True)
+    generation = models.PositiveIntegerField("Номер запуска", default=0)
+    created_by = models.ForeignKey(
+        MyUser,
+        verbose_name="Запустил",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    created_at = models.DateTimeField("Создана", auto_now_add=True)
+    updated_at = models.DateTimeField("Обновлена", auto_now=True)
+
+    class Meta:
+        verbose_name = "Массовая операция"
+        verbose_name_plural = "Массовые операции"
+        ordering = ("-created_at",)
+
+    @property
+    def progress(self):
+        """
+        Возвращает долю обработанных пользователей в процентах.
+        """
+        if not self.total:
+            return 100
+        return round(self.processed * 100 / self.total, 1)
+
+    def __str__(self):
+        return f"{self.get_operation_display()} #{self.pk}"
+
+
+class AuthTokenManager(models.Manager):
+    """
+    Менеджер токенов аутентификации.
+    """
+
+    def issue(self, user, device=""):
+        """
+        Выдает пользователю новый токен для устройства. Токен, ранее
+        выданный тому же устройству, заменяется (ротация) одним запросом
+        INSERT ... ON CONFLICT. Если у пользователя больше
+        AUTH_TOKEN_MAX_PER_USER токенов, самые старые удаляются.
+        Args:
+            user (MyUser): Пользователь.
+            device (str): Идентификатор устройства
+            (users.authentication.get_device).
+        Returns:
+            AuthToken: Выданный токен.
+        """
+        now = timezone.now()
+        token = self.model(
+            key=self.model.generate_key(),
+            user=user,
+            device=device[:DEVICE_LENGTH],
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.AUTH_TOKEN_TTL),
+        )
+        self.bulk_create(
+            [token],
+            update_conflicts=True,
+            unique_fields=["user", "device"],
+            update_fields=["key", "created_at", "expires_at"],
+        )
+        outdated = list(
+            self.filter(user=user)
+            .order_by("-created_at")
+            .values_list("pk", flat=True)[settings.AUTH_TOKEN_MAX_PER_USER:]
+        )
+        if outdated:
+            self.filter(pk__in=outdated).delete()
+        return token
+
+    def delete_expired(self, batch_size=None):
+        """
+        Удаляет истекшие токены пачками по batch_size строк, каждая
+        пачка - отдельным коротким запросом по индексу expires_at.
+        Args:
+            batch_size (int): Количество токенов в одном DELETE.
+        Returns:
+            int: Количество удаленных токенов.
+        """
+        batch_size = batch_size or settings.AUTH_TOKEN_CLEANUP_BATCH_SIZE
+        deleted = 0
+        while True:
+            expired = list(
+                self.filter(expires_at__lte=timezone.now())
+                .order_by()
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not expired:
+                break
+            deleted += self.filter(pk__in=expired).delete()[0]
+            if len(expired) < batch_size:
+                break
+        return deleted
+
+
+class AuthToken(models.Model):
+    """
+    Токен аутентификации с ограниченным сроком действия
+    (см. users.authentication.ExpiringTokenAuthentication).
+    У пользователя может быть по одному токену на каждое устройство
+    (не больше AUTH_TOKEN_MAX_PER_USER), повторный вход с устройства
+    заменяет его токен. Срок действия
+    продлевается при использовании токена (не чаще одного раза
+    за AUTH_TOKEN_REFRESH_INTERVAL), истекшие токены удаляет задача
+    delete_expired_tokens.
+    Attributes:
+        key (str): Ключ токена, поиск по уникальному индексу.
+        user (MyUser): Владелец токена.
+        device (str): Идентификатор устройства, выданный сервером.
+        created_at (datetime): Время выдачи.
+        expires_at (datetime): Время истечения.
+    """
+
+    key = models.CharField("Ключ", max_length=40, unique=True)
+    user = models.ForeignKey(
+        MyUser,
+        verbose_name="Пользователь",
+        on_delete=models.CASCADE,
+        related_name="auth_tokens",
+    )
+    device = models.CharField("Устройство", max_length=DEVICE_LENGTH, blank=True)
+    created_at = models.DateTimeField("Выдан")
+    expires_at = models.DateTimeField("Истекает", db_index=True)
+
+    objects = AuthTokenManager()
+
+    class Meta:
+        verbose_name = "Токен аутентификации"
+        verbose_name_plural = "Токены аутентификации"
+        constraints = [
+            models.UniqueConstraint(
+                fields=("user", "device"), name="users_authtoken_user_device_uniq"
+            ),
+        ]
+
+    @staticmethod
+    def generate_key():
+        """
+        Генерирует случайный ключ токена (как rest_framework.authtoken).
+        """
+        return binascii.hexlify(os.urandom(20)).decode()
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def __str__(self):
+        return f"{self.user_id} {self.device or '-'}"
@@ -0,0 +1,111 @@
+import logging
+import math
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from core import metrics
+from users.models import VerificationCode
+
+logger = logging.getLogger(__name__)
+
+# Последнее отправленное письмо с OTP-кодом по адресу: идентификатор кода,
+# ключ живет OTP_RESEND_COOLDOWN секунд.
+RESEND_KEY = "users:otp:resend:{email}"
+
+# Если в течение окна письмо с тем же кодом уже поставлено в очередь,
+# возвращает оставшееся время окна в миллисекундах. Иначе (окна нет или
+# код другой) открывает окно и возвращает -1: письмо нужно отправить.
+RESERVE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    local ttl = redis.call('PTTL', KEYS[1])
+    if ttl > 0 then return ttl end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+return -1
+"""
+
+# Закрывает окно, только если оно открыто письмом с тем же кодом: окно
+# письма с более новым кодом остается.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def reserve(email, code_id):
+    """
+    Проверяет, нужно ли отправлять письмо с OTP-кодом. Повторный запрос
+    того же кода в течение OTP_RESEND_COOLDOWN секунд не ставит новое
+    письмо в очередь: действует уже отправленное. Письмо с новым кодом
+    отправляется сразу. Если Redis недоступен, письмо отправляется.
+    Args:
+        email (str): Email в канонической форме.
+        code_id (int): Идентификатор кода верификации.
+    Returns:
+        tuple: Признак отправки письма и оставшееся время до повторной
+        отправки, сек.
+    """
+    cooldown = settings.OTP_RESEND_COOLDOWN
+    if cooldown <= 0:
+        return True, 0
+    try:
+        result = get_redis_connection("default").eval(
+            RESERVE_SCRIPT, 1, RESEND_KEY.format(email=email),
+            code_id, cooldown * 1000,
+        )
+    except Exception as error:
+        logger.warning(f"Повторная отправка OTP-кода не проверена: {error}")
+        return True, 0
+    if result < 0:
+        metrics.incr("otp_resend.sent")
+        return True, cooldown
+    metrics.incr("otp_resend.suppressed")
+    return False, math.ceil(result / 1000)
+
+
+def release(email, code_id):
+    """
+    Закрывает окно повторной отправки письма с кодом, например если
+    письмо не удалось поставить в очередь. Окно письма с другим кодом
+    остается.
+    Args:
+        email (str): Email в канонической форме.
+        code_id (int): Идентификатор кода верификации.
+    """
+    try:
+        get_redis_connection("default").eval(
+            RELEASE_SCRIPT, 1, RESEND_KEY.format(email=email), code_id
+        )
+    except Exception as error:
+        logger.warning(f"Окно повторной отправки OTP-кода не закрыто: {error}")
+
+
+def release_codes(code_ids):
+    """
+    Закрывает окна повторной отправки писем с указанными кодами, если
+    письма не доставлены: повторный запрос кода отправит письмо сразу.
+    Args:
+        code_ids (list): Идентификаторы кодов верификации.
+    Returns:
+        int: Количество закрытых окон.
+    """
+    if settings.OTP_RESEND_COOLDOWN <= 0:
+        return 0
+    codes = VerificationCode.objects.filter(pk__in=code_ids).values_list(
+        "pk", "email"
+    )
+    released = 0
+    try:
+        redis = get_redis_connection("default")
+        for code_id, email in codes:
+            released += redis.eval(
+                RELEASE_SCRIPT, 1, RESEND_KEY.format(email=email), code_id
+            )
+    except Exception as error:
+        logger.warning(f"Окно повторной отправки OTP-кода не закрыто: {error}")
+    if released:
+        metrics.incr("otp_resend.released", released)
+    return released
@@ -1,22 +1,107 @@
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+
+from core.openapi import view_schema
 
 
 COLLECT_SCHEMA = {
     "verification_code": extend_schema(
         description="""
         Создает и сохраняет новый объект кода верификации.
-        Принимает запрос, содержащий данные для создания кода верификации.
+        Принимает запрос, содержащий данные для создания кода верификации:
+        email или номер телефона phone_number в любой записи (код
+        отправляется на электронную почту пользователя с этим номером).
         Возвращает ответ с данными созданного кода верификации и 
-        статусом HTTP 201 CREATED.
+        статусом HTTP 201 CREATED. Поле resend_cooldown - сколько секунд
+        повторные запросы кода не отправляют письмо заново: в это время
+        действует уже отправленное письмо. Если код запрошен по номеру
+        телефона, ответ не содержит email, код и срок его действия: код
+        приходит только на электронную почту.
         В случае некорректных данных для создания кода верификации 
         генерирует исключение ValidationError.
         """
     ),
+    "bulk_verification_code": extend_schema(
+        description="""
+        Массово выдает OTP-коды для рассылки приглашений (только для
+        администраторов). Принимает список адресов emails, выдает коды
+        существующим пользователям и ставит отправку писем в очередь.
+        Возвращает идентификатор задачи рассылки job_id, количество
+        выданных кодов и ненайденные адреса со статусом HTTP 202 ACCEPTED.
+        """
+    ),
+    "bulk_verification_code_job": extend_schema(
+        description="""
+        Возвращает прогресс задачи массовой рассылки OTP-кодов: общее
+        количество писем, отправленные (sent) и неотправленные (failed)
+        письма и признак завершения done.
+        """,
+        responses=OpenApiTypes.OBJECT,
+    ),
+    "bulk_jobs": [
+        extend_schema(
+            description="""
+            Массовые операции над пользователями (только для администраторов).
+            - (GET-запрос) Возвращает последние операции с прогрессом.
+            - (POST-запрос) Создает операцию operation (deactivate, activate,
+            set_role, delete) над пользователями ids и ставит ее в очередь.
+            Для set_role обязательна новая роль role. Операция выполняется
+            пачками по USER_BULK_JOB_BATCH_SIZE пользователей, возвращается
+            со статусом HTTP 202 ACCEPTED.
+            """
+        ),
+        # Без явного operationId GET списка и GET одной операции
+        # (bulk_job) получают одинаковый v1_users_bulk_jobs_retrieve.
+        extend_schema(methods=["GET"], operation_id="v1_users_bulk_jobs_list"),
+    ],
+    "bulk_job": extend_schema(
+        operation_id="v1_users_bulk_jobs_retrieve",
+        description="""
+        Возвращает состояние массовой операции, количество выбранных
+        (total) и обработанных (processed) пользователей.
+        """
+    ),
+    "bulk_job_cancel": extend_schema(
+        request=None,
+        description="""
+        Отменяет массовую операцию в очереди или выполняющуюся.
+        Уже обработанные пачки не откатываются.
+        """
+    ),
+    "bulk_job_resume": extend_schema(
+        request=None,
+        description="""
+        Возобновляет отмененную или прерванную ошибкой массовую операцию
+        с последнего обработанного пользователя. Операцию в очереди или
+        выполняющуюся можно возобновить, если она не обновлялась дольше
+        USER_BULK_JOB_STALE_TIME секунд.
+        """
+    ),
+    "stats": extend_schema(
+        description="""
+        Возвращает количество пользователей по ролям (role), полу (sex),
+        активности (is_active) и дням регистрации (signup_day) за последние
+        days дней (только для администраторов). Счетчики обновляются
+        инкрементально, с задержкой до USER_STATS_FLUSH_INTERVAL секунд.
+        В active - активные пользователи за текущий день (dau) и месяц (mau).
+        """,
+        parameters=[
+            OpenApiParameter(
+                "days", int, description="Количество дней регистраций (1-366)"
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    ),
     "auth_otp_code": extend_schema(
         description="""
         Проверяет OTP-код и авторизует пользователя. 
-        Принимает запрос, содержащий данные OTP-кода,
-        и возвращает ответ с результатом авторизации и получением токена. 
+        Принимает запрос, содержащий данные OTP-кода (otp_code и email
+        или номер телефона phone_number), и возвращает ответ с результатом
+        авторизации, токеном auth_token и идентификатором устройства device.
+        Токен выдается на AUTH_TOKEN_TTL секунд и продлевается при
+        использовании. Идентификатор устройства, переданный в поле device
+        при следующем входе, заменяет токен этого устройства вместо
+        выдачи еще одного.
         В случае некорректных данных OTP-кода генерирует исключение ValidationError.
         """
     ),
@@ -32,4 +117,11 @@ COLLECT_SCHEMA = {
          Возвращает статус HTTP 204 No Content в случае успешного удаления профиля.
         """
     ),
-}
\ No newline at end of file
+}
+
+
+view_schema("users.views.CustomUserViewSet", **COLLECT_SCHEMA)
+view_schema(
+    "users.views.TokenDestroyView",
+    post=extend_schema(request=None, responses={204: None}),
+)
@@ -1,12 +1,47 @@
+from celery import group
+from django.conf import settings
 from django.core.validators import EmailValidator
 from django.core.exceptions import ValidationError
 from djoser.serializers import UserSerializer
 from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
-from core.email_messages import create_confirmation_email
-from users.models import MyUser, VerificationCode
-from api.v1.task import send_email_message
+from core import metrics
+from core.constants.users import EMAIL_LENGTH, PHONE_NUMBER_LENGTH
+from core.email_templates import get_email_template
+from core.jobs import create_job
+from core.normalizers import normalize_email, normalize_phone
+from core.validators import validate_phone_number
+from users import bloom, bulk, resend
+from users.models import MyUser, UserBulkJob, VerificationCode
+from users.emails import OTP_CODE_TEMPLATE
+from api.v1.task import send_template_emails
+
+
+class NormalizedEmailField(serializers.EmailField):
+    """
+    Поле электронной почты, приводящее адрес к канонической форме
+    до запуска валидаторов.
+    """
+
+    def to_internal_value(self, data):
+        return normalize_email(super().to_internal_value(data))
+
+
+class NormalizedPhoneField(serializers.CharField):
+    """
+    Поле номера телефона, приводящее номер к формату E.164
+    до запуска валидаторов.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_length", PHONE_NUMBER_LENGTH)
+        super().__init__(**kwargs)
+        self.validators.insert(0, validate_phone_number)
+
+    def to_internal_value(self, data):
+        return normalize_phone(super().to_internal_value(data))
 
 
 class CustomUserSerializer(UserSerializer):
@@ -15,9 +50,25 @@ class CustomUserSerializer(UserSerializer):
     Сериализатор, расширяющий базовый сериализатор пользователя,
     для обработки дополнительных полей.
     Attributes:
+        - email: Email в канонической форме, уникальность проверяется
+        по индексу LOWER(email).
+        - phone_number: Номер телефона в формате E.164.
         - Meta: Класс метаданных для определения модели и полей сериализатора.
     """
 
+    email = NormalizedEmailField(
+        max_length=EMAIL_LENGTH,
+        validators=[
+            UniqueValidator(queryset=MyUser.objects.all(), lookup="lower")
+        ],
+    )
+    phone_number = NormalizedPhoneField(
+        required=False,
+        allow_null=True,
+        allow_blank=True,
+        validators=[UniqueValidator(queryset=MyUser.objects.all())],
+    )
+
     class Meta:
         model = MyUser
         fields = (
@@ -27,6 +78,7 @@ class CustomUserSerializer(UserSerializer):
             "last_name",
             "surname",
             "sex",
+            "phone_number",
             "password",
         )
         extra_kwargs = {
@@ -36,6 +88,7 @@ class CustomUserSerializer(UserSerializer):
             "last_name": {"required": False},
             "surname": {"required": False},
             "sex": {"required": False},
+            "phone_number": {"required": False},
             "is_active": {"required": False, "read_only": True},
         }
 
@@ -44,6 +97,7 @@ class CustomUserSerializer(UserSerializer):
             email=validated_data["email"],
             first_name=validated_data["first_name"],
             last_name=validated_data["last_name"],
+            phone_number=validated_data.get("phone_number"),
         )
         user.set_password(validated_data["password"])
         user.save()
@@ -72,12 +126,22 @@ class VerificationCodeSerializer(ModelSerializer):
         model (Model): Модель VerificationCode.
         fields (str): Список полей для сериализации.
         read_only_fields (tuple): Список полей только для чтения.
+        email (NormalizedEmailField): Email в канонической форме. Повторный
+        запрос для того же адреса обновляет существующий код.
+        phone_number (NormalizedPhoneField): Номер телефона вместо email:
+        код отправляется на электронную почту пользователя с этим номером.
+        resend_cooldown (IntegerField): Сколько секунд повторные запросы
+        не отправляют письмо заново (users.resend).
 
     Methods:
         validate(data): Проверяет корректность электронной почты пользователя.
         create(validated_data): Создает новый OTP-код для верификации.
     """
 
+    email = NormalizedEmailField(max_length=EMAIL_LENGTH, required=False)
+    phone_number = NormalizedPhoneField(required=False, write_only=True)
+    resend_cooldown = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = VerificationCode
         fields = '__all__'
@@ -91,23 +155,56 @@ class VerificationCodeSerializer(ModelSerializer):
         Raises: Проверка @ в БД и ошибка если ее нет.
         """
 
+        phone_number = data.pop('phone_number', None)
+        if phone_number:
+            data['email'] = _email_by_phone(
+                phone_number,
+                "Пользователь с указанным номером телефона не найден.",
+            )
+            self.identified_by_phone = True
+            return data
+
         email = data.get('email')
+        if not email:
+            raise serializers.ValidationError(
+                "Укажите электронную почту или номер телефона.")
         email_validator = EmailValidator()
         try:
             email_validator(email)
         except ValidationError as e:
             raise serializers.ValidationError(str(e))
 
-        if not MyUser.objects.filter(email=email).exists():
+        # Фильтр Блума отсекает заведомо незарегистрированные адреса
+        # без запроса к БД.
+        if not bloom.might_contain(email):
+            raise serializers.ValidationError(
+                "Пользователь с указанной электронной почтой не найден.")
+        if not MyUser.objects.filter(email__lower=email).exists():
+            bloom.record_false_positive()
             raise serializers.ValidationError(
                 "Пользователь с указанной электронной почтой не найден.")
 
         return data
 
+    def to_representation(self, instance):
+        """
+        Если код запрошен по номеру телефона, не возвращает ни email
+        пользователя, ни сам код: код приходит только на электронную почту,
+        иначе номера телефона было бы достаточно для входа.
+        """
+        data = super().to_representation(instance)
+        if getattr(self, 'identified_by_phone', False):
+            for field in ('email', 'otp_code', 'expiration', 'id'):
+                data.pop(field, None)
+        return data
+
     def create(self, validated_data):
         """
-        Создает новый OTP-код для верификации, отправляет его по электронной почте
-        и возвращает OTP-код верификации.
+        Создает новый OTP-код для верификации, ставит отправку письма
+        в очередь и возвращает OTP-код верификации. Письмо отрисовывается
+        в воркере по идентификатору кода, на языке запроса. Повторный
+        запрос того же кода в течение OTP_RESEND_COOLDOWN не отправляет
+        письмо заново.
         Args: validated_data (dict): Валидированные данные.
         Returns:
             VerificationCode: Созданный объект OTP-кода верификации.
@@ -118,20 +215,148 @@ class VerificationCodeSerializer(ModelSerializer):
         email = validated_data['email']
         otp_code = VerificationCode.objects.create_otp_code(email)
 
-        user = MyUser.objects.filter(email=email).first()
-        if user is not None:
-            first_name = user.first_name
-            last_name = user.last_name
-            email_message = create_confirmation_email(
-                first_name, last_name, otp_code
+        send, otp_code.resend_cooldown = resend.reserve(email, otp_code.pk)
+        if send:
+            try:
+                send_template_emails.delay(
+                    OTP_CODE_TEMPLATE, [otp_code.pk], _get_language(self.context)
+                )
+            except Exception:
+                resend.release(email, otp_code.pk)
+                raise
+
+        return otp_code
+
+
+class BulkVerificationCodeSerializer(serializers.Serializer):
+    """
+    Сериализатор массовой выдачи OTP-кодов для рассылки приглашений.
+    Существование пользователей проверяется одним запросом, коды
+    записываются пачками (VerificationCode.objects.bulk_create_otp_codes),
+    а письма отправляются группой задач Celery по
+    BULK_OTP_EMAIL_CHUNK_SIZE писем в каждой.
+    Attributes:
+        - emails (ListField): Адреса электронной почты в канонической форме.
+        - job_id (CharField): Идентификатор задачи рассылки для отслеживания
+        прогресса.
+        - total (IntegerField): Количество выданных кодов.
+        - not_found (ListField): Адреса, для которых не найден пользователь.
+    """
+
+    emails = serializers.ListField(
+        child=NormalizedEmailField(max_length=EMAIL_LENGTH),
+        allow_empty=False,
+        max_length=settings.BULK_OTP_MAX_EMAILS,
+        write_only=True,
+    )
+    job_id = serializers.CharField(read_only=True)
+    total = serializers.IntegerField(read_only=True)
+    not_found = serializers.ListField(
+        child=serializers.EmailField(), read_only=True
+    )
+
+    def validate_emails(self, emails):
+        """
+        Убирает повторяющиеся адреса, сохраняя порядок.
+        """
+        return list(dict.fromkeys(emails))
+
+    def create(self, validated_data):
+        """
+        Выдает OTP-коды существующим пользователям и ставит отправку писем
+        в очередь.
+        Args: validated_data (dict): Валидированные данные.
+        Returns: dict: Идентификатор задачи, количество выданных кодов
+        и адреса, для которых пользователь не найден.
+        """
+
+        emails = validated_data["emails"]
+        users = set(
+            MyUser.objects.filter(email__lower__in=emails).values_list(
+                "email", flat=True
             )
-        else:
-            email_message = create_confirmation_email(
-                otp_code, first_name='', last_name=''
+        )
+        found = [email for email in emails if email in users]
+        codes = VerificationCode.objects.bulk_create_otp_codes(
+            found, batch_size=settings.BULK_OTP_BATCH_SIZE
+        )
+
+        job_id = create_job(
+            "bulk_otp", len(found), counters=("sent", "failed")
+        )
+        code_ids = [codes[email].pk for email in found]
+        language = _get_language(self.context)
+        chunk_size = settings.BULK_OTP_EMAIL_CHUNK_SIZE
+        if code_ids:
+            group(
+                send_template_emails.s(
+                    OTP_CODE_TEMPLATE, code_ids[start:start + chunk_size],
+                    language, job_id,
+                )
+                for start in range(0, len(code_ids), chunk_size)
+            ).apply_async()
+        metrics.incr("bulk_otp.issued", len(found))
+
+        return {
+            "job_id": job_id,
+            "total": len(found),
+            "not_found": [email for email in emails if email not in users],
+        }
+
+
+class UserBulkJobSerializer(ModelSerializer):
+    """
+    Сериализатор фоновой массовой операции над пользователями.
+    Пользователи передаются списком идентификаторов ids, операция
+    выполняется задачей Celery (см. users.bulk).
+    Attributes:
+        - ids (ListField): Идентификаторы пользователей.
+        - progress (FloatField): Доля обработанных пользователей, %.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.USER_BULK_JOB_MAX_IDS,
+        write_only=True,
+    )
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = UserBulkJob
+        fields = (
+            "id", "operation", "role", "ids", "status", "total", "processed",
+            "progress", "error", "created_at", "updated_at",
+        )
+        read_only_fields = (
+            "status", "total", "processed", "error", "created_at",
+            "updated_at",
+        )
+
+    def validate(self, data):
+        """
+        Проверяет, что для смены роли указана новая роль.
+        """
+        if data["operation"] == UserBulkJob.SET_ROLE and not data.get("role"):
+            raise serializers.ValidationError(
+                {"role": "Укажите новую роль пользователей"}
             )
-        send_email_message.delay(email=email, email_message=email_message)
+        if data["operation"] != UserBulkJob.SET_ROLE:
+            data["role"] = ""
+        return data
 
-        return otp_code
+    def create(self, validated_data):
+        """
+        Создает операцию и ставит ее выполнение в очередь.
+        Args: validated_data (dict): Валидированные данные.
+        Returns: UserBulkJob: Созданная операция.
+        """
+        return bulk.create_job(
+            validated_data["operation"],
+            MyUser.objects.filter(pk__in=validated_data["ids"]),
+            created_by=self.context["request"].user,
+            role=validated_data["role"],
+        )
 
 
 class AuthOTPCodeSerializer(serializers.Serializer):
@@ -139,14 +364,52 @@ class AuthOTPCodeSerializer(serializers.Serializer):
     Сериализатор для проверки OTP-кода аутентификации.
     Attributes:
         - email (EmailField): Поле для адреса электронной почты пользователя.
+        - phone_number (NormalizedPhoneField): Номер телефона вместо email.
         - otp_code (IntegerField): Поле для OTP-кода, введенного пользователем.
     Meta: Класс метаданных для определения модели и полей сериализатора.
     """
 
-    email = serializers.EmailField()
+    email = NormalizedEmailField(required=False)
+    phone_number = NormalizedPhoneField(required=False, write_only=True)
     otp_code = serializers.IntegerField()
 
     class Meta:
         model = VerificationCode
         fields = ('otp_code', 'expiration', 'used')
-        read_only_fields = ('expiration', 'used')
\ No newline at end of file
+        read_only_fields = ('expiration', 'used')
+
+    def validate(self, data):
+        """
+        Определяет email пользователя по номеру телефона, если он передан
+        вместо email.
+        """
+        phone_number = data.pop('phone_number', None)
+        if phone_number:
+            data['email'] = _email_by_phone(
+                phone_number, "OTP-код неверен или срок его действия истек"
+            )
+        elif not data.get('email'):
+            raise serializers.ValidationError(
+                "Укажите электронную почту или номер телефона.")
+        return data
+
+
+def _get_language(context):
+    # Язык письма выбирается в запросе по заголовку Accept-Language
+    # (EmailTemplate.get_language): языки без шаблона, как и отсутствие
+    # заголовка, дают EMAIL_DEFAULT_LANGUAGE. В задачу передается только
+    # код языка, а не заголовок клиента.
+    request = context.get('request')
+    header = request.META.get('HTTP_ACCEPT_LANGUAGE') if request else None
+    return get_email_template(OTP_CODE_TEMPLATE).get_language(header)
+
+
+def _email_by_phone(phone_number, error):
+    # Номер уже в формате E.164: поиск - одно обращение к уникальному
+    # индексу phone_number.
+    email = MyUser.objects.filter(phone_number=phone_number).values_list(
+        'email', flat=True
+    ).first()
+    if email is None:
+        raise serializers.ValidationError(error)
+    return email
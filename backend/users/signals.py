@@ -0,0 +1,104 @@
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from users import bloom, stats
+from users.cache import invalidate_profile
+from users.events import record_event
+from users.models import AuthEvent, MyUser
+
+
+@receiver(post_save, sender=MyUser)
+@receiver(post_delete, sender=MyUser)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш профиля при любом сохранении или удалении пользователя,
+    в том числе из админки.
+    """
+    invalidate_profile(instance.pk)
+
+
+@receiver(post_init, sender=MyUser)
+def remember_stat_dimensions(sender, instance, **kwargs):
+    """
+    Запоминает измерения статистики загруженного пользователя, чтобы при
+    сохранении учесть только изменившиеся счетчики без запроса к БД.
+    Для пользователей, загруженных без нужных полей (only/defer),
+    измерения не запоминаются: их изменения исправит сверка.
+    """
+    if stats.DIMENSION_FIELDS & instance.get_deferred_fields():
+        instance._stat_dimensions = None
+    else:
+        instance._stat_dimensions = stats.get_dimensions(instance)
+
+
+@receiver(post_save, sender=MyUser)
+def count_saved_user(sender, instance, created, **kwargs):
+    """
+    Обновляет счетчики статистики при создании и изменении пользователя.
+    """
+    old = None if created else instance._stat_dimensions
+    if created or old is not None:
+        new = stats.get_dimensions(instance)
+        stats.record_change(old, new)
+        instance._stat_dimensions = new
+
+
+@receiver(post_delete, sender=MyUser)
+def count_deleted_user(sender, instance, **kwargs):
+    """
+    Обновляет счетчики статистики при удалении пользователя.
+    """
+    old = instance._stat_dimensions or stats.get_dimensions(instance)
+    stats.record_change(old, None)
+
+
+@receiver(user_logged_in)
+def log_login(sender, request, user, **kwargs):
+    """
+    Записывает в журнал аутентификации вход по паролю (получение токена
+    через Djoser, вход в админку).
+    """
+    record_event(AuthEvent.LOGIN, request=request, user=user)
+
+
+@receiver(user_login_failed)
+def log_login_failed(sender, credentials, request=None, **kwargs):
+    """
+    Записывает в журнал аутентификации неудачную попытку входа по паролю.
+    """
+    email = credentials.get("email") or credentials.get("username") or ""
+    record_event(AuthEvent.LOGIN_FAILED, request=request, email=email)
+
+
+@receiver(post_init, sender=MyUser)
+def remember_email(sender, instance, **kwargs):
+    """
+    Запоминает email загруженного пользователя, чтобы при сохранении
+    добавить в фильтр Блума только новый адрес.
+    """
+    if "email" in instance.get_deferred_fields():
+        instance._bloom_email = None
+    else:
+        instance._bloom_email = instance.email
+
+
+@receiver(post_save, sender=MyUser)
+def add_email_to_bloom(sender, instance, created, **kwargs):
+    """
+    Добавляет email нового пользователя или новый email существующего
+    в фильтр Блума после фиксации транзакции.
+    """
+    if created or instance._bloom_email != instance.email:
+        email, user_id = instance.email, instance.pk
+        transaction.on_commit(lambda: bloom.add(email, user_id))
+        instance._bloom_email = email
+
+
+@receiver(post_delete, sender=MyUser)
+def count_deleted_email(sender, instance, **kwargs):
+    """
+    Учитывает удаленный email в показателях заполненности фильтра Блума.
+    """
+    transaction.on_commit(lambda: bloom.remove(instance.email))
@@ -0,0 +1,213 @@
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django_redis import get_redis_connection
+from redis.exceptions import ResponseError
+
+from core import metrics
+from core.locks import redis_lock
+from users.activity import active_users
+from users.models import MyUser, UserStatistic
+
+logger = logging.getLogger(__name__)
+
+# Накопленные, но еще не записанные в БД изменения счетчиков:
+# хэш "измерение:значение" -> приращение.
+PENDING_KEY = "users:stats:pending"
+# Изменения, которые сейчас записываются в БД.
+FLUSHING_KEY = "users:stats:flushing"
+# Блокировка сброса и сверки: пересекающиеся запуски применили бы одни
+# и те же изменения дважды.
+LOCK_KEY = "users:stats:lock"
+LOCK_TIMEOUT = 600
+
+DIMENSIONS = ("role", "sex", "is_active", "signup_day")
+# Поля пользователя, от которых зависят измерения.
+DIMENSION_FIELDS = {"role", "sex", "is_active", "date_joined"}
+
+
+def get_dimensions(user):
+    """
+    Возвращает значения измерений статистики для пользователя.
+    Args:
+        user (MyUser): Пользователь.
+    Returns:
+        tuple: Пары (измерение, значение).
+    """
+    return (
+        ("role", user.role or ""),
+        ("sex", user.sex or ""),
+        ("is_active", "true" if user.is_active else "false"),
+        ("signup_day", _signup_day(user.date_joined)),
+    )
+
+
+def record_change(old, new):
+    """
+    Ставит в буфер Redis изменения счетчиков при переходе пользователя
+    из состояния old в состояние new. Запись выполняется после фиксации
+    транзакции, чтобы откаченные изменения не попадали в статистику.
+    Args:
+        old (tuple | None): Измерения до изменения (None для нового).
+        new (tuple | None): Измерения после изменения (None при удалении).
+    """
+    delta = Counter()
+    delta.update(f"{dimension}:{value}" for dimension, value in new or ())
+    delta.subtract(f"{dimension}:{value}" for dimension, value in old or ())
+    delta = {field: amount for field, amount in delta.items() if amount}
+    if delta:
+        transaction.on_commit(lambda: _push(delta))
+
+
+def flush():
+    """
+    Переносит накопленные в Redis изменения в таблицу UserStatistic
+    одним запросом INSERT ... ON CONFLICT DO UPDATE. Если сброс или сверка
+    уже выполняются, запуск пропускается.
+    Returns:
+        int | None: Количество обновленных счетчиков или None, если
+        запуск пропущен.
+    """
+    redis = get_redis_connection("default")
+    with redis_lock(redis, LOCK_KEY, LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            return None
+        return _flush(redis)
+
+
+def _flush(redis):
+    # Изменения, оставшиеся от прерванного сброса, записываются первыми.
+    if not redis.exists(FLUSHING_KEY):
+        try:
+            redis.rename(PENDING_KEY, FLUSHING_KEY)
+        except ResponseError:
+            # Накопленных изменений нет.
+            return 0
+    pending = redis.hgetall(FLUSHING_KEY)
+    rows = []
+    for field, amount in pending.items():
+        dimension, value = field.decode().split(":", 1)
+        if int(amount):
+            rows.append((dimension, value, int(amount)))
+    if rows:
+        _apply(rows)
+    redis.delete(FLUSHING_KEY)
+    metrics.incr("user_stats.flushed", len(rows))
+    return len(rows)
+
+
+def reconcile():
+    """
+    Пересчитывает счетчики по таблице пользователей и заменяет ими
+    накопленные значения. Исправляет расхождения от bulk-операций,
+    не вызывающих сигналы, и от изменений, потерянных при недоступности
+    Redis. Накопленные изменения предварительно сбрасываются в БД;
+    изменения, попавшие в буфер во время пересчета, могут учесться дважды
+    до следующей сверки. Если сброс или сверка уже выполняются, запуск
+    пропускается.
+    Returns:
+        int | None: Количество счетчиков после сверки или None, если
+        запуск пропущен.
+    """
+    redis = get_redis_connection("default")
+    with redis_lock(redis, LOCK_KEY, LOCK_TIMEOUT) as acquired:
+        if not acquired:
+            return None
+        _flush(redis)
+        return _reconcile()
+
+
+def _reconcile():
+    counts = []
+    users = MyUser.objects.order_by()
+    for dimension in ("role", "sex", "is_active"):
+        for value, count in users.values_list(dimension).annotate(
+            count=Count("id")
+        ):
+            counts.append(
+                UserStatistic(
+                    dimension=dimension,
+                    value=_format_value(dimension, value),
+                    count=count,
+                )
+            )
+    for day, count in users.values_list(
+        TruncDate("date_joined")
+    ).annotate(count=Count("id")):
+        counts.append(
+            UserStatistic(
+                dimension="signup_day", value=day.isoformat(), count=count
+            )
+        )
+    with transaction.atomic():
+        UserStatistic.objects.all().delete()
+        UserStatistic.objects.bulk_create(counts)
+    metrics.incr("user_stats.reconciled")
+    return len(counts)
+
+
+def get_stats(days=30):
+    """
+    Возвращает счетчики пользователей из таблицы UserStatistic. Размер
+    ответа не зависит от количества пользователей: регистрации отдаются
+    только за последние days дней.
+    Args:
+        days (int): Количество дней статистики регистраций.
+    Returns:
+        dict: Общее количество, счетчики по измерениям и количество
+        активных пользователей за день и месяц.
+    """
+    since = _signup_day(timezone.now() - timedelta(days=days - 1))
+    stats = {dimension: {} for dimension in DIMENSIONS}
+    rows = UserStatistic.objects.exclude(
+        dimension="signup_day", value__lt=since
+    ).values_list("dimension", "value", "count")
+    for dimension, value, count in rows:
+        if count and dimension in stats:
+            stats[dimension][value] = count
+    stats["total"] = sum(stats["is_active"].values())
+    stats["active"] = active_users()
+    return stats
+
+
+def _push(delta):
+    try:
+        redis = get_redis_connection("default")
+        with redis.pipeline(transaction=False) as pipeline:
+            for field, amount in delta.items():
+                pipeline.hincrby(PENDING_KEY, field, amount)
+            pipeline.execute()
+    except Exception as error:
+        # Расхождение исправит сверка reconcile_user_stats.
+        metrics.incr("user_stats.push_errors")
+        logger.warning(f"Изменение статистики пользователей потеряно: {error}")
+
+
+def _apply(rows):
+    table = UserStatistic._meta.db_table
+    placeholders = ", ".join(["(%s, %s, %s)"] * len(rows))
+    params = [param for row in rows for param in row]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (dimension, value, count) "
+                f"VALUES {placeholders} "
+                f"ON CONFLICT (dimension, value) "
+                f"DO UPDATE SET count = {table}.count + EXCLUDED.count",
+                params,
+            )
+
+
+def _format_value(dimension, value):
+    if dimension == "is_active":
+        return "true" if value else "false"
+    return value or ""
+
+
+def _signup_day(date_joined):
+    return timezone.localdate(date_joined).isoformat()
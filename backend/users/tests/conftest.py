@@ -0,0 +1,37 @@
+import pytest
+from rest_framework.test import APIClient
+
+from users.models import MyUser
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def make_user(db, redis):
+    """
+    Создает пользователя через ORM (с сигналами статистики, кэша
+    профиля и фильтра Блума).
+    """
+
+    def make(email="user@example.com", **fields):
+        fields.setdefault("first_name", "Иван")
+        fields.setdefault("last_name", "Иванов")
+        return MyUser.objects.create(email=email, **fields)
+
+    return make
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def staff(make_user):
+    return make_user(
+        "admin@example.com", is_staff=True, is_superuser=True,
+        role=MyUser.ADMIN,
+    )
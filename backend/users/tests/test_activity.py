@@ -0,0 +1,44 @@
+import pytest
+
+from users import activity
+from users.models import MyUser
+
+
+@pytest.fixture(autouse=True)
+def clear_touched():
+    activity._touched.clear()
+    yield
+    activity._touched.clear()
+
+
+def test_touch_and_flush_store_last_seen(user, redis):
+    activity.touch(user.pk)
+    activity.touch(user.pk)
+    assert redis.zcard(activity.PENDING_KEY) == 1
+    assert activity.active_users() == {"dau": 1, "mau": 1}
+
+    assert activity.flush() == 1
+    user.refresh_from_db()
+    assert user.last_seen is not None
+    assert not redis.exists(activity.PENDING_KEY, activity.FLUSHING_KEY)
+
+
+def test_stale_instance_keeps_last_seen(user, redis):
+    stale = MyUser.objects.get(pk=user.pk)
+    activity.touch(user.pk)
+    activity.flush()
+
+    stale.first_name = "Петр"
+    stale.save()
+    user.refresh_from_db()
+    assert user.first_name == "Петр"
+    assert user.last_seen is not None
+
+
+def test_flush_does_not_move_last_seen_back(user, redis):
+    redis.zadd(activity.PENDING_KEY, {user.pk: 2_000_000_000})
+    activity.flush()
+    redis.zadd(activity.PENDING_KEY, {user.pk: 1_000_000_000})
+    assert activity.flush() == 0
+    user.refresh_from_db()
+    assert user.last_seen.timestamp() == 2_000_000_000
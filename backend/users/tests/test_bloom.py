@@ -0,0 +1,65 @@
+from unittest import mock
+
+from users import bloom
+from users.models import MyUser
+
+
+def test_filter_not_built_allows_everything(db, redis):
+    assert bloom.might_contain("anyone@example.com") is True
+
+
+def test_rebuild_and_add(make_user, redis):
+    make_user("a@example.com")
+    params = bloom.rebuild(capacity=1000, error_rate=1e-6)
+    assert params["count"] == 1
+    assert not redis.exists(bloom.ADDED_KEY)
+
+    assert bloom.might_contain("a@example.com") is True
+    assert bloom.might_contain("missing@example.com") is False
+    bloom.add("b@example.com", 1000)
+    assert bloom.might_contain("b@example.com") is True
+    assert int(redis.hget(bloom.PARAMS_KEY, "count")) == 2
+    assert int(redis.hget(bloom.PARAMS_KEY, "max_id")) == 1000
+
+
+def test_email_added_during_rebuild_is_kept(make_user, redis):
+    make_user("a@example.com")
+    hashes = bloom._hashes
+
+    def add_during_build(email):
+        if email == "a@example.com" and not redis.exists(bloom.BITMAP_KEY):
+            # Пользователь создан после того, как построение прочитало
+            # адреса из БД.
+            bloom.add("late@example.com", 1000)
+        return hashes(email)
+
+    with mock.patch.object(bloom, "_hashes", side_effect=add_during_build):
+        bloom.rebuild(capacity=1000, error_rate=1e-6)
+    assert bloom.might_contain("late@example.com") is True
+    assert bloom.might_contain("missing@example.com") is False
+    assert int(redis.hget(bloom.PARAMS_KEY, "max_id")) == 1000
+
+
+def test_failed_add_disables_filter(make_user, redis):
+    make_user("a@example.com")
+    bloom.rebuild(capacity=1000, error_rate=1e-6)
+    with mock.patch.object(redis, "eval", side_effect=ConnectionError):
+        bloom.add("b@example.com", 1000)
+    assert not redis.exists(bloom.PARAMS_KEY)
+    assert bloom.might_contain("b@example.com") is True
+    assert bloom.rebuild_if_saturated() is True
+    assert bloom.might_contain("b@example.com") is False
+
+
+def test_users_created_without_signals_trigger_rebuild(
+    make_user, redis, django_capture_on_commit_callbacks
+):
+    make_user("a@example.com")
+    bloom.rebuild(capacity=1000, error_rate=1e-6)
+    with django_capture_on_commit_callbacks(execute=True):
+        make_user("b@example.com")
+    assert bloom.rebuild_if_saturated() is False
+
+    MyUser.objects.bulk_create([MyUser(email="c@example.com")])
+    assert bloom.rebuild_if_saturated() is True
+    assert bloom.might_contain("c@example.com") is True
@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from users import bulk
+from users.models import MyUser, UserBulkJob
+
+
+@pytest.fixture
+def users(make_user):
+    return [make_user(f"user{number}@example.com") for number in range(5)]
+
+
+@pytest.fixture
+def job(users, settings, django_capture_on_commit_callbacks):
+    # Каждая задача обрабатывает одну пачку из двух пользователей.
+    settings.USER_BULK_JOB_BATCH_SIZE = 2
+    settings.USER_BULK_JOB_CHUNK_TIME = 0
+    with django_capture_on_commit_callbacks():
+        return bulk.create_job(
+            UserBulkJob.DEACTIVATE,
+            MyUser.objects.filter(pk__in=[user.pk for user in users]),
+        )
+
+
+def inactive():
+    return MyUser.objects.filter(is_active=False).count()
+
+
+def test_to_ranges():
+    assert bulk.to_ranges([5, 1, 2, 3, 7, 8, 2]) == [[1, 3], [5, 5], [7, 8]]
+
+
+def test_job_runs_in_chunks(job):
+    assert job.total == 5
+    assert bulk.run_job(job.pk) is True
+    assert inactive() == 2
+    assert bulk.run_job(job.pk) is True
+    assert bulk.run_job(job.pk) is False
+
+    job.refresh_from_db()
+    assert job.status == UserBulkJob.DONE
+    assert job.processed == 5
+    assert inactive() == 5
+
+
+def test_cancel_stops_after_batch(job):
+    bulk.run_job(job.pk)
+    assert bulk.cancel_job(job) is True
+    assert bulk.run_job(job.pk) is False
+
+    job.refresh_from_db()
+    assert job.status == UserBulkJob.CANCELLED
+    assert job.processed == 2
+    assert bulk.cancel_job(job) is False
+
+
+def test_resume_continues_from_cursor(job, django_capture_on_commit_callbacks):
+    bulk.run_job(job.pk)
+    bulk.cancel_job(job)
+    with django_capture_on_commit_callbacks() as callbacks:
+        assert bulk.resume_job(job) is True
+    assert len(callbacks) == 1
+
+    # Задача прежнего запуска останавливается, не обрабатывая пачек.
+    assert bulk.run_job(job.pk, 0) is False
+    assert inactive() == 2
+    while bulk.run_job(job.pk, 1):
+        pass
+    job.refresh_from_db()
+    assert job.status == UserBulkJob.DONE
+    assert job.processed == 5
+
+
+def test_resume_stale_running_job(job, settings):
+    settings.USER_BULK_JOB_STALE_TIME = 60
+    bulk.run_job(job.pk)
+    assert bulk.resume_job(job) is False
+
+    UserBulkJob.objects.filter(pk=job.pk).update(
+        updated_at=timezone.now() - timedelta(seconds=120)
+    )
+    assert bulk.resume_job(job) is True
+    job.refresh_from_db()
+    assert job.status == UserBulkJob.PENDING
+    assert job.generation == 1
+
+
+def test_bulk_jobs_api(
+    api_client, staff, users, django_capture_on_commit_callbacks
+):
+    api_client.force_authenticate(staff)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(
+            "/api/v1/users/bulk_jobs/",
+            {"operation": "set_role", "role": MyUser.ADMIN,
+             "ids": [user.pk for user in users]},
+            format="json",
+        )
+    assert response.status_code == 202
+    assert MyUser.objects.filter(role=MyUser.ADMIN).count() == 6
+
+    response = api_client.get(f"/api/v1/users/bulk_jobs/{response.data['id']}/")
+    assert response.data["status"] == UserBulkJob.DONE
+    response = api_client.get("/api/v1/users/bulk_jobs/")
+    assert len(response.data) == 1
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.utils import timezone
+
+from users.models import VerificationCode
+
+
+def test_bulk_create_issues_codes(db):
+    codes = VerificationCode.objects.bulk_create_otp_codes(
+        ["a@example.com", "b@example.com", "c@example.com"], batch_size=2
+    )
+    assert set(codes) == {"a@example.com", "b@example.com", "c@example.com"}
+    assert all(code.pk for code in codes.values())
+    assert VerificationCode.objects.count() == 3
+
+
+def test_bulk_create_keeps_active_code(db):
+    active = VerificationCode.objects.create(
+        email="a@example.com", otp_code=123456,
+        expiration=timezone.now() + timedelta(minutes=5),
+    )
+    codes = VerificationCode.objects.bulk_create_otp_codes(["a@example.com"])
+    assert codes["a@example.com"].pk == active.pk
+    active.refresh_from_db()
+    assert active.otp_code == 123456
+    assert active.expiration > timezone.now() + timedelta(minutes=5)
+
+
+def test_bulk_create_replaces_used_code(db):
+    VerificationCode.objects.create(
+        email="a@example.com", otp_code=123456, used=True,
+        expiration=timezone.now() + timedelta(minutes=5),
+    )
+    codes = VerificationCode.objects.bulk_create_otp_codes(["a@example.com"])
+    assert codes["a@example.com"].used is False
+    assert VerificationCode.objects.count() == 1
+
+
+def test_bulk_endpoint_sends_and_reports_progress(
+    api_client, staff, make_user, settings
+):
+    settings.BULK_OTP_EMAIL_CHUNK_SIZE = 1
+    make_user("a@example.com")
+    make_user("b@example.com")
+    api_client.force_authenticate(staff)
+
+    response = api_client.post(
+        "/api/v1/users/bulk_verification_code/",
+        {"emails": ["A@example.com", "b@example.com", "missing@example.com",
+                    "a@example.com"]},
+        format="json",
+    )
+    assert response.status_code == 202
+    assert response.data["total"] == 2
+    assert response.data["not_found"] == ["missing@example.com"]
+    assert sorted(message.to[0] for message in mail.outbox) == [
+        "a@example.com", "b@example.com"
+    ]
+
+    response = api_client.get(
+        f"/api/v1/users/bulk_verification_code/{response.data['job_id']}/"
+    )
+    assert response.status_code == 200
+    assert response.data["sent"] == 2
+    assert response.data["failed"] == 0
+    assert response.data["done"] is True
+
+
+def test_bulk_endpoint_requires_admin(api_client, user):
+    api_client.force_authenticate(user)
+    response = api_client.post(
+        "/api/v1/users/bulk_verification_code/",
+        {"emails": ["user@example.com"]}, format="json",
+    )
+    assert response.status_code == 403
+
+
+def test_unknown_job_not_found(api_client, staff):
+    api_client.force_authenticate(staff)
+    response = api_client.get(f"/api/v1/users/bulk_verification_code/{'0' * 32}/")
+    assert response.status_code == 404
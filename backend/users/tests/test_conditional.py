@@ -0,0 +1,32 @@
+def test_etag_not_modified(api_client, user):
+    api_client.force_authenticate(user)
+    response = api_client.get("/api/v1/users/me/")
+    etag = response["ETag"]
+    assert response["Last-Modified"]
+
+    response = api_client.get("/api/v1/users/me/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    response = api_client.get(f"/api/v1/users/{user.pk}/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+def test_if_match_rejects_stale_update(api_client, user):
+    api_client.force_authenticate(user)
+    response = api_client.patch(
+        "/api/v1/users/me/", {"first_name": "Петр"}, HTTP_IF_MATCH='"stale"'
+    )
+    assert response.status_code == 412
+
+
+def test_etag_changes_after_update(api_client, user):
+    api_client.force_authenticate(user)
+    etag = api_client.get("/api/v1/users/me/")["ETag"]
+    response = api_client.patch(
+        "/api/v1/users/me/", {"first_name": "Петр"}, HTTP_IF_MATCH=etag
+    )
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    user.refresh_from_db()
+    api_client.force_authenticate(user)
+    response = api_client.get("/api/v1/users/me/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
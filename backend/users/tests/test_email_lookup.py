@@ -0,0 +1,43 @@
+import pytest
+from django.db import IntegrityError, transaction
+
+from users.models import MyUser, VerificationCode
+
+
+def test_email_stored_lowercase(make_user):
+    user = make_user(" Mixed.Case@Example.COM ")
+    user.refresh_from_db()
+    assert user.email == "mixed.case@example.com"
+
+
+def test_natural_key_ignores_case(user):
+    assert MyUser.objects.get_by_natural_key("USER@Example.com") == user
+
+
+def test_lower_unique_constraint(user):
+    # Запись в обход save() проверяет уникальный индекс по LOWER(email).
+    with pytest.raises(IntegrityError), transaction.atomic():
+        MyUser.objects.bulk_create(
+            [MyUser(email="USER@example.com", first_name="a", last_name="b")]
+        )
+
+
+def test_otp_login_ignores_case(api_client, user):
+    response = api_client.post(
+        "/api/v1/users/verification_code/", {"email": "User@Example.com"}
+    )
+    assert response.status_code == 201
+    code = VerificationCode.objects.get(email__lower="user@example.com")
+
+    response = api_client.post(
+        "/api/v1/users/auth_otp_code/",
+        {"email": "USER@example.COM", "otp_code": code.otp_code},
+    )
+    assert response.status_code == 200
+    assert response.data["auth_token"]
+
+
+def test_repeated_request_reuses_code(api_client, user):
+    api_client.post("/api/v1/users/verification_code/", {"email": "user@example.com"})
+    api_client.post("/api/v1/users/verification_code/", {"email": "USER@example.com"})
+    assert VerificationCode.objects.filter(email__lower="user@example.com").count() == 1
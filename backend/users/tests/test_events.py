@@ -0,0 +1,59 @@
+from unittest import mock
+
+from users import events
+from users.models import AuthEvent
+
+
+def test_flush_moves_events_to_journal(user, redis):
+    for _ in range(3):
+        events.record_event(AuthEvent.OTP_REQUESTED, user=user)
+    assert redis.xlen(events.STREAM_KEY) == 3
+
+    assert events.flush_events(batch_size=2) == 3
+    assert AuthEvent.objects.filter(user_id=user.pk, email=user.email).count() == 3
+    assert redis.xlen(events.STREAM_KEY) == 0
+    assert not redis.exists(events.FLUSH_LOCK_KEY)
+
+
+def test_flush_skipped_while_locked(user, redis):
+    events.record_event(AuthEvent.OTP_REQUESTED, user=user)
+    redis.set(events.FLUSH_LOCK_KEY, 1)
+
+    assert events.flush_events() is None
+    assert redis.xlen(events.STREAM_KEY) == 1
+    assert not AuthEvent.objects.exists()
+
+
+def test_event_written_directly_without_redis(user):
+    with mock.patch.object(
+        events, "get_redis_connection", side_effect=ConnectionError
+    ):
+        events.record_event(AuthEvent.OTP_REQUESTED, email="x@example.com")
+    assert AuthEvent.objects.filter(email="x@example.com").exists()
+
+
+def test_long_email_and_bad_ip_are_sanitized(db, redis, rf):
+    request = rf.post("/", REMOTE_ADDR="unknown", HTTP_X_REAL_IP="")
+    events.record_event(AuthEvent.LOGIN_FAILED, request=request, email="a" * 1000)
+
+    assert events.flush_events() == 1
+    event = AuthEvent.objects.get()
+    assert len(event.email) == 254
+    assert event.ip_address is None
+
+
+def test_bad_event_does_not_block_flush(user, redis):
+    events.record_event(AuthEvent.OTP_REQUESTED, user=user)
+    redis.xadd(events.STREAM_KEY, {
+        "event_type": AuthEvent.LOGIN_FAILED,
+        "email": "a" * 1000,
+        "user_id": "",
+        "ip_address": "",
+        "user_agent": "",
+        "created_at": "2024-01-01T00:00:00+00:00",
+    })
+    events.record_event(AuthEvent.OTP_REQUESTED, user=user)
+
+    assert events.flush_events() == 2
+    assert AuthEvent.objects.filter(user_id=user.pk).count() == 2
+    assert redis.xlen(events.STREAM_KEY) == 0
@@ -0,0 +1,33 @@
+from unittest import mock
+
+import pytest
+from django.core import mail
+
+from api.v1.task import send_template_emails
+
+
+@pytest.mark.parametrize(
+    "accept_language, subject",
+    [
+        ("en-US,en;q=0.9", "InTimeBioTech: OTP code"),
+        ("de", "InTimeBioTech: OTP-код"),
+        (None, "InTimeBioTech: OTP-код"),
+    ],
+)
+def test_otp_email_language(api_client, user, settings, accept_language, subject):
+    settings.EMAIL_DEFAULT_LANGUAGE = "ru"
+    headers = {"HTTP_ACCEPT_LANGUAGE": accept_language} if accept_language else {}
+    api_client.post(
+        "/api/v1/users/verification_code/", {"email": user.email}, **headers
+    )
+    assert [message.subject for message in mail.outbox] == [subject]
+
+
+def test_task_receives_language_code(api_client, user):
+    header = "en-US,en;q=0.9," + ",".join(["xx"] * 100)
+    with mock.patch.object(send_template_emails, "delay") as delay:
+        api_client.post(
+            "/api/v1/users/verification_code/", {"email": user.email},
+            HTTP_ACCEPT_LANGUAGE=header,
+        )
+    assert delay.call_args.args[2] == "en"
@@ -0,0 +1,58 @@
+import pytest
+
+from users.models import MyUser, VerificationCode
+from users.serializers import CustomUserSerializer
+
+
+@pytest.fixture
+def phone_user(make_user):
+    return make_user(phone_number="8 (999) 123-45-67")
+
+
+def test_phone_stored_in_e164(phone_user):
+    phone_user.refresh_from_db()
+    assert phone_user.phone_number == "+79991234567"
+
+
+def test_get_by_phone(phone_user):
+    assert MyUser.objects.get_by_phone("+7 999 123-45-67") == phone_user
+    with pytest.raises(MyUser.DoesNotExist):
+        MyUser.objects.get_by_phone("")
+
+
+def test_serializer_rejects_same_number_in_other_format(phone_user):
+    serializer = CustomUserSerializer(
+        data={
+            "email": "other@example.com", "password": "Secret-pass-123",
+            "first_name": "a", "last_name": "b",
+            "phone_number": "9991234567",
+        }
+    )
+    assert not serializer.is_valid()
+    assert "phone_number" in serializer.errors
+
+
+def test_otp_login_by_phone(api_client, phone_user):
+    response = api_client.post(
+        "/api/v1/users/verification_code/", {"phone_number": "89991234567"}
+    )
+    assert response.status_code == 201
+    # Адрес пользователя не раскрывается тому, кто знает только номер.
+    assert "email" not in response.data
+    # Код приходит только на почту: одного номера для входа недостаточно.
+    assert "otp_code" not in response.data
+    code = VerificationCode.objects.get(email=phone_user.email)
+
+    response = api_client.post(
+        "/api/v1/users/auth_otp_code/",
+        {"phone_number": "+7 999 123 45 67", "otp_code": code.otp_code},
+    )
+    assert response.status_code == 200
+    assert response.data["auth_token"]
+
+
+def test_otp_unknown_phone(api_client, phone_user):
+    response = api_client.post(
+        "/api/v1/users/verification_code/", {"phone_number": "+79990000000"}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,54 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core import metrics
+from users.cache import PROFILE_KEY, get_profile
+
+
+def me(api_client, user):
+    api_client.force_authenticate(user)
+    return api_client.get("/api/v1/users/me/")
+
+
+def test_profile_served_from_cache(api_client, user):
+    first = me(api_client, user)
+    with CaptureQueriesContext(connection) as queries:
+        second = me(api_client, user)
+    assert first.status_code == second.status_code == 200
+    assert second.data == first.data
+    assert not any("users_myuser" in query["sql"] for query in queries)
+
+
+def test_patch_updates_cached_profile(api_client, user):
+    me(api_client, user)
+    response = api_client.patch("/api/v1/users/me/", {"first_name": "Петр"})
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert me(api_client, user).data["first_name"] == "Петр"
+
+
+def test_save_invalidates_profile(api_client, user, redis):
+    me(api_client, user)
+    user.last_name = "Петров"
+    user.save()
+    assert me(api_client, user).data["last_name"] == "Петров"
+
+
+def test_single_build_on_miss(redis):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"id": 1}
+
+    assert get_profile(1, build) == {"id": 1}
+    assert get_profile(1, build) == {"id": 1}
+    assert len(calls) == 1
+    assert metrics.snapshot_counters("profile_cache.hits")
+
+
+def test_missing_lock_owner_falls_back_to_build(redis, settings):
+    from django.core.cache import cache
+
+    cache.add(PROFILE_KEY.format(user_id=2) + ":lock", 1, 10)
+    assert get_profile(2, lambda: {"id": 2}) == {"id": 2}
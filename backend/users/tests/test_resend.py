@@ -0,0 +1,64 @@
+import pytest
+from django.core import mail
+from drf_spectacular.generators import SchemaGenerator
+
+from users import resend
+from users.models import VerificationCode
+
+URL = "/api/v1/users/verification_code/"
+
+
+@pytest.fixture(autouse=True)
+def cooldown(settings):
+    settings.OTP_RESEND_COOLDOWN = 60
+
+
+def test_repeated_request_suppressed(api_client, user):
+    first = api_client.post(URL, {"email": user.email})
+    second = api_client.post(URL, {"email": user.email})
+    assert first.status_code == second.status_code == 201
+    assert first.data["resend_cooldown"] == 60
+    assert 0 < second.data["resend_cooldown"] <= 60
+    assert len(mail.outbox) == 1
+
+
+def test_failed_delivery_releases_window(api_client, user, redis, monkeypatch):
+    monkeypatch.setattr(
+        "django.core.mail.backends.locmem.EmailBackend.send_messages",
+        lambda self, messages: 0,
+    )
+    api_client.post(URL, {"email": user.email})
+    assert not redis.exists(resend.RESEND_KEY.format(email=user.email))
+
+    monkeypatch.undo()
+    api_client.post(URL, {"email": user.email})
+    assert len(mail.outbox) == 1
+
+
+def test_release_keeps_window_of_newer_code(user, redis):
+    code = VerificationCode.objects.create_otp_code(user.email)
+    resend.reserve(user.email, code.pk + 1)
+    assert resend.release_codes([code.pk]) == 0
+    assert redis.exists(resend.RESEND_KEY.format(email=user.email))
+
+    resend.reserve(user.email, code.pk)
+    assert resend.release_codes([code.pk]) == 1
+    assert not redis.exists(resend.RESEND_KEY.format(email=user.email))
+
+
+def test_resend_cooldown_in_schema():
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    field = schema["components"]["schemas"]["VerificationCode"]["properties"][
+        "resend_cooldown"
+    ]
+    assert field == {"type": "integer", "readOnly": True}
+
+
+def test_failed_enqueue_keeps_window_of_newer_code(user, redis):
+    code = VerificationCode.objects.create_otp_code(user.email)
+    resend.reserve(user.email, code.pk + 1)
+    resend.release(user.email, code.pk)
+    assert redis.exists(resend.RESEND_KEY.format(email=user.email))
+
+    resend.release(user.email, code.pk + 1)
+    assert not redis.exists(resend.RESEND_KEY.format(email=user.email))
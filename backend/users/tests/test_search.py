@@ -0,0 +1,51 @@
+from unittest import mock
+
+from core.paginators import ESTIMATED_COUNT_THRESHOLD, EstimatedCountPaginator
+from users.filters import search_users
+from users.models import MyUser
+
+
+def test_every_word_must_match(make_user):
+    ivan = make_user("ivan@example.com", first_name="Ivan", last_name="Petrov")
+    make_user("petr@example.com", first_name="Petr", last_name="Ivanov")
+    found = search_users(MyUser.objects.all(), "ivan PETROV")
+    assert list(found) == [ivan]
+
+
+def test_search_by_role(make_user, staff):
+    make_user()
+    assert list(search_users(MyUser.objects.all(), "admin")) == [staff]
+
+
+def test_search_by_phone(make_user):
+    user = make_user(phone_number="+79991234567")
+    make_user("other@example.com")
+    found = search_users(MyUser.objects.all(), "8 (999) 123-45-67")
+    assert list(found) == [user]
+
+
+def test_admin_search_api(api_client, staff, make_user):
+    make_user("needle@example.com")
+    api_client.force_authenticate(staff)
+    response = api_client.get("/api/v1/users/", {"search": "NEEDLE"})
+    assert response.status_code == 200
+    assert [row["email"] for row in response.data] == ["needle@example.com"]
+
+
+def test_estimated_count_for_unfiltered_queryset(make_user):
+    make_user()
+    with mock.patch(
+        "core.paginators.estimate_count",
+        return_value=ESTIMATED_COUNT_THRESHOLD * 2,
+    ):
+        assert EstimatedCountPaginator(MyUser.objects.order_by("pk"), 10).count == (
+            ESTIMATED_COUNT_THRESHOLD * 2
+        )
+        filtered = MyUser.objects.filter(is_active=True).order_by("pk")
+        assert EstimatedCountPaginator(filtered, 10).count == 1
+
+
+def test_exact_count_for_small_tables(make_user):
+    make_user()
+    with mock.patch("core.paginators.estimate_count", return_value=5):
+        assert EstimatedCountPaginator(MyUser.objects.order_by("pk"), 10).count == 1
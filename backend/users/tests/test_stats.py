@@ -0,0 +1,63 @@
+from users import stats
+from users.models import MyUser, UserStatistic
+
+
+def counts(dimension):
+    return dict(
+        UserStatistic.objects.filter(dimension=dimension)
+        .exclude(count=0).values_list("value", "count")
+    )
+
+
+def test_flush_applies_pending_changes(
+    make_user, redis, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        make_user("a@example.com")
+        user = make_user("b@example.com")
+    with django_capture_on_commit_callbacks(execute=True):
+        user.is_active = False
+        user.save()
+
+    # role, sex, signup_day и оба значения is_active.
+    assert stats.flush() == 5
+    assert counts("is_active") == {"true": 1, "false": 1}
+    assert not redis.exists(stats.PENDING_KEY, stats.FLUSHING_KEY)
+    assert stats.flush() == 0
+
+
+def test_flush_skipped_while_locked(
+    make_user, redis, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        make_user()
+    redis.set(stats.LOCK_KEY, 1)
+
+    assert stats.flush() is None
+    assert stats.reconcile() is None
+    assert redis.exists(stats.PENDING_KEY)
+    assert not UserStatistic.objects.exists()
+
+
+def test_reconcile_fixes_bulk_changes(make_user, redis):
+    make_user()
+    # bulk_create не вызывает сигналы, изменение не попадает в буфер.
+    MyUser.objects.bulk_create(
+        [MyUser(email="bulk@example.com", first_name="a", last_name="b")]
+    )
+    UserStatistic.objects.create(dimension="is_active", value="true", count=7)
+
+    stats.reconcile()
+    assert counts("is_active") == {"true": 2}
+    assert not redis.exists(stats.LOCK_KEY)
+
+
+def test_expired_lock_of_next_run_is_kept(redis, monkeypatch):
+    def slow_flush(connection):
+        # Блокировка истекла, и ее получил следующий запуск.
+        redis.set(stats.LOCK_KEY, b"next-run")
+        return 0
+
+    monkeypatch.setattr(stats, "_flush", slow_flush)
+    assert stats.flush() == 0
+    assert redis.get(stats.LOCK_KEY) == b"next-run"
@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from users.models import AuthToken
+
+
+@pytest.fixture
+def password_user(make_user):
+    user = make_user()
+    user.set_password("Secret-pass-123")
+    user.save()
+    return user
+
+
+def login(api_client, **data):
+    return api_client.post(
+        "/api/v1/auth/token/login/",
+        {"email": "user@example.com", "password": "Secret-pass-123", **data},
+    )
+
+
+def test_login_issues_device_id(api_client, password_user):
+    response = login(api_client)
+    assert response.status_code == 200
+    device = response.data["device"]
+    assert len(device) == 32
+    assert AuthToken.objects.get(key=response.data["auth_token"]).device == device
+
+
+def test_same_device_rotates_token(api_client, password_user):
+    first = login(api_client).data
+    second = login(api_client, device=first["device"]).data
+    assert second["device"] == first["device"]
+    assert second["auth_token"] != first["auth_token"]
+    assert list(AuthToken.objects.values_list("key", flat=True)) == [
+        second["auth_token"]
+    ]
+
+
+def test_client_chosen_device_is_replaced(api_client, password_user):
+    response = login(api_client, device="My phone")
+    assert response.data["device"] != "My phone"
+    login(api_client, device="My phone")
+    assert AuthToken.objects.count() == 2
+
+
+def test_tokens_per_user_capped(password_user, monkeypatch):
+    # users.models читает настройки из модуля backend.settings.
+    monkeypatch.setattr("backend.settings.AUTH_TOKEN_MAX_PER_USER", 2)
+    tokens = [
+        AuthToken.objects.issue(password_user, device=f"{number:032x}")
+        for number in range(3)
+    ]
+    assert set(AuthToken.objects.values_list("key", flat=True)) == {
+        tokens[1].key, tokens[2].key
+    }
+
+
+def test_expired_token_rejected(api_client, password_user):
+    token = AuthToken.objects.issue(password_user, device="0" * 32)
+    AuthToken.objects.filter(pk=token.pk).update(expires_at=timezone.now())
+    api_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    assert api_client.get("/api/v1/users/me/").status_code == 401
+
+
+def test_token_refreshed_on_use(api_client, password_user, settings):
+    token = AuthToken.objects.issue(password_user, device="0" * 32)
+    expires_at = timezone.now() + timedelta(
+        seconds=settings.AUTH_TOKEN_TTL - 2 * settings.AUTH_TOKEN_REFRESH_INTERVAL
+    )
+    AuthToken.objects.filter(pk=token.pk).update(expires_at=expires_at)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    assert api_client.get("/api/v1/users/me/").status_code == 200
+    token.refresh_from_db()
+    assert token.expires_at > expires_at
+
+
+def test_logout_deletes_current_device_only(api_client, password_user):
+    current = AuthToken.objects.issue(password_user, device="0" * 32)
+    other = AuthToken.objects.issue(password_user, device="1" * 32)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Token {current.key}")
+    assert api_client.post("/api/v1/auth/token/logout/").status_code == 204
+    assert list(AuthToken.objects.values_list("pk", flat=True)) == [other.pk]
+
+
+def test_delete_expired(password_user):
+    for number in range(3):
+        AuthToken.objects.issue(password_user, device=f"{number:032x}")
+    AuthToken.objects.filter(device=f"{0:032x}").update(
+        expires_at=timezone.now() - timedelta(seconds=1)
+    )
+    assert AuthToken.objects.delete_expired(batch_size=1) == 1
+    assert AuthToken.objects.count() == 2
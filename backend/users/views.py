@@ -1,23 +1,34 @@
 from typing import Tuple
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from drf_spectacular.utils import extend_schema_view
-from rest_framework.authtoken.models import Token
+from django.contrib.auth import user_logged_in, user_logged_out
+from djoser import views as djoser_views
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser, AllowAny
 
-from users.models import MyUser, VerificationCode
-from users.schemas import COLLECT_SCHEMA
+from core.jobs import get_job
+from users import bulk
+from users.authentication import get_device
+from users.cache import get_profile, invalidate_profile, set_profile
+from users.conditional import check_preconditions, set_validators
+from users.filters import UserFilter
+from users.events import record_event
+from users.models import (
+    AuthEvent, AuthToken, MyUser, UserBulkJob, VerificationCode
+)
+from users.stats import get_stats
 from users.serializers import (
+    BulkVerificationCodeSerializer,
     CustomUserSerializer,
+    UserBulkJobSerializer,
     VerificationCodeSerializer,
     AuthOTPCodeSerializer)
 
 
-@extend_schema_view(**COLLECT_SCHEMA)
 class CustomUserViewSet(UserViewSet):
     """
     Кастомный ViewSet для работы с пользователями.
@@ -27,12 +38,16 @@ class CustomUserViewSet(UserViewSet):
         - queryset: Запрос, возвращающий все объекты User.
         - serializer_class: Сериализатор, используемый для преобразования
         данных пользователя.
+        - filterset_class: Фильтры списка пользователей для администраторов
+        (поиск по триграммным индексам, роль, активность).
     Permissions:
         - permission_classes: Список классов разрешений для ViewSet. Здесь
         установлен AllowAny для открытого доступа.
     """
 
     queryset = MyUser.objects.all()
+    filterset_class = UserFilter
+
     def get_serializer_class(self):
         """
         Возвращает соответствующий класс сериализатора в зависимости от действия.
@@ -43,6 +58,12 @@ class CustomUserViewSet(UserViewSet):
             return AuthOTPCodeSerializer
         elif self.action == 'verification_code':
             return VerificationCodeSerializer
+        elif self.action == 'bulk_verification_code':
+            return BulkVerificationCodeSerializer
+        elif self.action in (
+            'bulk_jobs', 'bulk_job', 'bulk_job_cancel', 'bulk_job_resume'
+        ):
+            return UserBulkJobSerializer
         return CustomUserSerializer
 
     def get_permissions(self) -> Tuple:
@@ -51,10 +72,77 @@ class CustomUserViewSet(UserViewSet):
         Returns: Tuple: Кортеж объектов разрешений для текущего действия.
         """
 
-        if self.action == "list":
+        if self.action in (
+            "list", "bulk_verification_code", "bulk_verification_code_job",
+            "stats", "bulk_jobs", "bulk_job", "bulk_job_cancel",
+            "bulk_job_resume",
+        ):
             return (IsAdminUser(),)
         return (AllowAny(),)
 
+    def retrieve(self, request, *args, **kwargs) -> Response:
+        """
+        Возвращает пользователя с заголовками ETag и Last-Modified.
+        Если представление не изменилось (If-None-Match, If-Modified-Since),
+        возвращает 304 без сериализации.
+        """
+
+        instance = self.get_object()
+        not_modified = check_preconditions(request, instance)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return set_validators(Response(serializer.data), instance)
+
+    def update(self, request, *args, **kwargs) -> Response:
+        """
+        Обновляет пользователя с учетом If-Match: если клиент изменял
+        устаревшую версию, возвращает 412 Precondition Failed.
+        """
+
+        partial = kwargs.pop("partial", False)
+        instance = self.get_object()
+        precondition_failed = check_preconditions(request, instance)
+        if precondition_failed is not None:
+            return precondition_failed
+        serializer = self.get_serializer(
+            instance, data=request.data, partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return set_validators(Response(serializer.data), instance)
+
+    @action(["get", "put", "patch", "delete"], detail=False)
+    def me(self, request, *args, **kwargs) -> Response:
+        """
+        Работа с профилем текущего пользователя.
+        GET отдает сериализованный профиль из кэша Redis (или 304 по
+        ETag/Last-Modified), PUT и PATCH записывают обновленный профиль
+        в кэш, DELETE удаляет его из кэша.
+        Parameters: request (Request): Запрос текущего пользователя.
+        Returns: Response: Ответ с профилем пользователя.
+        """
+
+        user = request.user
+        if not user.is_authenticated:
+            return super().me(request, *args, **kwargs)
+        if request.method == "GET":
+            not_modified = check_preconditions(request, user)
+            if not_modified is not None:
+                return not_modified
+            self.get_object = self.get_instance
+            data = get_profile(
+                user.pk, lambda: self.get_serializer(user).data
+            )
+            return set_validators(Response(data), user)
+
+        response = super().me(request, *args, **kwargs)
+        if request.method in ("PUT", "PATCH") and response.status_code == 200:
+            set_profile(user.pk, response.data)
+        elif request.method == "DELETE":
+            invalidate_profile(user.pk)
+        return response
+
     @action(detail=False, methods=['post'])
     def verification_code(self, request) -> Response:
         """
@@ -66,12 +154,178 @@ class CustomUserViewSet(UserViewSet):
         Raises:
             ValidationError: Если данные для создания кода верификации некорректны.
         """
-        serializer = VerificationCodeSerializer(data=request.data)
+        serializer = VerificationCodeSerializer(
+            data=request.data, context={'request': request}
+        )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        record_event(
+            AuthEvent.OTP_REQUESTED,
+            request=request,
+            email=serializer.validated_data['email'],
+        )
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def bulk_verification_code(self, request) -> Response:
+        """
+        Массово выдает OTP-коды списку адресов и ставит отправку писем
+        в очередь. Доступно только администраторам.
+        Parameters: request (Request): Запрос со списком адресов emails.
+        Returns: Response:
+            Ответ с идентификатором задачи рассылки, количеством выданных
+            кодов и ненайденными адресами, статус HTTP 202 ACCEPTED.
+        """
+        serializer = BulkVerificationCodeSerializer(
+            data=request.data, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'bulk_verification_code/(?P<job_id>[0-9a-f]{32})',
+    )
+    def bulk_verification_code_job(self, request, job_id=None) -> Response:
+        """
+        Возвращает прогресс задачи массовой рассылки OTP-кодов.
+        Parameters: job_id (str): Идентификатор задачи рассылки.
+        Returns: Response:
+            Ответ с количеством отправленных и неотправленных писем
+            или статус HTTP 404 NOT FOUND, если задача не найдена.
+        """
+        job = get_job(job_id)
+        if job is None:
+            return Response(
+                "Задача не найдена или истек срок хранения сведений о ней",
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(job)
+
+    @action(detail=False, methods=['get', 'post'])
+    def bulk_jobs(self, request) -> Response:
+        """
+        Возвращает последние массовые операции над пользователями (GET)
+        или создает новую и ставит ее в очередь (POST). Доступно только
+        администраторам.
+        Parameters: request (Request):
+            Запрос с операцией operation, ролью role (для set_role)
+            и идентификаторами пользователей ids.
+        Returns: Response:
+            Список операций или созданная операция со статусом
+            HTTP 202 ACCEPTED.
+        """
+        if request.method == 'GET':
+            jobs = UserBulkJob.objects.all()
+            page = self.paginate_queryset(jobs)
+            if page is not None:
+                serializer = UserBulkJobSerializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            serializer = UserBulkJobSerializer(
+                jobs[:settings.USER_BULK_JOB_LIST_SIZE], many=True
+            )
+            return Response(serializer.data)
+
+        serializer = UserBulkJobSerializer(
+            data=request.data, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=r'bulk_jobs/(?P<job_pk>[0-9]+)',
+    )
+    def bulk_job(self, request, job_pk=None) -> Response:
+        """
+        Возвращает состояние и прогресс массовой операции.
+        Parameters: job_pk (str): Идентификатор операции.
+        Returns: Response: Операция или статус HTTP 404 NOT FOUND.
+        """
+        job = self._get_bulk_job(job_pk)
+        if job is None:
+            return Response(
+                "Операция не найдена", status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(UserBulkJobSerializer(job).data)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path=r'bulk_jobs/(?P<job_pk>[0-9]+)/cancel',
+    )
+    def bulk_job_cancel(self, request, job_pk=None) -> Response:
+        """
+        Отменяет массовую операцию. Выполняющаяся операция
+        останавливается после текущей пачки.
+        Parameters: job_pk (str): Идентификатор операции.
+        Returns: Response:
+            Операция или статус HTTP 409 CONFLICT, если операция
+            уже завершена.
+        """
+        return self._change_bulk_job(job_pk, bulk.cancel_job)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path=r'bulk_jobs/(?P<job_pk>[0-9]+)/resume',
+    )
+    def bulk_job_resume(self, request, job_pk=None) -> Response:
+        """
+        Возобновляет отмененную, прерванную ошибкой или зависшую массовую
+        операцию с последнего обработанного пользователя.
+        Parameters: job_pk (str): Идентификатор операции.
+        Returns: Response:
+            Операция или статус HTTP 409 CONFLICT, если операция
+            не отменена, не прервана и не зависла.
+        """
+        return self._change_bulk_job(job_pk, bulk.resume_job)
+
+    def _get_bulk_job(self, job_pk):
+        return UserBulkJob.objects.filter(pk=job_pk).first()
+
+    def _change_bulk_job(self, job_pk, change):
+        job = self._get_bulk_job(job_pk)
+        if job is None:
+            return Response(
+                "Операция не найдена", status=status.HTTP_404_NOT_FOUND
+            )
+        if not change(job):
+            return Response(
+                f"Операция в состоянии {job.get_status_display()}",
+                status=status.HTTP_409_CONFLICT
+            )
+        job.refresh_from_db()
+        return Response(UserBulkJobSerializer(job).data)
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request) -> Response:
+        """
+        Возвращает количество пользователей по ролям, полу, активности
+        и дням регистрации из инкрементально поддерживаемых счетчиков,
+        без GROUP BY по таблице пользователей. Доступно только
+        администраторам.
+        Parameters: request (Request):
+            Запрос с необязательным параметром days - количеством дней
+            статистики регистраций (по умолчанию 30, не более 366).
+        Returns: Response: Ответ со счетчиками пользователей.
+        """
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 366)
+        except ValueError:
+            return Response(
+                "Параметр days должен быть целым числом",
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(get_stats(days))
+
     @action(detail=False, methods=['post'])
     def auth_otp_code(self, request) -> Response:
         """
@@ -91,21 +345,60 @@ class CustomUserViewSet(UserViewSet):
 
         try:
             verification_code = VerificationCode.objects.get(
-                email=email, otp_code=otp_code, used=False)
+                email__lower=email, otp_code=otp_code, used=False)
             verification_code.used = True
             verification_code.save()
-            user = MyUser.objects.get(email=email)
-            token, _ = Token.objects.get_or_create(user=user)
+            user = MyUser.objects.get(email__lower=email)
+            token = AuthToken.objects.issue(user, device=get_device(request))
+            record_event(AuthEvent.OTP_VERIFIED, request=request, user=user)
 
             return Response(
                 {
                     "message": "Вы успешно авторизовались!",
+                    "auth_token": token.key,
+                    "device": token.device,
                 },
                 status=status.HTTP_200_OK
             )
         except ObjectDoesNotExist:
+            record_event(AuthEvent.OTP_FAILED, request=request, email=email)
             return Response(
                 "OTP-код неверен или срок его действия истек",
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
\ No newline at end of file
+
+
+class TokenCreateView(djoser_views.TokenCreateView):
+    """
+    Вход по email и паролю. В отличие от djoser, выдает отдельный
+    токен с ограниченным сроком действия для каждого устройства
+    (AuthToken.objects.issue) вместо одного бессрочного токена
+    на пользователя. Вместе с токеном возвращается идентификатор
+    устройства device.
+    """
+
+    def _action(self, serializer):
+        user = serializer.user
+        token = AuthToken.objects.issue(user, device=get_device(self.request))
+        user_logged_in.send(
+            sender=user.__class__, request=self.request, user=user
+        )
+        return Response(
+            {"auth_token": token.key, "device": token.device},
+            status=status.HTTP_200_OK,
+        )
+
+
+class TokenDestroyView(djoser_views.TokenDestroyView):
+    """
+    Выход: удаляет только токен текущего устройства, токены других
+    устройств пользователя остаются действительными.
+    """
+
+    def post(self, request):
+        if isinstance(request.auth, AuthToken):
+            AuthToken.objects.filter(pk=request.auth.pk).delete()
+        user_logged_out.send(
+            sender=request.user.__class__, request=request, user=request.user
+        )
+        return Response(status=status.HTTP_204_NO_CONTENT)